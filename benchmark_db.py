@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Database Benchmark - Gobioeng HALog
+Compares readings index configurations on a synthetic import: insert
+throughput, latency of the manager's read queries and the query plans
+SQLite picks for the common access shapes.
+
+Usage: python benchmark_db.py [--readings N] [--repeat N] [--config NAME ...]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from database import DatabaseManager
+
+NATURAL_KEY = (
+    "idx_readings_natural_key",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_readings_natural_key ON readings(parameter_id, serial_id, ts)",
+)
+TIME = ("idx_readings_ts", "CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings(ts)")
+
+# Index configuration name -> readings index definitions
+INDEX_CONFIGS = {
+    "natural_key": [NATURAL_KEY],
+    "covering": [
+        NATURAL_KEY,
+        TIME,
+        (
+            "idx_readings_covering",
+            "CREATE INDEX IF NOT EXISTS idx_readings_covering ON readings(parameter_id, serial_id, ts, avg, min, max, count)",
+        ),
+    ],
+    "parameter_ts": [
+        NATURAL_KEY,
+        TIME,
+        (
+            "idx_readings_parameter_ts",
+            "CREATE INDEX IF NOT EXISTS idx_readings_parameter_ts ON readings(parameter_id, ts)",
+        ),
+    ],
+    # What DatabaseManager creates today (natural key + ts)
+    "current": DatabaseManager.READING_INDEXES,
+}
+
+# Access shapes of the manager's readings queries, for EXPLAIN QUERY PLAN
+PLAN_QUERIES = {
+    "parameter+serial range": (
+        "SELECT ts, avg, min, max, count FROM readings "
+        "WHERE parameter_id = 1 AND serial_id = 1 AND ts BETWEEN 0 AND 1 ORDER BY ts"
+    ),
+    "parameter range": (
+        "SELECT ts, serial_id, avg, min, max, count FROM readings "
+        "WHERE parameter_id = 1 AND ts BETWEEN 0 AND 1 ORDER BY ts"
+    ),
+    "time bounds": "SELECT MIN(ts), MAX(ts) FROM readings",
+}
+
+
+def synthetic_readings(total: int, serials: int = 4, parameters: int = 25) -> pd.DataFrame:
+    """Parser-shaped readings: one per minute per (serial, parameter)"""
+    per_series = max(total // (serials * parameters), 1)
+    times = pd.date_range("2024-01-01", periods=per_series, freq="60s")
+    rng = np.random.default_rng(0)
+    frames = []
+    for serial in range(serials):
+        for parameter in range(parameters):
+            avg = rng.normal(10.0, 1.0, per_series)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "datetime": times,
+                        "serial_number": f"{serial + 1:03d}",
+                        "parameter_type": f"param{parameter:02d}",
+                        "count": 60,
+                        "min_value": avg - 1.0,
+                        "max_value": avg + 1.0,
+                        "avg_value": avg,
+                    }
+                )
+            )
+    # Parser output is in time order across all series
+    return pd.concat(frames, ignore_index=True).sort_values("datetime", kind="stable")
+
+
+def timed(function, repeat: int) -> float:
+    """Best wall time of repeat calls, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def run_config(name: str, indexes, readings: pd.DataFrame, repeat: int) -> dict:
+    """Import readings with the given indexes and time the read queries"""
+    manager_class = type(
+        "BenchmarkDatabaseManager", (DatabaseManager,), {"READING_INDEXES": indexes}
+    )
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db = manager_class(os.path.join(temp_dir, "benchmark.db"))
+        start = time.perf_counter()
+        db.insert_data_batch(readings)
+        insert_seconds = time.perf_counter() - start
+        db.optimize_for_reading()
+
+        first = readings["datetime"].iloc[0]
+        week = (first, first + pd.Timedelta(days=7))
+
+        def uncached(function, *args, **kwargs):
+            def call():
+                db.query_cache.invalidate()
+                function(*args, **kwargs)
+
+            return call
+
+        latencies = {
+            "trend serial week": timed(
+                uncached(db.get_parameter_trend, "param00", "001", *week, resolution_seconds=1),
+                repeat,
+            ),
+            "trend all serials week": timed(
+                uncached(db.get_parameter_trend, "param00", None, *week, resolution_seconds=1),
+                repeat,
+            ),
+            "load parameter": timed(
+                uncached(db.load_readings, "param00", columns=["avg"]), repeat
+            ),
+            "logs by parameter": timed(
+                uncached(db.get_logs_by_parameter, "param00", "001"), repeat
+            ),
+            "summary": timed(uncached(db.get_summary_statistics), repeat),
+        }
+
+        with db.get_read_connection() as conn:
+            plans = {
+                shape: "; ".join(
+                    row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query)
+                )
+                for shape, query in PLAN_QUERIES.items()
+            }
+        # Move the import out of the -wal file so the size covers every page
+        with db.get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        size = db.get_database_size()
+        db.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        "config": name,
+        "insert_per_sec": len(readings) / max(insert_seconds, 1e-9),
+        "size_mb": size / 1e6,
+        "latencies": latencies,
+        "plans": plans,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark readings index configurations")
+    parser.add_argument("--readings", type=int, default=200000, help="synthetic readings to import")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query (best is reported)")
+    parser.add_argument(
+        "--config",
+        action="append",
+        choices=sorted(INDEX_CONFIGS),
+        help="index configuration to run (default: all)",
+    )
+    args = parser.parse_args()
+
+    readings = synthetic_readings(args.readings)
+    print(f"Benchmarking {len(readings):,} readings\n")
+
+    results = [
+        run_config(name, INDEX_CONFIGS[name], readings, args.repeat)
+        for name in (args.config or INDEX_CONFIGS)
+    ]
+
+    for result in results:
+        print(f"== {result['config']}")
+        print(f"  insert: {result['insert_per_sec']:,.0f} readings/sec, size {result['size_mb']:.1f} MB")
+        for query, milliseconds in result["latencies"].items():
+            print(f"  {query:<24} {milliseconds:9.2f} ms")
+        for shape, plan in result["plans"].items():
+            print(f"  plan {shape:<22} {plan}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Columnar Cache - Gobioeng HALog
+Parquet mirror of the readings for analytics that need a few columns over a
+long time range. Files are hive-partitioned by serial and month, so a query
+for one machine and period only opens the matching directories, and the
+row-group statistics of each file skip parameters that were not asked for.
+Requires pyarrow; without it the mirror is disabled and reads use SQLite.
+"""
+
+import os
+import shutil
+import threading
+import uuid
+from typing import List, Optional
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+if PYARROW_AVAILABLE:
+    READING_SCHEMA = pa.schema(
+        [
+            ("ts", pa.int64()),
+            ("param", pa.string()),
+            ("avg", pa.float64()),
+            ("min", pa.float64()),
+            ("max", pa.float64()),
+            ("count", pa.int64()),
+            ("data_quality", pa.string()),
+        ]
+    )
+    # Directory keys are kept as text ("001" must not become 1)
+    PARTITION_SCHEMA = pa.schema([("serial", pa.string()), ("month", pa.string())])
+
+
+class ColumnarCache:
+    """Append-only Parquet mirror of the readings table"""
+
+    # Rows per row group; files are sorted by (param, ts) so each group spans
+    # few parameters and its min/max statistics prune well
+    ROW_GROUP_SIZE = 64 * 1024
+
+    # Written once the mirror holds every stored reading
+    COMPLETE_MARKER = "_complete"
+
+    # A month directory with more files than this is rewritten as one file;
+    # every import adds a file to each (serial, month) it touches
+    MAX_MONTH_FILES = 16
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _month(ts) -> str:
+        return pd.Timestamp(int(ts), unit="s").strftime("%Y_%m")
+
+    def is_complete(self) -> bool:
+        """True when the mirror can answer queries instead of SQLite"""
+        return PYARROW_AVAILABLE and os.path.exists(
+            os.path.join(self.root, self.COMPLETE_MARKER)
+        )
+
+    def mark_complete(self, complete: bool = True):
+        marker = os.path.join(self.root, self.COMPLETE_MARKER)
+        if complete:
+            os.makedirs(self.root, exist_ok=True)
+            open(marker, "w").close()
+        elif os.path.exists(marker):
+            os.remove(marker)
+
+    def clear(self):
+        """Delete every mirrored file"""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def drop_before(self, cutoff_ts: int):
+        """Remove mirrored readings older than cutoff_ts (expired by retention)"""
+        if not PYARROW_AVAILABLE or not os.path.isdir(self.root):
+            return
+        cutoff_month = self._month(cutoff_ts)
+
+        with self._lock:
+            for serial_dir in os.scandir(self.root):
+                if not serial_dir.is_dir():
+                    continue
+                for month_dir in os.scandir(serial_dir.path):
+                    month = month_dir.name.partition("=")[2]
+                    if month < cutoff_month:
+                        shutil.rmtree(month_dir.path)
+                    elif month == cutoff_month:
+                        # Rewrite the month holding the cutoff without the old rows
+                        self._rewrite_month(
+                            month_dir.path, ds.field("ts") >= int(cutoff_ts)
+                        )
+
+    @staticmethod
+    def _month_files(directory: str) -> List[str]:
+        return [
+            entry.path
+            for entry in os.scandir(directory)
+            if entry.name.endswith(".parquet") and not entry.name.startswith(".")
+        ]
+
+    def _rewrite_month(self, directory: str, keep=None) -> int:
+        """
+        Replace a month directory's files with one sorted file (rows matching
+        keep only); the caller holds the lock. Returns the rows kept.
+        """
+        files = self._month_files(directory)
+        table = ds.dataset(files, schema=READING_SCHEMA, format="parquet").to_table(
+            filter=keep
+        )
+        if not table.num_rows:
+            shutil.rmtree(directory)
+            return 0
+
+        table = table.sort_by([("param", "ascending"), ("ts", "ascending")])
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        # Dot-files are skipped by dataset discovery until renamed
+        pq.write_table(
+            table,
+            os.path.join(directory, "." + name),
+            row_group_size=self.ROW_GROUP_SIZE,
+        )
+        os.replace(os.path.join(directory, "." + name), os.path.join(directory, name))
+        for path in files:
+            os.remove(path)
+        return table.num_rows
+
+    def compact(self) -> int:
+        """Rewrite every month holding more than one file; returns months compacted"""
+        if not PYARROW_AVAILABLE or not os.path.isdir(self.root):
+            return 0
+        compacted = 0
+        with self._lock:
+            for serial_dir in os.scandir(self.root):
+                if not serial_dir.is_dir():
+                    continue
+                for month_dir in os.scandir(serial_dir.path):
+                    if len(self._month_files(month_dir.path)) > 1:
+                        self._rewrite_month(month_dir.path)
+                        compacted += 1
+        return compacted
+
+    def append(self, frame: pd.DataFrame) -> int:
+        """
+        Write new readings, one file per (serial, month) touched; a month
+        that reaches MAX_MONTH_FILES files is compacted into one
+
+        frame has ts (epoch seconds), serial, param, avg, min, max, count and
+        data_quality columns.
+        """
+        if not PYARROW_AVAILABLE or frame.empty:
+            return 0
+
+        frame = frame.assign(
+            count=pd.to_numeric(frame["count"], errors="coerce").astype("Int64"),
+            data_quality=frame["data_quality"].astype(object),
+        )
+        # Month of each row straight from the epoch values (no string formatting)
+        months = (
+            frame["ts"].to_numpy(dtype="int64").astype("datetime64[s]").astype("datetime64[M]")
+        )
+
+        with self._lock:
+            for (serial, month), group in frame.groupby(
+                [frame["serial"].astype(str).to_numpy(), months], sort=False
+            ):
+                month = str(np.datetime64(month, "M")).replace("-", "_")
+                directory = os.path.join(
+                    self.root, f"serial={quote(serial, safe='')}", f"month={month}"
+                )
+                os.makedirs(directory, exist_ok=True)
+                group = group.sort_values(["param", "ts"], kind="stable")
+                table = pa.Table.from_pandas(
+                    group[READING_SCHEMA.names],
+                    schema=READING_SCHEMA,
+                    preserve_index=False,
+                )
+                pq.write_table(
+                    table,
+                    os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"),
+                    row_group_size=self.ROW_GROUP_SIZE,
+                )
+                if len(self._month_files(directory)) > self.MAX_MONTH_FILES:
+                    self._rewrite_month(directory)
+        return len(frame)
+
+    def load(
+        self,
+        parameter_type: Optional[str] = None,
+        serial_number: Optional[str] = None,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read readings with partition, row-group and column pruning
+
+        Holds the lock from file discovery to the end of the read, so a
+        compaction or retention rewrite cannot remove a listed file mid-read.
+        """
+        columns = list(columns) if columns else ["serial"] + READING_SCHEMA.names
+        terms = []
+        if parameter_type is not None:
+            terms.append(ds.field("param") == parameter_type)
+        if serial_number is not None:
+            terms.append(ds.field("serial") == str(serial_number))
+        if start_ts is not None:
+            terms.append(ds.field("month") >= self._month(start_ts))
+            terms.append(ds.field("ts") >= int(start_ts))
+        if end_ts is not None:
+            terms.append(ds.field("month") <= self._month(end_ts))
+            terms.append(ds.field("ts") <= int(end_ts))
+
+        expression = None
+        for term in terms:
+            expression = term if expression is None else expression & term
+
+        with self._lock:
+            if not os.path.isdir(self.root):
+                return pd.DataFrame(columns=columns)
+            # Explicit schema: an empty mirror has no file to infer it from
+            dataset = ds.dataset(
+                self.root,
+                schema=pa.unify_schemas([READING_SCHEMA, PARTITION_SCHEMA]),
+                format="parquet",
+                partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            )
+            table = dataset.to_table(columns=columns, filter=expression)
+        return table.to_pandas()
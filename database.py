@@ -4,27 +4,257 @@ Provides optimized database operations for LINAC water system data
 """
 
 import sqlite3
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict
+from typing import Dict, Iterator, Optional
+import copy
+import functools
+import hashlib
+import inspect
 import os
-from functools import reduce
+import pickle
+import queue
+import re
+import stat
+import threading
 import time
 import traceback
-from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import closing, contextmanager, nullcontext
+from pathlib import Path
+
+from columnar_cache import PYARROW_AVAILABLE, ColumnarCache
+
+
+def file_content_hash(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, used to recognise re-imported logs"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class QueryCache:
+    """LRU cache of query results bounded by an approximate byte budget"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Object columns of larger frames are sized from this many evenly spaced rows
+    SIZE_SAMPLE_ROWS = 1000
+
+    @classmethod
+    def _estimate_size(cls, value) -> int:
+        if isinstance(value, pd.DataFrame):
+            # deep=True counts the strings behind object columns
+            if len(value) <= cls.SIZE_SAMPLE_ROWS:
+                return int(value.memory_usage(index=True, deep=True).sum())
+            sample = value.iloc[:: len(value) // cls.SIZE_SAMPLE_ROWS]
+            per_row = sample.memory_usage(index=True, deep=True).sum() / len(sample)
+            return int(per_row * len(value))
+        return len(pickle.dumps(value))
+
+    @staticmethod
+    def _copy(value):
+        # Deep copies: edits to a returned frame's values never reach the cache
+        if isinstance(value, pd.DataFrame):
+            return value.copy(deep=True)
+        return copy.deepcopy(value)
+
+    def get(self, key):
+        """Return (True, value) for a hit or (False, None) for a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._copy(entry[0])
+
+    def put(self, key, value, generation: int):
+        """Store a result read at the given write generation"""
+        size = self._estimate_size(value)
+        with self._lock:
+            # Results read before the last write are already stale
+            if generation != self.generation or size > self.max_bytes:
+                return
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def invalidate(self):
+        """Bump the write generation and drop every cached result"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+def cached_query(ignore=()):
+    """Cache a DatabaseManager read method by its arguments (minus ignore)"""
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (method.__name__,) + tuple(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in bound.arguments.items()
+                if name != "self" and name not in ignore
+            )
+
+            hit, value = self.query_cache.get(key)
+            if hit:
+                return value
+
+            generation = self.query_cache.generation
+            value = method(self, *args, **kwargs)
+            # Empty results are cheap and may come from a transient error
+            if value is not None and len(value) > 0:
+                self.query_cache.put(key, QueryCache._copy(value), generation)
+            return value
+
+        return wrapper
+
+    return decorator
 
 
 class DatabaseManager:
     """Enhanced database manager with batch operations and optimized queries"""
 
-    def __init__(self, db_path: str):
+    # PRAGMA user_version of the current layout (0: long water_logs table,
+    # 1: wide readings table with serial/parameter dimensions, 2: rollups,
+    # 3: unique reading key and file content hashes, 4: integer epoch ts,
+    # 5: one covering index on water_logs_legacy instead of six,
+    # 6: reading_summary / reading_quality_summary counters,
+    # 7: fault code type column, 8: unique fault event/interval keys)
+    SCHEMA_VERSION = 8
+
+    # Retention is opt-in. Raw readings are folded into the rollups on insert,
+    # so expiring them keeps the hourly/daily trends; legacy rows never are
+    # and stay until migrate_legacy_readings() has moved them
+    DEFAULT_RETENTION_DAYS = {
+        "readings": None,
+        "water_logs_hourly": None,
+        "water_logs_daily": None,
+    }
+
+    # Indices of the long layout, left on water_logs_legacy by the rename
+    LEGACY_INDEXES = [
+        "idx_datetime",
+        "idx_parameter_type",
+        "idx_serial_parameter",
+        "idx_datetime_parameter",
+        "idx_statistic_type",
+        "idx_combined",
+    ]
+
+    # Queued frames committed in one transaction by the ingest writer, up to
+    # this many parser rows
+    GROUP_COMMIT_ROWS = 200000
+
+    # Background maintenance thresholds: freelist pages before incremental
+    # vacuum steps, WAL bytes before the WAL is truncated, and seconds
+    # between PRAGMA optimize runs
+    MAINTENANCE_FREE_PAGES = 1000
+    MAINTENANCE_WAL_BYTES = 64 * 1024 * 1024
+    MAINTENANCE_OPTIMIZE_SECONDS = 3600
+
+    # Rollup table -> bucket width in seconds (buckets are epoch seconds)
+    ROLLUP_TABLES = {
+        "water_logs_hourly": 3600,
+        "water_logs_daily": 86400,
+    }
+
+    def __init__(
+        self,
+        db_path: str,
+        cache_bytes: int = 256 * 1024 * 1024,
+        reader_pool_size: int = 4,
+        partition_by_month: bool = False,
+        columnar_mirror: bool = False,
+        retention_days: Optional[Dict[str, Optional[int]]] = None,
+        ingest_queue_size: int = 8,
+        hot_days: Optional[float] = None,
+    ):
         self.db_path = db_path
-        self.connection_pool = {}
+        # New readings go to one attached database file per calendar month
+        self.partition_by_month = partition_by_month
+        self.partition_dir = os.path.splitext(db_path)[0] + "_partitions"
+        # Days of history kept per table by apply_retention (None = forever)
+        self.retention_days = dict(self.DEFAULT_RETENTION_DAYS, **(retention_days or {}))
         self.prepared_statements = {}
+        # One writer connection shared by all threads behind a lock, plus a
+        # bounded pool of read-only connections for queries
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._idle_readers = []
+        self._pool_lock = threading.Lock()
+        self._reader_slots = threading.BoundedSemaphore(reader_pool_size)
+        self._reader_local = threading.local()
+        # Frames waiting for the ingest writer thread (see submit_data_batch)
+        self._ingest_queue = queue.Queue(maxsize=ingest_queue_size)
+        self._ingest_thread = None
+        # Guards starting and stopping the background threads
+        self._service_lock = threading.Lock()
+        # Background maintenance (see start_maintenance); passes wait for
+        # imports to go quiet
+        self._maintenance_thread = None
+        self._maintenance_stop = threading.Event()
+        self._last_write = time.monotonic()
+        self._last_optimize = None
+        # Read results reused until the next write to readings
+        self.query_cache = QueryCache(cache_bytes)
+        # In-memory copy of the dimensions, rollups, counters and the last
+        # hot_days of readings, serving interactive reads (see
+        # _replica_connection); refreshed by every insert
+        self.hot_days = hot_days
+        self._hot = None
+        self._hot_horizon = -(2**63)
+        self._hot_lock = threading.RLock()
+        # Parquet copy of the readings for column/range scans (needs pyarrow)
+        self.columnar_cache = None
+        if columnar_mirror:
+            if PYARROW_AVAILABLE:
+                self.columnar_cache = ColumnarCache(
+                    os.path.splitext(db_path)[0] + "_columnar"
+                )
+            else:
+                print("pyarrow not installed; columnar mirror disabled")
         self.init_db()
 
+        if self.columnar_cache is not None and not self.columnar_cache.is_complete():
+            # A new database is trivially mirrored; an existing one needs
+            # rebuild_columnar_mirror() before the mirror is used
+            if self.get_record_count() == 0:
+                self.columnar_cache.clear()
+                self.columnar_cache.mark_complete()
+
+        self._load_hot_replica()
+
     def init_db(self):
         """Initialize database with enhanced schema"""
         with self.get_connection() as conn:
+            # Freed pages can be returned in steps (only takes effect on a new
+            # file; vacuum_database converts an existing one)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
             # Enable performance optimizations
             conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("PRAGMA synchronous=NORMAL")
@@ -32,27 +262,83 @@ class DatabaseManager:
             conn.execute("PRAGMA temp_store=MEMORY")
             conn.execute("PRAGMA mmap_size=30000000")
 
-            # Create tables if they don't exist
+            # Dimension tables shared by all readings
             conn.execute(
                 """
-                CREATE TABLE IF NOT EXISTS water_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    datetime TEXT NOT NULL,
-                    serial_number TEXT NOT NULL,
-                    parameter_type TEXT NOT NULL,
-                    statistic_type TEXT NOT NULL,
-                    value REAL NOT NULL,
-                    count INTEGER,
+                CREATE TABLE IF NOT EXISTS serials (
+                    id INTEGER PRIMARY KEY,
+                    serial_number TEXT NOT NULL UNIQUE
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS parameters (
+                    id INTEGER PRIMARY KEY,
+                    parameter_type TEXT NOT NULL UNIQUE,
                     unit TEXT,
                     description TEXT,
-                    data_quality TEXT,
-                    raw_parameter TEXT,
-                    line_number INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    raw_parameter TEXT
+                )
+            """
+            )
+
+            # One row per reading with avg/min/max side by side
+            self._create_readings_table(conn)
+
+            # Per-hour and per-day aggregates maintained by insert_data_batch
+            self._create_rollup_tables(conn)
+
+            # Counters kept in step with every insert and delete of readings
+            # (main, partitions and legacy rows), so dashboard figures never
+            # scan the readings
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reading_summary (
+                    serial_number TEXT NOT NULL,
+                    parameter_type TEXT NOT NULL,
+                    readings INTEGER NOT NULL,
+                    statistics INTEGER NOT NULL,
+                    first_ts INTEGER,
+                    last_ts INTEGER,
+                    PRIMARY KEY (serial_number, parameter_type)
+                ) WITHOUT ROWID
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reading_quality_summary (
+                    data_quality TEXT NOT NULL PRIMARY KEY,
+                    statistics INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """
+            )
+
+            # Latest cutoff applied by apply_retention per table
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS retention_horizons (
+                    name TEXT PRIMARY KEY,
+                    cutoff_ts INTEGER NOT NULL
+                )
+            """
+            )
+
+            # Monthly partition files holding readings (see partition_by_month)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS partitions (
+                    month TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    start_ts INTEGER NOT NULL,
+                    end_ts INTEGER NOT NULL,
+                    read_only INTEGER NOT NULL DEFAULT 0
                 )
             """
             )
 
+            self._migrate_schema(conn)
+
             # Create optimized indices
             self._create_indices(conn)
 
@@ -65,13 +351,132 @@ class DatabaseManager:
                     file_size INTEGER,
                     records_imported INTEGER,
                     import_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    parsing_stats TEXT
+                    parsing_stats TEXT,
+                    content_hash TEXT
+                )
+            """
+            )
+            # Files already imported are recognised by content, not by name
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_file_content_hash "
+                "ON file_metadata(content_hash)"
+            )
+
+            # Fault/interlock occurrences extracted from machine logs
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fault_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    datetime TEXT NOT NULL,
+                    serial_number TEXT NOT NULL,
+                    fault_code TEXT NOT NULL,
+                    event_type TEXT,
+                    state TEXT,
+                    message TEXT,
+                    line_number INTEGER
+                )
+            """
+            )
+
+            # HAL/TB fault code catalogue used to describe fault events
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fault_codes (
+                    code TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    description TEXT,
+                    type TEXT,
+                    PRIMARY KEY (code, source)
+                ) WITHOUT ROWID
+            """
+            )
+            # Content hash of the catalogue file each source was loaded from
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fault_code_files (
+                    source TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL
+                )
+            """
+            )
+            self._create_fault_code_search(conn)
+
+            # Paired fault assert/clear intervals for duration statistics
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS fault_intervals (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    serial_number TEXT NOT NULL,
+                    fault_code TEXT NOT NULL,
+                    event_type TEXT,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    duration_seconds REAL
                 )
             """
             )
+            self._create_fault_indices(conn)
+
+            # Old queries keep working against the long (one row per statistic) layout
+            self._create_compat_view(conn)
 
             conn.commit()
 
+    def _create_readings_table(
+        self, conn, name: str = "readings", foreign_keys: bool = True
+    ):
+        """Create the wide readings table (ts is naive local time as epoch seconds)"""
+        # Partition files hold readings only; their dimensions live in main
+        serial_ref = " REFERENCES serials(id)" if foreign_keys else ""
+        parameter_ref = " REFERENCES parameters(id)" if foreign_keys else ""
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts INTEGER NOT NULL,
+                serial_id INTEGER NOT NULL{serial_ref},
+                parameter_id INTEGER NOT NULL{parameter_ref},
+                avg REAL,
+                min REAL,
+                max REAL,
+                count INTEGER,
+                data_quality TEXT,
+                line_number INTEGER
+            )
+        """
+        )
+
+    def _create_rollup_tables(self, conn):
+        """Create the hourly/daily rollup tables keyed by epoch bucket start"""
+        for table in self.ROLLUP_TABLES:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    parameter_id INTEGER NOT NULL,
+                    serial_id INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    min REAL,
+                    max REAL,
+                    avg REAL,
+                    sample_count INTEGER NOT NULL,
+                    reading_count INTEGER NOT NULL,
+                    PRIMARY KEY (parameter_id, serial_id, bucket)
+                ) WITHOUT ROWID
+            """
+            )
+
+    # Indices of every readings table (main database and partition files)
+    READING_INDEXES = [
+        (
+            "idx_readings_ts",
+            "CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings(ts)",
+        ),
+        (
+            "idx_readings_natural_key",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_readings_natural_key ON readings(parameter_id, serial_id, ts)",
+        ),
+    ]
+
     def _create_indices(self, conn):
         """Create optimized database indices"""
         # Check if indices already exist to avoid redundant operations
@@ -80,340 +485,2968 @@ class DatabaseManager:
         ).fetchall()
         existing_indices = [idx[0] for idx in indices]
 
-        index_definitions = [
-            (
-                "idx_datetime",
-                "CREATE INDEX IF NOT EXISTS idx_datetime ON water_logs(datetime)",
-            ),
-            (
-                "idx_parameter_type",
-                "CREATE INDEX IF NOT EXISTS idx_parameter_type ON water_logs(parameter_type)",
-            ),
-            (
-                "idx_serial_parameter",
-                "CREATE INDEX IF NOT EXISTS idx_serial_parameter ON water_logs(serial_number, parameter_type)",
-            ),
-            (
-                "idx_datetime_parameter",
-                "CREATE INDEX IF NOT EXISTS idx_datetime_parameter ON water_logs(datetime, parameter_type)",
-            ),
-            (
-                "idx_statistic_type",
-                "CREATE INDEX IF NOT EXISTS idx_statistic_type ON water_logs(statistic_type)",
-            ),
-            (
-                "idx_combined",
-                "CREATE INDEX IF NOT EXISTS idx_combined ON water_logs(datetime, serial_number, parameter_type, statistic_type)",
-            ),
-        ]
-
-        for idx_name, idx_query in index_definitions:
+        for idx_name, idx_query in self.READING_INDEXES:
             if idx_name not in existing_indices:
                 conn.execute(idx_query)
 
+        # Legacy rows are only read by parameter (and serial) in time order;
+        # the index carries every selected column so rows are never visited
+        if self._has_table(conn, "water_logs_legacy"):
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_legacy_parameter_serial_time "
+                "ON water_logs_legacy(parameter_type, serial_number, datetime, "
+                "statistic_type, value, unit, data_quality)"
+            )
+
+    @staticmethod
+    def _epoch_seconds(value) -> int:
+        """Naive timestamp -> epoch seconds as stored in readings.ts"""
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        return int(timestamp.value // 1_000_000_000)
+
+    @staticmethod
+    def _epoch_to_datetime(values):
+        """Epoch seconds (NaN allowed) -> datetime64[ns] without string parsing"""
+        return pd.to_datetime(values, unit="s").astype("datetime64[ns]")
+
+    def _has_table(self, conn, name: str) -> bool:
+        """Check whether a table (not a view) exists"""
+        return (
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+            ).fetchone()
+            is not None
+        )
+
+    def _migrate_schema(self, conn):
+        """Upgrade older database layouts in place"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+
+        if version < 1 and self._has_table(conn, "water_logs"):
+            # Rows of the long layout stay readable through the water_logs view
+            conn.execute("ALTER TABLE water_logs RENAME TO water_logs_legacy")
+            print("Existing water_logs data kept in water_logs_legacy")
+
+        readings_columns = [
+            row[1] for row in conn.execute("PRAGMA table_info(readings)")
+        ]
+        time_column = "datetime" if "datetime" in readings_columns else "ts"
+
+        if version < 3:
+            # Re-imports used to duplicate readings; keep the first copy so the
+            # natural key can become unique
+            removed = conn.execute(
+                f"""
+                DELETE FROM readings WHERE id NOT IN (
+                    SELECT MIN(id) FROM readings
+                    GROUP BY parameter_id, serial_id, {time_column}
+                )
+            """
+            ).rowcount
+            if removed:
+                print(f"Removed {removed:,} duplicate readings")
+            conn.execute("DROP INDEX IF EXISTS idx_readings_param_serial_time")
+
+            if self._has_table(conn, "file_metadata") and "content_hash" not in [
+                row[1] for row in conn.execute("PRAGMA table_info(file_metadata)")
+            ]:
+                conn.execute("ALTER TABLE file_metadata ADD COLUMN content_hash TEXT")
+
+        if version < 4:
+            if time_column == "datetime":
+                # Rebuild readings with the TEXT datetime converted to epoch seconds
+                conn.execute("DROP VIEW IF EXISTS water_logs")
+                self._create_readings_table(conn, "readings_epoch")
+                conn.execute(
+                    """
+                    INSERT INTO readings_epoch
+                        (id, ts, serial_id, parameter_id, avg, min, max,
+                         count, data_quality, line_number)
+                    SELECT id, CAST(strftime('%s', datetime) AS INTEGER),
+                           serial_id, parameter_id, avg, min, max,
+                           count, data_quality, line_number
+                    FROM readings
+                    WHERE strftime('%s', datetime) IS NOT NULL
+                """
+                )
+                conn.execute("DROP TABLE readings")
+                conn.execute("ALTER TABLE readings_epoch RENAME TO readings")
+                print("Converted reading timestamps to epoch seconds")
+
+            # Rollup buckets become integers as well; rebuilt below
+            for table in self.ROLLUP_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._create_rollup_tables(conn)
+            self._update_rollups(conn)
+
+        if version < 5:
+            # Overlapping indices of the long layout; legacy rows are never
+            # written again and are served by idx_legacy_parameter_serial_time
+            for index in self.LEGACY_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {index}")
+
+        if version < 6:
+            self._rebuild_summary(conn)
+
+        if version < 7 and self._has_table(conn, "fault_codes"):
+            if "type" not in [row[1] for row in conn.execute("PRAGMA table_info(fault_codes)")]:
+                conn.execute("ALTER TABLE fault_codes ADD COLUMN type TEXT")
+
+        if version < 8:
+            # Overlapping logs used to store the same fault twice; keep one
+            # copy (a closed interval over an open one) so the keys can be unique
+            if self._has_table(conn, "fault_events"):
+                removed = conn.execute(
+                    """
+                    DELETE FROM fault_events WHERE id NOT IN (
+                        SELECT MIN(id) FROM fault_events
+                        GROUP BY fault_code, serial_number, datetime, state
+                    )
+                """
+                ).rowcount
+                if removed:
+                    print(f"Removed {removed:,} duplicate fault events")
+                conn.execute("DROP INDEX IF EXISTS idx_fault_code_serial_time")
+            if self._has_table(conn, "fault_intervals"):
+                removed = conn.execute(
+                    """
+                    DELETE FROM fault_intervals WHERE id NOT IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY fault_code, serial_number, start_time
+                                ORDER BY end_time IS NULL, id
+                            ) AS copy
+                            FROM fault_intervals
+                        ) WHERE copy = 1
+                    )
+                """
+                ).rowcount
+                if removed:
+                    print(f"Removed {removed:,} duplicate fault intervals")
+                conn.execute("DROP INDEX IF EXISTS idx_interval_code_serial_start")
+
+        conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _update_rollups(
+        self,
+        conn,
+        after_id: int = 0,
+        source: str = "readings",
+        since_ts: Optional[int] = None,
+    ):
+        """Fold rows of source with id > after_id (and ts >= since_ts) into the rollups"""
+        # Aggregate the new readings once at the finest rollup width; every
+        # rollup table is then merged from this small delta
+        finest_width = min(self.ROLLUP_TABLES.values())
+        conn.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS rollup_delta (
+                parameter_id INTEGER,
+                serial_id INTEGER,
+                bucket,
+                min REAL,
+                max REAL,
+                weighted_sum REAL,
+                sample_count INTEGER,
+                reading_count INTEGER
+            )
+        """
+        )
+        conn.execute("DELETE FROM temp.rollup_delta")
+        # sample_count is the count-weighted size of each avg (NULL count = 1)
+        conn.execute(
+            f"""
+            INSERT INTO temp.rollup_delta
+            SELECT
+                parameter_id,
+                serial_id,
+                ts / {finest_width} * {finest_width} AS bucket,
+                MIN(min),
+                MAX(max),
+                SUM(avg * COALESCE(count, 1)),
+                COALESCE(SUM(CASE WHEN avg IS NOT NULL THEN COALESCE(count, 1) END), 0),
+                COUNT(*)
+            FROM {source}
+            WHERE id > ? AND ts >= ?
+            GROUP BY parameter_id, serial_id, bucket
+        """,
+            (after_id, since_ts if since_ts is not None else -(2**63)),
+        )
+
+        for table, width in self.ROLLUP_TABLES.items():
+            conn.execute(
+                f"""
+                INSERT INTO {table}
+                    (parameter_id, serial_id, bucket, min, max, avg,
+                     sample_count, reading_count)
+                SELECT
+                    parameter_id,
+                    serial_id,
+                    bucket / {width} * {width} AS rollup_bucket,
+                    MIN(min),
+                    MAX(max),
+                    SUM(weighted_sum) / NULLIF(SUM(sample_count), 0),
+                    SUM(sample_count),
+                    SUM(reading_count)
+                FROM temp.rollup_delta
+                WHERE 1
+                GROUP BY parameter_id, serial_id, rollup_bucket
+                ON CONFLICT (parameter_id, serial_id, bucket) DO UPDATE SET
+                    min = COALESCE(MIN(min, excluded.min), min, excluded.min),
+                    max = COALESCE(MAX(max, excluded.max), max, excluded.max),
+                    avg = CASE
+                        WHEN sample_count + excluded.sample_count > 0 THEN
+                            (COALESCE(avg * sample_count, 0)
+                             + COALESCE(excluded.avg * excluded.sample_count, 0))
+                            / (sample_count + excluded.sample_count)
+                    END,
+                    sample_count = sample_count + excluded.sample_count,
+                    reading_count = reading_count + excluded.reading_count
+            """
+            )
+        conn.execute("DELETE FROM temp.rollup_delta")
+
+    def rebuild_rollups(self):
+        """Recompute the hourly and daily rollups from all readings"""
+        try:
+            with self.get_connection() as conn:
+                # Buckets before the raw retention horizon have no readings
+                # left to rebuild from and are kept as they are
+                horizon = conn.execute(
+                    "SELECT cutoff_ts FROM retention_horizons WHERE name = 'readings'"
+                ).fetchone()
+                since_ts = None
+                if horizon is not None:
+                    width = max(self.ROLLUP_TABLES.values())
+                    since_ts = -(-horizon[0] // width) * width
+
+                # Partitions are attached one at a time, outside a transaction
+                for position, source in enumerate(self._iter_reading_sources(conn)):
+                    conn.execute("BEGIN TRANSACTION")
+                    if position == 0:
+                        for table in self.ROLLUP_TABLES:
+                            conn.execute(
+                                f"DELETE FROM {table} WHERE bucket >= ?",
+                                (since_ts if since_ts is not None else -(2**63),),
+                            )
+                    self._update_rollups(conn, 0, source, since_ts)
+                    conn.execute("COMMIT")
+            self._load_hot_replica()
+            self.query_cache.invalidate()
+        except Exception as e:
+            print(f"Error rebuilding rollups: {e}")
+            traceback.print_exc()
+
+    def _update_summary(
+        self, conn, source: str, where: str = "1", params=(), sign: int = 1
+    ):
+        """
+        Add (sign=1) or subtract (sign=-1) the counters of source rows matching where
+
+        source is a readings table or water_logs_legacy, aliased r in where.
+        Called in the transaction that inserts the rows, or before the one
+        that deletes them; first_ts/last_ts only widen here and are narrowed
+        by _refresh_summary_ranges after deletes.
+        """
+        sign = 1 if sign > 0 else -1
+        if source == "water_logs_legacy":
+            # One legacy row per statistic; the avg rows are the readings
+            series = f"""
+                SELECT r.serial_number, r.parameter_type,
+                       SUM(r.statistic_type = 'avg') AS readings,
+                       COUNT(*) AS statistics,
+                       CAST(strftime('%s', MIN(r.datetime)) AS INTEGER) AS first_ts,
+                       CAST(strftime('%s', MAX(r.datetime)) AS INTEGER) AS last_ts
+                FROM water_logs_legacy r
+                WHERE {where}
+                GROUP BY r.serial_number, r.parameter_type
+            """
+            statistics = "COUNT(*)"
+        else:
+            series = f"""
+                SELECT s.serial_number, p.parameter_type,
+                       COUNT(*) AS readings,
+                       COUNT(r.avg) + COUNT(r.min) + COUNT(r.max) AS statistics,
+                       MIN(r.ts) AS first_ts,
+                       MAX(r.ts) AS last_ts
+                FROM {source} r
+                JOIN serials s ON s.id = r.serial_id
+                JOIN parameters p ON p.id = r.parameter_id
+                WHERE {where}
+                GROUP BY r.serial_id, r.parameter_id
+            """
+            statistics = "COUNT(r.avg) + COUNT(r.min) + COUNT(r.max)"
+
+        conn.execute(
+            f"""
+            INSERT INTO reading_summary
+                (serial_number, parameter_type, readings, statistics, first_ts, last_ts)
+            SELECT serial_number, parameter_type,
+                   {sign} * readings, {sign} * statistics, first_ts, last_ts
+            FROM ({series})
+            WHERE 1
+            ON CONFLICT (serial_number, parameter_type) DO UPDATE SET
+                readings = readings + excluded.readings,
+                statistics = statistics + excluded.statistics,
+                first_ts = CASE WHEN {sign} > 0 THEN
+                    COALESCE(MIN(first_ts, excluded.first_ts), first_ts, excluded.first_ts)
+                    ELSE first_ts END,
+                last_ts = CASE WHEN {sign} > 0 THEN
+                    COALESCE(MAX(last_ts, excluded.last_ts), last_ts, excluded.last_ts)
+                    ELSE last_ts END
+        """,
+            params,
+        )
+        conn.execute(
+            f"""
+            INSERT INTO reading_quality_summary (data_quality, statistics)
+            SELECT IFNULL(r.data_quality, ''), {sign} * ({statistics})
+            FROM {source} r
+            WHERE {where}
+            GROUP BY 1
+            ON CONFLICT (data_quality) DO UPDATE SET
+                statistics = statistics + excluded.statistics
+        """,
+            params,
+        )
+        if sign < 0:
+            conn.execute(
+                "DELETE FROM reading_summary WHERE readings <= 0 AND statistics <= 0"
+            )
+            conn.execute("DELETE FROM reading_quality_summary WHERE statistics <= 0")
+
+    def _refresh_summary_ranges(self, conn, before_ts: int):
+        """
+        Recompute first_ts of series whose oldest rows were deleted (ts < before_ts)
+
+        One index seek per series and source; no transaction may be open.
+        """
+        stale = conn.execute(
+            """
+            SELECT rs.serial_number, rs.parameter_type, s.id, p.id
+            FROM reading_summary rs
+            LEFT JOIN serials s ON s.serial_number = rs.serial_number
+            LEFT JOIN parameters p ON p.parameter_type = rs.parameter_type
+            WHERE rs.first_ts < ?
+        """,
+            (int(before_ts),),
+        ).fetchall()
+        if not stale:
+            return
+
+        first = {}
+
+        def add(key, ts):
+            if ts is not None:
+                first[key] = ts if key not in first else min(first[key], ts)
+
+        with closing(self._iter_reading_sources(conn)) as tables:
+            for table in tables:
+                for serial, parameter, serial_id, parameter_id in stale:
+                    if serial_id is not None and parameter_id is not None:
+                        add(
+                            (serial, parameter),
+                            conn.execute(
+                                f"SELECT MIN(ts) FROM {table} "
+                                "WHERE parameter_id = ? AND serial_id = ?",
+                                (parameter_id, serial_id),
+                            ).fetchone()[0],
+                        )
+        if self._has_table(conn, "water_logs_legacy"):
+            for serial, parameter, _, _ in stale:
+                add(
+                    (serial, parameter),
+                    conn.execute(
+                        "SELECT CAST(strftime('%s', MIN(datetime)) AS INTEGER) "
+                        "FROM water_logs_legacy "
+                        "WHERE parameter_type = ? AND serial_number = ?",
+                        (parameter, serial),
+                    ).fetchone()[0],
+                )
+
+        conn.execute("BEGIN TRANSACTION")
+        conn.executemany(
+            "UPDATE reading_summary SET first_ts = ? "
+            "WHERE serial_number = ? AND parameter_type = ?",
+            [(ts, serial, parameter) for (serial, parameter), ts in first.items()],
+        )
+        conn.execute("COMMIT")
+
+    def _rebuild_summary(self, conn):
+        """Recount the summary tables from every source (no transaction may be open)"""
+        with closing(self._iter_reading_sources(conn)) as tables:
+            for position, table in enumerate(tables):
+                conn.execute("BEGIN TRANSACTION")
+                if position == 0:
+                    conn.execute("DELETE FROM reading_summary")
+                    conn.execute("DELETE FROM reading_quality_summary")
+                self._update_summary(conn, table)
+                conn.execute("COMMIT")
+        if self._has_table(conn, "water_logs_legacy"):
+            conn.execute("BEGIN TRANSACTION")
+            self._update_summary(conn, "water_logs_legacy")
+            conn.execute("COMMIT")
+
+    def rebuild_summary(self):
+        """Recount reading_summary / reading_quality_summary from all readings"""
+        try:
+            with self.get_connection() as conn:
+                self._rebuild_summary(conn)
+            self._load_hot_replica()
+            self.query_cache.invalidate()
+        except Exception as e:
+            print(f"Error rebuilding summary: {e}")
+            traceback.print_exc()
+
+    def rebuild_columnar_mirror(self, chunk_size: int = 200000) -> int:
+        """Rewrite the columnar mirror from every reading stored in SQLite"""
+        if self.columnar_cache is None:
+            return 0
+
+        written = 0
+        try:
+            # Readings stored from here on reach the mirror through their own
+            # insert, so the copy stops at the last id each table holds now
+            with self._writer_lock:
+                self.columnar_cache.clear()
+                with self.get_read_connection() as conn, closing(
+                    self._iter_reading_sources(conn)
+                ) as tables:
+                    last_ids = {
+                        table: conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+                        for table in tables
+                    }
+
+            with self.get_read_connection() as conn:
+                queries = []
+                if self._has_table(conn, "water_logs_legacy"):
+                    queries.append(
+                        """
+                        SELECT
+                            CAST(strftime('%s', datetime) AS INTEGER) AS ts,
+                            serial_number AS serial,
+                            parameter_type AS param,
+                            MAX(CASE WHEN statistic_type = 'avg' THEN value END) AS avg,
+                            MAX(CASE WHEN statistic_type = 'min' THEN value END) AS min,
+                            MAX(CASE WHEN statistic_type = 'max' THEN value END) AS max,
+                            MAX(count) AS count,
+                            MAX(data_quality) AS data_quality
+                        FROM water_logs_legacy
+                        WHERE strftime('%s', datetime) IS NOT NULL
+                        GROUP BY datetime, serial_number, parameter_type
+                        """
+                    )
+
+                def copy(query, params=()):
+                    nonlocal written
+                    for chunk in pd.read_sql_query(
+                        query, conn, params=params, chunksize=chunk_size
+                    ):
+                        written += self.columnar_cache.append(chunk)
+
+                with closing(self._iter_reading_sources(conn)) as tables:
+                    for table in tables:
+                        if last_ids.get(table) is not None:
+                            copy(
+                                self._mirror_query(table) + " WHERE r.id <= ?",
+                                (last_ids[table],),
+                            )
+                for query in queries:
+                    copy(query)
+
+            # Chunks spanning a month each left a file in it
+            self.columnar_cache.compact()
+            self.columnar_cache.mark_complete()
+            print(f"Columnar mirror rebuilt with {written:,} readings")
+        except Exception as e:
+            print(f"Error rebuilding columnar mirror: {e}")
+            traceback.print_exc()
+            self.columnar_cache.mark_complete(False)
+        return written
+
+    # Sort key of the legacy covering index; migration chunks follow it
+    LEGACY_KEY = "parameter_type, serial_number, datetime"
+
+    def migrate_legacy_readings(
+        self, chunk_rows: int = 100000, max_chunks: Optional[int] = None, progress_callback=None
+    ) -> Dict:
+        """
+        Move water_logs_legacy rows into readings, one committed chunk at a time
+
+        Chunks of about chunk_rows legacy rows follow the legacy index; each
+        is pivoted to one row per reading and stored like an import
+        (dimensions, duplicates skipped, partitions, rollups, counters). The
+        legacy rows and the legacy_migration checkpoint are updated in the
+        transaction that commits the readings, so readers never see a reading
+        twice and an interrupted run resumes after the last committed chunk
+        (with partition_by_month the months commit first; a rerun skips them).
+        Rows whose datetime does not parse are dropped, as in the schema 4
+        conversion. The emptied legacy table is dropped. progress_callback
+        receives the status dict after each chunk.
+        """
+        key = self.LEGACY_KEY
+        chunks = 0
+        try:
+            while max_chunks is None or chunks < max_chunks:
+                with self.get_connection() as conn:
+                    if not self._has_table(conn, "water_logs_legacy"):
+                        break
+                    if chunks == 0:
+                        conn.execute(
+                            """
+                            CREATE TABLE IF NOT EXISTS legacy_migration (
+                                id INTEGER PRIMARY KEY CHECK (id = 1),
+                                parameter_type TEXT,
+                                serial_number TEXT,
+                                datetime TEXT,
+                                chunks INTEGER NOT NULL DEFAULT 0,
+                                rows INTEGER NOT NULL DEFAULT 0,
+                                readings INTEGER NOT NULL DEFAULT 0
+                            )
+                        """
+                        )
+                        conn.execute("INSERT OR IGNORE INTO legacy_migration (id) VALUES (1)")
+                        if self.columnar_cache is not None:
+                            # Migrated readings would be mirrored twice; rebuilt at the end
+                            self.columnar_cache.mark_complete(False)
+
+                    cursor = conn.execute(
+                        f"SELECT {key} FROM legacy_migration WHERE id = 1"
+                    ).fetchone()
+                    if cursor[0] is None:
+                        after, params = "1", []
+                    else:
+                        after, params = f"({key}) > (?, ?, ?)", list(cursor)
+                    last = conn.execute(
+                        f"SELECT {key} FROM water_logs_legacy WHERE {after} "
+                        f"ORDER BY {key} LIMIT 1 OFFSET ?",
+                        params + [max(int(chunk_rows), 1) - 1],
+                    ).fetchone() or conn.execute(
+                        f"SELECT {key} FROM water_logs_legacy WHERE {after} "
+                        f"ORDER BY {key} DESC LIMIT 1",
+                        params,
+                    ).fetchone()
+                    if last is None:
+                        self._drop_legacy_table(conn)
+                        break
+
+                    where = f"{after} AND ({key}) <= (?, ?, ?)"
+                    params += list(last)
+                    frame = pd.read_sql_query(
+                        f"""
+                        SELECT
+                            CAST(strftime('%s', datetime) AS INTEGER) AS ts,
+                            serial_number,
+                            parameter_type,
+                            MAX(count) AS count,
+                            MAX(CASE WHEN statistic_type = 'min' THEN value END) AS min_value,
+                            MAX(CASE WHEN statistic_type = 'max' THEN value END) AS max_value,
+                            MAX(CASE WHEN statistic_type = 'avg' THEN value END) AS avg_value,
+                            MAX(unit) AS unit,
+                            MAX(description) AS description,
+                            MAX(raw_parameter) AS raw_parameter,
+                            MIN(line_number) AS line_number,
+                            MAX(data_quality) AS data_quality
+                        FROM water_logs_legacy
+                        WHERE {where}
+                        GROUP BY {key}
+                        HAVING ts IS NOT NULL
+                    """,
+                        conn,
+                        params=params,
+                    )
+                    frame.insert(0, "datetime", self._epoch_to_datetime(frame.pop("ts")))
+
+                    def finish(conn):
+                        self._update_summary(conn, "water_logs_legacy", where, params, sign=-1)
+                        rows = conn.execute(
+                            f"DELETE FROM water_logs_legacy WHERE {where}", params
+                        ).rowcount
+                        conn.execute(
+                            f"""
+                            UPDATE legacy_migration
+                            SET ({key}) = (?, ?, ?), chunks = chunks + 1,
+                                rows = rows + ?, readings = readings + ?
+                            WHERE id = 1
+                        """,
+                            list(last) + [rows, len(frame)],
+                        )
+
+                    self._insert_reading_frames([frame], finish=finish)
+                    self.query_cache.invalidate()
+                chunks += 1
+                if progress_callback:
+                    progress_callback(self.get_legacy_migration_status(count_remaining=False))
+
+            # Dropping the legacy rows changed the counters
+            self._load_hot_replica()
+            status = self.get_legacy_migration_status()
+            if status["complete"] and self.columnar_cache is not None:
+                self.rebuild_columnar_mirror()
+            return status
+
+        except Exception as e:
+            print(f"Error migrating legacy readings: {e}")
+            traceback.print_exc()
+            return {}
+
+    def _drop_legacy_table(self, conn):
+        """Drop the emptied legacy table; rows with NULL keys are discarded"""
+        conn.execute("BEGIN TRANSACTION")
+        self._update_summary(conn, "water_logs_legacy", sign=-1)
+        rows = conn.execute("DELETE FROM water_logs_legacy").rowcount
+        conn.execute("DROP VIEW IF EXISTS water_logs")
+        conn.execute("DROP TABLE water_logs_legacy")
+        self._create_compat_view(conn)
+        conn.execute("UPDATE legacy_migration SET rows = rows + ? WHERE id = 1", (rows,))
+        conn.execute("COMMIT")
+        self.query_cache.invalidate()
+        print("Legacy readings migrated; water_logs_legacy dropped")
+
+    def get_legacy_migration_status(self, count_remaining: bool = True) -> Dict:
+        """
+        Progress of migrate_legacy_readings (chunks, rows, readings, remaining_rows)
+
+        Counting the remaining legacy rows scans them; without count_remaining
+        remaining_rows is None while legacy rows are left.
+        """
+        status = {"chunks": 0, "rows": 0, "readings": 0, "remaining_rows": 0, "complete": True}
+        try:
+            with self.get_read_connection() as conn:
+                if self._has_table(conn, "legacy_migration"):
+                    status["chunks"], status["rows"], status["readings"] = conn.execute(
+                        "SELECT chunks, rows, readings FROM legacy_migration WHERE id = 1"
+                    ).fetchone()
+                if self._has_table(conn, "water_logs_legacy"):
+                    status["complete"] = False
+                    status["remaining_rows"] = (
+                        conn.execute("SELECT COUNT(*) FROM water_logs_legacy").fetchone()[0]
+                        if count_remaining
+                        else None
+                    )
+        except Exception as e:
+            print(f"Error reading legacy migration status: {e}")
+            traceback.print_exc()
+        return status
+
+    @staticmethod
+    def _long_readings_query(table: str = "readings") -> str:
+        """SELECT unpivoting a readings table into the long water_logs columns"""
+        return " UNION ALL ".join(
+            f"""
+                SELECT datetime(r.ts, 'unixepoch') AS datetime,
+                       s.serial_number, p.parameter_type,
+                       '{stat}' AS statistic_type, r.{stat} AS value, r.count,
+                       p.unit, p.description, r.data_quality, p.raw_parameter,
+                       r.line_number
+                FROM {table} r
+                JOIN serials s ON s.id = r.serial_id
+                JOIN parameters p ON p.id = r.parameter_id
+                WHERE r.{stat} IS NOT NULL
+            """
+            for stat in ("avg", "min", "max")
+        )
+
+    def _create_compat_view(self, conn):
+        """
+        (Re)create the water_logs view unpivoting readings into avg/min/max rows
+
+        Views cannot reference attached databases, so monthly partitions are
+        not part of the view; manager queries read them directly.
+        """
+        branches = [self._long_readings_query()]
+        if self._has_table(conn, "water_logs_legacy"):
+            branches.append(
+                """
+                SELECT datetime, serial_number, parameter_type, statistic_type,
+                       value, count, unit, description, data_quality,
+                       raw_parameter, line_number
+                FROM water_logs_legacy
+            """
+            )
+
+        conn.execute("DROP VIEW IF EXISTS water_logs")
+        conn.execute(
+            "CREATE VIEW water_logs AS " + " UNION ALL ".join(branches)
+        )
+
+    # Catalogue source -> database name shown for fault codes
+    FAULT_CODE_DATABASES = {"uploaded": "HAL", "tb": "TB"}
+
+    def _create_fault_code_search(self, conn):
+        """
+        Create the FTS5 index over fault code descriptions
+
+        Without FTS5 in the SQLite build, description search falls back to
+        LIKE over fault_codes.
+        """
+        if self._has_table(conn, "fault_codes_fts"):
+            self.fault_code_search_available = True
+            return
+        try:
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE fault_codes_fts USING fts5(
+                    code UNINDEXED,
+                    description,
+                    type,
+                    source UNINDEXED,
+                    tokenize = 'unicode61'
+                )
+            """
+            )
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 not available ({e}); fault description search uses LIKE")
+            self.fault_code_search_available = False
+            return
+        self.fault_code_search_available = True
+        self._rebuild_fault_code_search(conn)
+
+    def _rebuild_fault_code_search(self, conn):
+        """Refill the FTS index from fault_codes (in the caller's transaction)"""
+        if not self.fault_code_search_available:
+            return
+        conn.execute("DELETE FROM fault_codes_fts")
+        conn.execute(
+            """
+            INSERT INTO fault_codes_fts (code, description, type, source)
+            SELECT code, description, type, source FROM fault_codes
+        """
+        )
+
+    def _create_fault_indices(self, conn):
+        """Create indices for fault frequency and timeline queries"""
+        # The natural keys double as the code/serial/time indices
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_fault_event_key "
+            "ON fault_events(fault_code, serial_number, datetime, state)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_fault_serial_time "
+            "ON fault_events(serial_number, datetime)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_fault_time ON fault_events(datetime)"
+        )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_interval_key "
+            "ON fault_intervals(fault_code, serial_number, start_time)"
+        )
+        # Partial index: open intervals are looked up when a later file clears them
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_interval_open "
+            "ON fault_intervals(serial_number, fault_code) WHERE end_time IS NULL"
+        )
+
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection with the per-connection PRAGMA setup"""
+        if read_only:
+            conn = sqlite3.connect(
+                Path(self.db_path).resolve().as_uri() + "?mode=ro",
+                uri=True,
+                timeout=30.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=30.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            # Enable foreign keys
+            conn.execute("PRAGMA foreign_keys=ON")
+
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=10000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=30000000")
+        return conn
+
     @contextmanager
     def get_connection(self):
-        """Get a database connection with thread safety"""
-        # Thread-safe connection pool
-        import threading
+        """Get the writer connection; writes from all threads are serialised"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open_connection()
+            conn = self._writer
+            try:
+                yield conn
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise e
+
+    @contextmanager
+    def get_read_connection(self, dedicated: bool = False):
+        """
+        Lease a read-only connection from the reader pool
+
+        WAL readers never wait for an import transaction. Nested leases on the
+        same thread reuse the outer connection; it returns to the pool when
+        the outermost block exits. A dedicated lease (used by the iter_*
+        generators, which stay suspended between chunks) is never shared.
+        """
+        leased = getattr(self._reader_local, "conn", None)
+        if leased is not None and not dedicated:
+            yield leased
+            return
+
+        if not self._reader_slots.acquire(timeout=30.0):
+            raise sqlite3.OperationalError("No reader connection available")
+        try:
+            with self._pool_lock:
+                conn = self._idle_readers.pop() if self._idle_readers else None
+            if conn is None:
+                conn = self._open_connection(read_only=True)
+        except Exception:
+            self._reader_slots.release()
+            raise
+
+        if not dedicated:
+            self._reader_local.conn = conn
+        try:
+            yield conn
+        finally:
+            if not dedicated:
+                self._reader_local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            with self._pool_lock:
+                self._idle_readers.append(conn)
+            self._reader_slots.release()
+
+    def close(self):
+        """Finish queued imports, then close the writer and idle reader connections"""
+        self.stop_maintenance()
+        self._stop_ingest_writer()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._pool_lock:
+            while self._idle_readers:
+                self._idle_readers.pop().close()
+        with self._hot_lock:
+            hot, self._hot = self._hot, None
+        if hot is not None:
+            hot.close()
+
+    # Tables copied whole into the hot replica (partitions stays empty there,
+    # so reading-source iteration only sees the replica's own readings)
+    HOT_TABLES = [
+        "serials",
+        "parameters",
+        "reading_summary",
+        "reading_quality_summary",
+        "partitions",
+    ] + list(ROLLUP_TABLES)
+
+    # Small tables recopied after every insert
+    HOT_COUNTER_TABLES = ["serials", "parameters", "reading_summary", "reading_quality_summary"]
+
+    def _hot_horizon_ts(self, hot) -> int:
+        """First ts kept in the replica: hot_days before the newest reading"""
+        last_ts = hot.execute("SELECT MAX(last_ts) FROM main.reading_summary").fetchone()[0]
+        if last_ts is None:
+            return -(2**63)
+        return int(last_ts) - int(self.hot_days * 86400)
+
+    def _load_hot_replica(self):
+        """
+        (Re)build the in-memory replica from the database files
+
+        The new replica is built while writes wait on the writer lock and
+        then swapped in; reads keep using the previous one until then.
+        """
+        if not self.hot_days:
+            return
+        columns = ", ".join(self.READING_COLUMNS)
+        hot = None
+        try:
+            start_time = time.time()
+            with self._writer_lock:
+                hot = sqlite3.connect(
+                    "file::memory:", uri=True, isolation_level=None, check_same_thread=False
+                )
+                hot.execute(
+                    "ATTACH DATABASE ? AS disk",
+                    (Path(self.db_path).resolve().as_uri() + "?mode=ro",),
+                )
+                for (sql,) in hot.execute(
+                    "SELECT sql FROM disk.sqlite_master WHERE type = 'table' AND name IN "
+                    f"({', '.join('?' for _ in self.HOT_TABLES)})",
+                    self.HOT_TABLES,
+                ).fetchall():
+                    hot.execute(sql)
+                self._create_readings_table(hot, foreign_keys=False)
+                for _, index_query in self.READING_INDEXES:
+                    hot.execute(index_query)
+
+                hot.execute("BEGIN")
+                for table in self.HOT_TABLES:
+                    if table != "partitions":
+                        hot.execute(f"INSERT INTO main.{table} SELECT * FROM disk.{table}")
+                horizon = self._hot_horizon_ts(hot)
+                hot.execute(
+                    f"INSERT OR IGNORE INTO main.readings ({columns}) "
+                    f"SELECT {columns} FROM disk.readings WHERE ts >= ?",
+                    (horizon,),
+                )
+                filenames = hot.execute(
+                    "SELECT filename FROM disk.partitions WHERE end_ts > ? ORDER BY month",
+                    (horizon,),
+                ).fetchall()
+                hot.execute("COMMIT")
+
+                for (filename,) in filenames:
+                    hot.execute(
+                        "ATTACH DATABASE ? AS hot_source",
+                        (Path(self._partition_path(filename)).resolve().as_uri() + "?mode=ro",),
+                    )
+                    try:
+                        hot.execute(
+                            f"INSERT OR IGNORE INTO main.readings ({columns}) "
+                            f"SELECT {columns} FROM hot_source.readings WHERE ts >= ?",
+                            (horizon,),
+                        )
+                    finally:
+                        hot.execute("DETACH DATABASE hot_source")
+
+                readings = hot.execute("SELECT COUNT(*) FROM main.readings").fetchone()[0]
+                with self._hot_lock:
+                    hot, self._hot = self._hot, hot
+                    self._hot_horizon = horizon
+            print(
+                f"Hot replica loaded with {readings:,} readings "
+                f"(last {self.hot_days} days) in {time.time() - start_time:.2f}s"
+            )
+        except Exception as e:
+            print(f"Error loading hot replica: {e}")
+            traceback.print_exc()
+            # Reads fall back to the database files
+            with self._hot_lock:
+                stale, self._hot = self._hot, None
+            if stale is not None:
+                stale.close()
+        finally:
+            if hot is not None:
+                hot.close()
+            self.query_cache.invalidate()
+
+    def _refresh_hot_replica(self, batches: list):
+        """Apply just-committed readings to the hot replica (writer lock held)"""
+        if self._hot is None or not batches:
+            return
+        ts = np.concatenate([columns["ts"] for _, columns in batches])
+        try:
+            with self._hot_lock:
+                hot = self._hot
+                hot.execute("BEGIN")
+                # Dimensions and counters are small enough to copy whole
+                for table in self.HOT_COUNTER_TABLES:
+                    hot.execute(f"DELETE FROM main.{table}")
+                    hot.execute(f"INSERT INTO main.{table} SELECT * FROM disk.{table}")
+                for table, width in self.ROLLUP_TABLES.items():
+                    bounds = (int(ts.min()) // width * width, int(ts.max()))
+                    hot.execute(f"DELETE FROM main.{table} WHERE bucket BETWEEN ? AND ?", bounds)
+                    hot.execute(
+                        f"INSERT INTO main.{table} SELECT * FROM disk.{table} "
+                        "WHERE bucket BETWEEN ? AND ?",
+                        bounds,
+                    )
+
+                # Rows the database skipped as duplicates are skipped here too
+                horizon = self._hot_horizon_ts(hot)
+                for _, columns in batches:
+                    keep = columns["ts"] >= horizon
+                    if keep.any():
+                        hot.executemany(
+                            f"INSERT OR IGNORE INTO main.readings "
+                            f"({', '.join(self.READING_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' for _ in self.READING_COLUMNS)})",
+                            self._iter_reading_rows(
+                                {name: columns[name][keep] for name in self.READING_COLUMNS},
+                                50000,
+                            ),
+                        )
+                if horizon > self._hot_horizon:
+                    hot.execute("DELETE FROM main.readings WHERE ts < ?", (horizon,))
+                hot.execute("COMMIT")
+                self._hot_horizon = horizon
+        except Exception as e:
+            print(f"Error refreshing hot replica: {e}")
+            traceback.print_exc()
+            with self._hot_lock:
+                hot, self._hot = self._hot, None
+            if hot is not None:
+                hot.close()
+
+    @contextmanager
+    def _replica_connection(self, raw: bool = False, start_ts=None):
+        """
+        Connection for an interactive read: the hot replica when it holds
+        what the query needs, otherwise a pooled reader
 
-        thread_id = threading.get_ident()
+        Dimensions, rollups and counters are always in the replica; raw
+        readings (raw=True) only from its horizon on, so raw queries pass
+        their start. Replica reads are serialised.
+        """
+        self._hot_lock.acquire()
+        hot = self._hot
+        if hot is not None and (
+            not raw or (start_ts is not None and start_ts >= self._hot_horizon)
+        ):
+            try:
+                yield hot
+            finally:
+                if hot.in_transaction:
+                    hot.rollback()
+                self._hot_lock.release()
+            return
+        self._hot_lock.release()
+        with self.get_read_connection() as conn:
+            yield conn
+
+    @contextmanager
+    def _raw_reading_connection(self, conn, start_ts=None):
+        """conn for a raw readings query, or a pooled reader if conn is the
+        hot replica and start_ts is before its horizon"""
+        if conn is not self._hot or (start_ts is not None and start_ts >= self._hot_horizon):
+            yield conn
+        else:
+            with self.get_read_connection() as reader:
+                yield reader
+
+    @staticmethod
+    def _month_bounds(month: str):
+        """'YYYY_MM' -> epoch seconds of the month's first second and of the next month's"""
+        start = pd.Timestamp(month.replace("_", "-") + "-01")
+        end = start + pd.offsets.MonthBegin(1)
+        return DatabaseManager._epoch_seconds(start), DatabaseManager._epoch_seconds(end)
+
+    def _partition_path(self, filename: str) -> str:
+        return os.path.join(self.partition_dir, filename)
+
+    def _list_partitions(self, conn, start_ts=None, end_ts=None):
+        """(month, filename, read_only) of partitions overlapping [start_ts, end_ts]"""
+        query = "SELECT month, filename, read_only FROM partitions WHERE 1"
+        params = []
+        if start_ts is not None:
+            query += " AND end_ts > ?"
+            params.append(int(start_ts))
+        if end_ts is not None:
+            query += " AND start_ts <= ?"
+            params.append(int(end_ts))
+        query += " ORDER BY month"
+        return conn.execute(query, params).fetchall()
+
+    @contextmanager
+    def _attached_partition(self, conn, partition):
+        """Attach a partition file for the block and yield its readings table"""
+        month, filename, read_only = partition
+        alias = f"part_{month}"
+        if alias in [row[1] for row in conn.execute("PRAGMA database_list")]:
+            yield f"{alias}.readings"
+            return
+
+        path = os.path.abspath(self._partition_path(filename))
+        if conn is not self._writer:
+            # Readers open URIs; sealed files never change, so skip locking
+            path = Path(path).as_uri() + ("?mode=ro&immutable=1" if read_only else "?mode=ro")
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+        try:
+            yield f"{alias}.readings"
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute(f"DETACH DATABASE {alias}")
+
+    def _iter_reading_sources(self, conn, start_ts=None, end_ts=None):
+        """
+        Yield the readings tables to query: main first, then every partition
+        overlapping the time range, attached only while it is being read
+
+        Partitions are attached one at a time (SQLite allows 10 attachments
+        by default), and ATTACH/DETACH cannot run inside a transaction, so
+        callers must commit before advancing the iterator.
+        """
+        yield "readings"
+        for partition in self._list_partitions(conn, start_ts, end_ts):
+            with self._attached_partition(conn, partition) as table:
+                yield table
+
+    def _ensure_partition(self, conn, month: str):
+        """Return the registry row of a month's partition, creating its file if needed"""
+        row = conn.execute(
+            "SELECT month, filename, read_only FROM partitions WHERE month = ?",
+            (month,),
+        ).fetchone()
+        if row is not None:
+            if row[2]:
+                self._reopen_partition(conn, row)
+                row = (row[0], row[1], 0)
+            return row
+
+        filename = f"readings_{month}.db"
+        os.makedirs(self.partition_dir, exist_ok=True)
+        part = sqlite3.connect(self._partition_path(filename), isolation_level=None)
+        try:
+            part.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            part.execute("PRAGMA journal_mode=WAL")
+            self._create_readings_table(part, foreign_keys=False)
+            for _, idx_query in self.READING_INDEXES:
+                part.execute(idx_query)
+        finally:
+            part.close()
+
+        start_ts, end_ts = self._month_bounds(month)
+        conn.execute(
+            "INSERT INTO partitions (month, filename, start_ts, end_ts) VALUES (?, ?, ?, ?)",
+            (month, filename, start_ts, end_ts),
+        )
+        return (month, filename, 0)
+
+    def _reopen_partition(self, conn, partition):
+        """Make a sealed partition writable again for a late import"""
+        month, filename, _ = partition
+        path = self._partition_path(filename)
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH)
+        part = sqlite3.connect(path, isolation_level=None)
+        try:
+            part.execute("PRAGMA journal_mode=WAL")
+        finally:
+            part.close()
+        conn.execute("UPDATE partitions SET read_only = 0 WHERE month = ?", (month,))
+        print(f"Reopened sealed partition {month}")
+
+    def _remove_partition_file(self, filename: str):
+        path = self._partition_path(filename)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.chmod(path + suffix, stat.S_IRUSR | stat.S_IWUSR)
+                os.remove(path + suffix)
+
+    def seal_partition(self, month: str) -> bool:
+        """
+        Compact a finished month's partition and make its file read-only
+
+        Readers attach sealed files as immutable; a later import into the
+        same month reopens the partition.
+        """
+        try:
+            with self.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT filename FROM partitions WHERE month = ?", (month,)
+                ).fetchone()
+                if row is None:
+                    return False
+                path = self._partition_path(row[0])
+
+                # Compacted with its own connection, independent of the main file
+                part = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+                try:
+                    part.execute("PRAGMA journal_mode=DELETE")
+                    part.execute("ANALYZE")
+                    part.execute("VACUUM")
+                finally:
+                    part.close()
+                os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+                conn.execute(
+                    "UPDATE partitions SET read_only = 1 WHERE month = ?", (month,)
+                )
+            print(f"Sealed partition {month}")
+            return True
+        except Exception as e:
+            print(f"Error sealing partition {month}: {e}")
+            traceback.print_exc()
+            return False
+
+    def seal_old_partitions(self, keep_months: int = 2) -> int:
+        """Seal open partitions older than the newest keep_months months"""
+        try:
+            with self.get_read_connection() as conn:
+                months = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT month FROM partitions ORDER BY month DESC"
+                    ).fetchall()[keep_months:]
+                ]
+                open_months = {
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT month FROM partitions WHERE read_only = 0"
+                    )
+                }
+        except Exception as e:
+            print(f"Error listing partitions: {e}")
+            traceback.print_exc()
+            return 0
+        return sum(self.seal_partition(month) for month in months if month in open_months)
+
+    def get_partitions(self) -> pd.DataFrame:
+        """Get the monthly partitions with their file sizes"""
+        try:
+            with self.get_read_connection() as conn:
+                df = pd.read_sql_query(
+                    "SELECT month, filename, start_ts, end_ts, read_only "
+                    "FROM partitions ORDER BY month",
+                    conn,
+                )
+            df["size_bytes"] = [
+                os.path.getsize(self._partition_path(name))
+                if os.path.exists(self._partition_path(name))
+                else 0
+                for name in df["filename"]
+            ]
+            return df
+        except Exception as e:
+            print(f"Error retrieving partitions: {e}")
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    # Column order of the readings INSERT fed by _iter_reading_rows
+    READING_COLUMNS = [
+        "ts",
+        "serial_id",
+        "parameter_id",
+        "avg",
+        "min",
+        "max",
+        "count",
+        "data_quality",
+        "line_number",
+    ]
+
+    def _to_wide_readings(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Collapse parser output (one row per statistic) into reading column arrays"""
+        keys = ["datetime", "serial_number", "parameter_type"]
+        if df[keys].isna().any().any():
+            df = df.dropna(subset=keys)
+
+        if {"avg_value", "min_value", "max_value"}.issubset(df.columns):
+            # Parser rows already carry all three statistics and the rows of
+            # one reading are adjacent, so keep the first row of each run
+            first = np.ones(len(df), dtype=bool)
+            if len(df) > 1:
+                same_as_previous = np.ones(len(df) - 1, dtype=bool)
+                for key in keys:
+                    values = df[key].to_numpy()
+                    same_as_previous &= values[1:] == values[:-1]
+                first[1:] = ~same_as_previous
+            wide = df if first.all() else df[first]
+            stat_columns = {"avg": "avg_value", "min": "min_value", "max": "max_value"}
+        else:
+            stats = df.pivot_table(
+                index=keys, columns="statistic_type", values="value", aggfunc="first"
+            )
+            wide = (
+                df.drop_duplicates(subset=keys)
+                .drop(columns=["statistic_type", "value"], errors="ignore")
+                .set_index(keys)
+                .join(stats)
+                .reset_index()
+            )
+            stat_columns = {"avg": "avg", "min": "min", "max": "max"}
+
+        n = len(wide)
+        columns = {}
+        for name, source in dict(
+            stat_columns,
+            serial_number="serial_number",
+            parameter_type="parameter_type",
+            count="count",
+            unit="unit",
+            description="description",
+            raw_parameter="raw_parameter",
+            line_number="line_number",
+            data_quality="data_quality" if "data_quality" in wide.columns else "quality",
+        ).items():
+            if source in wide.columns:
+                columns[name] = wide[source].to_numpy()
+            else:
+                columns[name] = np.full(n, None, dtype=object)
+
+        datetimes = wide["datetime"]
+        if not pd.api.types.is_datetime64_any_dtype(datetimes):
+            try:
+                # pandas >= 2.0: mixed ISO 8601 precisions in one column
+                datetimes = pd.to_datetime(datetimes, format="ISO8601")
+            except ValueError:
+                # Older pandas takes "ISO8601" as a strftime format and
+                # already infers ISO 8601 per element
+                datetimes = pd.to_datetime(datetimes)
+        if getattr(datetimes.dt, "tz", None) is not None:
+            datetimes = datetimes.dt.tz_localize(None)
+        # Naive timestamps as epoch seconds, straight from the datetime64 buffer
+        columns["ts"] = datetimes.to_numpy().astype("datetime64[s]").astype(np.int64)
+
+        return columns
+
+    def _ensure_dimension(self, conn, table: str, columns, rows) -> Dict:
+        """Insert missing dimension rows and return a key -> id mapping"""
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            rows,
+        )
+        return dict(conn.execute(f"SELECT {columns[0]}, id FROM {table}").fetchall())
+
+    def _dimension_ids(self, conn, table: str, columns, key_values, attributes=()):
+        """Map key_values to dimension ids, adding first-seen attributes for new keys"""
+        codes, uniques = pd.factorize(key_values)
+        first_rows = np.unique(codes, return_index=True)[1]
+        rows = [
+            tuple(
+                None if pd.isna(value) else value
+                for value in [unique] + [attr[row] for attr in attributes]
+            )
+            for unique, row in zip(uniques, first_rows)
+        ]
+        id_map = self._ensure_dimension(conn, table, columns, rows)
+        return np.array([id_map[unique] for unique in uniques], dtype=np.int64)[codes]
+
+    def _iter_reading_rows(self, columns: Dict[str, np.ndarray], batch_size: int):
+        """Yield INSERT parameter tuples straight from the column arrays"""
+        n = len(columns["ts"])
+        for start in range(0, n, batch_size):
+            yield from zip(
+                *(
+                    columns[name][start : start + batch_size].tolist()
+                    for name in self.READING_COLUMNS
+                )
+            )
+
+    @staticmethod
+    def _split_by_month(columns: Dict[str, np.ndarray]):
+        """Yield ('YYYY_MM', column arrays) for each calendar month present"""
+        months = columns["ts"].astype("datetime64[s]").astype("datetime64[M]")
+        uniques, inverse = np.unique(months, return_inverse=True)
+        for position, month in enumerate(uniques):
+            mask = inverse == position
+            yield str(month).replace("-", "_"), {
+                name: values[mask] for name, values in columns.items()
+            }
+
+    def _insert_readings(
+        self,
+        conn,
+        table: str,
+        columns: Dict[str, np.ndarray],
+        batch_size: int,
+        mirror_frames: Optional[list] = None,
+    ) -> int:
+        """
+        Insert reading rows into table and fold the new ones into the rollups
+
+        With mirror_frames, the rows actually added are appended to it for the
+        columnar mirror.
+        """
+        # Rollups are updated from the rowid range added by this call
+        last_id_before = conn.execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM {table}"
+        ).fetchone()[0]
+
+        # Readings already stored (same parameter, serial and time) are
+        # skipped, so re-imports and overlapping files add nothing
+        changes_before = conn.total_changes
+        conn.executemany(
+            f"""
+            INSERT OR IGNORE INTO {table}
+            (ts, serial_id, parameter_id, avg, min, max,
+             count, data_quality, line_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            self._iter_reading_rows(columns, batch_size),
+        )
+        inserted = conn.total_changes - changes_before
+
+        if table != "readings" and inserted:
+            # A partition's key is only unique in its own file; drop readings
+            # that were stored in main before partitioning was enabled
+            start_ts = int(columns["ts"].min())
+            end_ts = int(columns["ts"].max())
+            if conn.execute(
+                "SELECT 1 FROM main.readings WHERE ts BETWEEN ? AND ? LIMIT 1",
+                (start_ts, end_ts),
+            ).fetchone():
+                inserted -= conn.execute(
+                    f"""
+                    DELETE FROM {table} WHERE id > ? AND EXISTS (
+                        SELECT 1 FROM main.readings m
+                        WHERE m.parameter_id = {table}.parameter_id
+                          AND m.serial_id = {table}.serial_id
+                          AND m.ts = {table}.ts
+                    )
+                """,
+                    (last_id_before,),
+                ).rowcount
+
+        # Keep rollups and counters consistent with readings in the same transaction
+        self._update_rollups(conn, last_id_before, table)
+        if inserted:
+            self._update_summary(conn, table, "r.id > ?", (last_id_before,))
+
+        if mirror_frames is not None and inserted:
+            if inserted == len(columns["ts"]):
+                new_rows = pd.DataFrame(
+                    {
+                        "ts": columns["ts"],
+                        "serial": columns["serial_number"],
+                        "param": columns["parameter_type"],
+                        "avg": columns["avg"],
+                        "min": columns["min"],
+                        "max": columns["max"],
+                        "count": columns["count"],
+                        "data_quality": columns["data_quality"],
+                    }
+                )
+            else:
+                # Some rows were already stored; mirror only the new ids
+                new_rows = pd.read_sql_query(
+                    self._mirror_query(table) + " WHERE r.id > ?",
+                    conn,
+                    params=[last_id_before],
+                )
+            mirror_frames.append(new_rows)
+        return inserted
+
+    @staticmethod
+    def _mirror_query(table: str) -> str:
+        """SELECT of a readings table in the columnar mirror's layout"""
+        return f"""
+            SELECT r.ts, s.serial_number AS serial, p.parameter_type AS param,
+                   r.avg, r.min, r.max, r.count, r.data_quality
+            FROM {table} r
+            JOIN serials s ON s.id = r.serial_id
+            JOIN parameters p ON p.id = r.parameter_id
+        """
+
+    def _append_to_mirror(self, frames: list):
+        """Add newly stored readings to the columnar mirror"""
+        try:
+            for frame in frames:
+                self.columnar_cache.append(frame)
+        except Exception as e:
+            # Readings are safe in SQLite; reads fall back until a rebuild
+            print(f"Error updating columnar mirror: {e}")
+            traceback.print_exc()
+            self.columnar_cache.mark_complete(False)
+
+    def _insert_reading_frames(
+        self, frames: list, batch_size: int = 50000, finish=None
+    ) -> list:
+        """
+        Insert parser frames in one group commit; returns new readings per frame
+
+        Dimensions and readings of all frames share a single transaction
+        (including rollups and counters), or one transaction per month when
+        partition_by_month is set. finish(conn) runs before the main
+        transaction commits (after the months, in its own, when partitioned).
+        Errors are raised after rolling back the open transaction; months
+        committed before it stay stored.
+        """
+        start_time = time.time()
+        inserted = [0] * len(frames)
+        batches = []
+        for position, df in enumerate(frames):
+            if not df.empty:
+                columns = self._to_wide_readings(df)
+                if len(columns["ts"]):
+                    batches.append((position, columns))
+        if not batches and finish is None:
+            return inserted
+        total_rows = sum(len(columns["ts"]) for _, columns in batches)
+
+        try:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN TRANSACTION")
+                for _, columns in batches:
+                    columns["serial_id"] = self._dimension_ids(
+                        conn, "serials", ["serial_number"], columns["serial_number"]
+                    )
+                    columns["parameter_id"] = self._dimension_ids(
+                        conn,
+                        "parameters",
+                        ["parameter_type", "unit", "description", "raw_parameter"],
+                        columns["parameter_type"],
+                        [columns["unit"], columns["description"], columns["raw_parameter"]],
+                    )
+
+                mirror_frames = [] if self.columnar_cache is not None else None
+                if self.partition_by_month:
+                    # Partitions can only be attached outside a transaction
+                    conn.execute("COMMIT")
+                    months = {}
+                    for position, columns in batches:
+                        for month, month_columns in self._split_by_month(columns):
+                            months.setdefault(month, []).append((position, month_columns))
+                    for month in sorted(months):
+                        partition = self._ensure_partition(conn, month)
+                        with self._attached_partition(conn, partition) as table:
+                            conn.execute("BEGIN TRANSACTION")
+                            for position, month_columns in months[month]:
+                                inserted[position] += self._insert_readings(
+                                    conn, table, month_columns, batch_size, mirror_frames
+                                )
+                            conn.execute("COMMIT")
+                    if finish is not None:
+                        conn.execute("BEGIN TRANSACTION")
+                        finish(conn)
+                        conn.execute("COMMIT")
+                else:
+                    for position, columns in batches:
+                        inserted[position] = self._insert_readings(
+                            conn, "readings", columns, batch_size, mirror_frames
+                        )
+                    if finish is not None:
+                        finish(conn)
+                    conn.execute("COMMIT")
+                self._refresh_hot_replica(batches)
+                self.query_cache.invalidate()
+
+                if mirror_frames:
+                    self._append_to_mirror(mirror_frames)
+
+        except Exception:
+            # Months committed before the error are visible
+            self._load_hot_replica()
+            self.query_cache.invalidate()
+            if self.columnar_cache is not None:
+                self.columnar_cache.mark_complete(False)
+            raise
+
+        self._last_write = time.monotonic()
+
+        # Log performance metrics
+        elapsed = time.time() - start_time
+        group = f" from {len(batches)} batches" if len(batches) > 1 else ""
+        print(
+            f"Batch insert completed: {sum(inserted):,} new of {total_rows:,} readings{group} in {elapsed:.2f}s ({total_rows/max(elapsed, 1e-6):.1f} readings/sec)"
+        )
+        return inserted
+
+    def insert_data_batch(self, df: pd.DataFrame, batch_size: int = 50000) -> int:
+        """
+        Insert readings as one wide row per reading
+
+        Rows are streamed to executemany from the column arrays batch_size at a
+        time; the whole call (including rollups) is a single transaction, or
+        one transaction per month when partition_by_month is set.
+        """
+        if df.empty:
+            return 0
+
+        try:
+            return self._insert_reading_frames([df], batch_size)[0]
+        except Exception as e:
+            print(f"Error inserting data: {e}")
+            traceback.print_exc()
+            return 0
+
+    def submit_data_batch(self, df: pd.DataFrame) -> Future:
+        """
+        Queue readings for the ingest writer thread
+
+        Returns a Future resolving to the number of new readings (or raising
+        the insert error). Frames queued by concurrent imports are committed
+        together; the call blocks while ingest_queue_size frames are waiting.
+        """
+        future = Future()
+        if df.empty:
+            future.set_result(0)
+            return future
+
+        with self._service_lock:
+            if self._ingest_thread is None or not self._ingest_thread.is_alive():
+                self._ingest_thread = threading.Thread(
+                    target=self._ingest_writer, name="halog-ingest-writer", daemon=True
+                )
+                self._ingest_thread.start()
+        self._ingest_queue.put((df, future))
+        return future
+
+    def _ingest_writer(self):
+        """Writer thread: drain queued frames and group-commit them"""
+        while True:
+            item = self._ingest_queue.get()
+            if item is None:
+                return
+            group = [item]
+            rows = len(item[0])
+            stop = False
+            # Whatever queued up while the previous group was written goes
+            # into the next transaction
+            while rows < self.GROUP_COMMIT_ROWS:
+                try:
+                    item = self._ingest_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                group.append(item)
+                rows += len(item[0])
+            self._commit_ingest_group(group)
+            if stop:
+                return
+
+    def _commit_ingest_group(self, group: list):
+        """Insert a group of queued frames and resolve their Futures"""
+        try:
+            counts = self._insert_reading_frames([df for df, _ in group])
+        except Exception as e:
+            if len(group) > 1:
+                # Retry one by one so only the failing producer sees the error
+                for item in group:
+                    self._commit_ingest_group([item])
+                return
+            print(f"Error inserting data: {e}")
+            traceback.print_exc()
+            group[0][1].set_exception(e)
+            return
+        for (_, future), count in zip(group, counts):
+            future.set_result(count)
+
+    def _stop_ingest_writer(self):
+        """Let the writer thread finish the queued frames and exit"""
+        with self._service_lock:
+            thread, self._ingest_thread = self._ingest_thread, None
+        if thread is not None and thread.is_alive():
+            self._ingest_queue.put(None)
+            thread.join()
+
+    def insert_fault_events(self, df: pd.DataFrame, batch_size: int = 5000) -> int:
+        """
+        Insert fault/interlock events extracted by the parser
+
+        Events already stored (same code, serial, time and state, e.g. from an
+        overlapping log) are skipped; returns the number of new events.
+        """
+        if df is None or df.empty:
+            return 0
+
+        columns = [
+            "datetime",
+            "serial_number",
+            "fault_code",
+            "event_type",
+            "state",
+            "message",
+            "line_number",
+        ]
+        try:
+            events = df.copy()
+            for col in columns:
+                if col not in events.columns:
+                    events[col] = None
+            if pd.api.types.is_datetime64_any_dtype(events["datetime"]):
+                events["datetime"] = events["datetime"].dt.strftime("%Y-%m-%d %H:%M:%S")
+            events["fault_code"] = events["fault_code"].astype(str)
+
+            rows = events[columns].values.tolist()
+            with self.get_connection() as conn:
+                conn.execute("BEGIN TRANSACTION")
+                before = conn.total_changes
+                for start_idx in range(0, len(rows), batch_size):
+                    conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO fault_events
+                        (datetime, serial_number, fault_code, event_type,
+                         state, message, line_number)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                        rows[start_idx : start_idx + batch_size],
+                    )
+                inserted = conn.total_changes - before
+                conn.execute("COMMIT")
+            return inserted
+
+        except Exception as e:
+            print(f"Error inserting fault events: {e}")
+            traceback.print_exc()
+            return 0
+
+    def insert_fault_intervals(self, df: pd.DataFrame) -> int:
+        """
+        Store paired fault intervals. Unpaired clears close the matching open
+        interval left by a previously imported file, if there is one; an
+        interval already stored (same code, serial and start) is only closed.
+        """
+        if df is None or df.empty:
+            return 0
+
+        def to_text(value):
+            return None if pd.isna(value) else pd.Timestamp(value).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+
+        stored = 0
+        try:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN TRANSACTION")
+                for row in df.itertuples(index=False):
+                    start_time = to_text(row.start_time)
+                    end_time = to_text(row.end_time)
+
+                    if start_time is None:
+                        open_row = conn.execute(
+                            """
+                            SELECT id, start_time FROM fault_intervals
+                            WHERE serial_number = ? AND fault_code = ?
+                              AND end_time IS NULL AND start_time <= ?
+                            ORDER BY start_time DESC LIMIT 1
+                        """,
+                            (row.serial_number, row.fault_code, end_time),
+                        ).fetchone()
+                        if open_row:
+                            duration = (
+                                pd.Timestamp(end_time) - pd.Timestamp(open_row[1])
+                            ).total_seconds()
+                            conn.execute(
+                                "UPDATE fault_intervals SET end_time = ?, "
+                                "duration_seconds = ? WHERE id = ?",
+                                (end_time, duration, open_row[0]),
+                            )
+                            stored += 1
+                        continue
+
+                    duration = (
+                        None if pd.isna(row.duration_seconds) else float(row.duration_seconds)
+                    )
+                    stored += conn.execute(
+                        """
+                        INSERT INTO fault_intervals
+                        (serial_number, fault_code, event_type, start_time,
+                         end_time, duration_seconds)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (fault_code, serial_number, start_time)
+                        DO UPDATE SET end_time = excluded.end_time,
+                                      duration_seconds = excluded.duration_seconds
+                        WHERE fault_intervals.end_time IS NULL
+                          AND excluded.end_time IS NOT NULL
+                    """,
+                        (
+                            row.serial_number,
+                            str(row.fault_code),
+                            row.event_type,
+                            start_time,
+                            end_time,
+                            duration,
+                        ),
+                    ).rowcount
+                conn.execute("COMMIT")
+            return stored
+
+        except Exception as e:
+            print(f"Error inserting fault intervals: {e}")
+            traceback.print_exc()
+            return 0
+
+    def get_fault_duration_statistics(
+        self,
+        serial_number: Optional[str] = None,
+        start=None,
+        end=None,
+        per_serial: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Get downtime and MTBF per fault code from the stored intervals.
+        MTBF is the mean time between consecutive starts of the same fault
+        on the same machine, in hours.
+        """
+        try:
+            with self.get_read_connection() as conn:
+                clauses = []
+                params = []
+                if serial_number:
+                    clauses.append("serial_number = ?")
+                    params.append(str(serial_number))
+                if start is not None:
+                    clauses.append("start_time >= ?")
+                    params.append(pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S"))
+                if end is not None:
+                    clauses.append("start_time <= ?")
+                    params.append(pd.Timestamp(end).strftime("%Y-%m-%d %H:%M:%S"))
+                where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+                group_columns = "fault_code, serial_number" if per_serial else "fault_code"
+                serial_select = "serial_number AS serial," if per_serial else ""
+
+                query = f"""
+                    SELECT
+                        fault_code,
+                        {serial_select}
+                        SUM(occurrences) AS occurrences,
+                        SUM(open_intervals) AS open_intervals,
+                        SUM(total_downtime_seconds) AS total_downtime_seconds,
+                        SUM(total_downtime_seconds) * 1.0
+                            / NULLIF(SUM(occurrences - open_intervals), 0)
+                            AS mean_duration_seconds,
+                        MAX(max_duration_seconds) AS max_duration_seconds,
+                        SUM(span_days) * 24.0 / NULLIF(SUM(occurrences - 1), 0)
+                            AS mtbf_hours
+                    FROM (
+                        SELECT
+                            fault_code,
+                            serial_number,
+                            COUNT(*) AS occurrences,
+                            SUM(end_time IS NULL) AS open_intervals,
+                            COALESCE(SUM(duration_seconds), 0) AS total_downtime_seconds,
+                            MAX(duration_seconds) AS max_duration_seconds,
+                            julianday(MAX(start_time)) - julianday(MIN(start_time))
+                                AS span_days
+                        FROM fault_intervals{where}
+                        GROUP BY fault_code, serial_number
+                    )
+                    GROUP BY {group_columns}
+                    ORDER BY total_downtime_seconds DESC
+                """
+                return pd.read_sql_query(query, conn, params=params)
+
+        except Exception as e:
+            print(f"Error retrieving fault duration statistics: {e}")
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def load_fault_code_catalog(
+        self,
+        fault_codes: Dict[str, Dict],
+        source: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> int:
+        """
+        Store loaded HAL/TB fault codes so events can be joined in SQL
+
+        With source, the codes replace every stored code of that source and
+        content_hash records the file they came from (see
+        is_fault_catalog_current). The description search index is rebuilt
+        in the same transaction.
+        """
+        if not fault_codes and source is None:
+            return 0
+
+        rows = [
+            (
+                str(code),
+                source or info.get("source", "uploaded"),
+                info.get("description", ""),
+                info.get("type"),
+            )
+            for code, info in fault_codes.items()
+        ]
+        try:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN TRANSACTION")
+                if source is not None:
+                    conn.execute("DELETE FROM fault_codes WHERE source = ?", (source,))
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO fault_codes (code, source, description, type)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    rows,
+                )
+                if source is not None and content_hash is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO fault_code_files (source, content_hash) "
+                        "VALUES (?, ?)",
+                        (source, content_hash),
+                    )
+                self._rebuild_fault_code_search(conn)
+                conn.execute("COMMIT")
+            return len(rows)
+        except Exception as e:
+            print(f"Error loading fault code catalog: {e}")
+            traceback.print_exc()
+            return 0
+
+    def is_fault_catalog_current(self, source: str, content_hash: str) -> bool:
+        """True when source was last loaded from a file with this content hash"""
+        try:
+            with self.get_read_connection() as conn:
+                row = conn.execute(
+                    "SELECT content_hash FROM fault_code_files WHERE source = ?",
+                    (source,),
+                ).fetchone()
+            return row is not None and row[0] == content_hash
+        except Exception as e:
+            print(f"Error checking fault code catalog: {e}")
+            traceback.print_exc()
+            return False
+
+    def _fault_code_result(self, code: str, source: str, description: str, type_: str) -> Dict:
+        """Catalogue row in the shape returned by UnifiedParser.search_fault_code"""
+        database = self.FAULT_CODE_DATABASES.get(source, source.upper())
+        return {
+            "found": True,
+            "code": code,
+            "description": description,
+            "type": type_ or "Unknown",
+            "source": source,
+            "database": database,
+            "database_description": f"{database} Database",
+        }
+
+    def search_fault_code(self, code: str) -> Dict:
+        """Look a fault code up by primary key (HAL first, then TB)"""
+        code = str(code).strip()
+        try:
+            with self.get_read_connection() as conn:
+                rows = conn.execute(
+                    "SELECT code, source, description, type FROM fault_codes WHERE code = ?",
+                    (code,),
+                ).fetchall()
+            if rows:
+                order = list(self.FAULT_CODE_DATABASES)
+                rows.sort(key=lambda row: order.index(row[1]) if row[1] in order else len(order))
+                return self._fault_code_result(*rows[0])
+        except Exception as e:
+            print(f"Error searching fault code: {e}")
+            traceback.print_exc()
+        return {
+            "found": False,
+            "code": code,
+            "description": "Fault code not found in uploaded database",
+            "type": "Unknown",
+            "source": "none",
+            "database": "NA",
+            "database_description": "Not Available",
+        }
+
+    def get_fault_descriptions_by_database(self, code: str) -> Dict[str, str]:
+        """HAL and TB descriptions of one code ('' when a catalogue lacks it)"""
+        descriptions = {"hal_description": "", "tb_description": ""}
+        try:
+            with self.get_read_connection() as conn:
+                for source, description in conn.execute(
+                    "SELECT source, description FROM fault_codes WHERE code = ?",
+                    (str(code).strip(),),
+                ):
+                    database = self.FAULT_CODE_DATABASES.get(source)
+                    if database is not None:
+                        descriptions[f"{database.lower()}_description"] = description or ""
+        except Exception as e:
+            print(f"Error getting fault descriptions: {e}")
+            traceback.print_exc()
+        return descriptions
+
+    @staticmethod
+    def _fault_search_query(search_term: str) -> str:
+        """Free text -> FTS5 query: every word must match, as a prefix"""
+        words = re.findall(r"\w+", search_term)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search_fault_descriptions(self, search_term: str, limit: int = 100) -> list:
+        """
+        Fault codes whose description (or type) matches every word of
+        search_term, best match first, as (code, info) pairs
+        """
+        try:
+            with self.get_read_connection() as conn:
+                if self.fault_code_search_available:
+                    query = self._fault_search_query(search_term)
+                    if not query:
+                        return []
+                    rows = conn.execute(
+                        """
+                        SELECT code, source, description, type
+                        FROM fault_codes_fts
+                        WHERE fault_codes_fts MATCH ?
+                        ORDER BY bm25(fault_codes_fts)
+                        LIMIT ?
+                    """,
+                        (query, int(limit)),
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        """
+                        SELECT code, source, description, type FROM fault_codes
+                        WHERE description LIKE ? ORDER BY code LIMIT ?
+                    """,
+                        (f"%{search_term.strip()}%", int(limit)),
+                    ).fetchall()
+            return [(row[0], self._fault_code_result(*row)) for row in rows]
+        except Exception as e:
+            print(f"Error searching fault descriptions: {e}")
+            traceback.print_exc()
+            return []
+
+    def get_fault_code_statistics(self) -> Dict:
+        """Number of catalogued fault codes per database"""
+        try:
+            with self.get_read_connection() as conn:
+                counts = dict(
+                    conn.execute("SELECT source, COUNT(*) FROM fault_codes GROUP BY source")
+                )
+            return {
+                "total_codes": sum(counts.values()),
+                "sources": list(counts),
+                "by_database": {
+                    self.FAULT_CODE_DATABASES.get(source, source.upper()): count
+                    for source, count in counts.items()
+                },
+                "loaded_from": "database" if counts else "none",
+            }
+        except Exception as e:
+            print(f"Error getting fault code statistics: {e}")
+            traceback.print_exc()
+            return {"total_codes": 0, "sources": [], "by_database": {}, "loaded_from": "none"}
+
+    def _fault_event_filters(self, serial_number=None, start=None, end=None):
+        """Build the WHERE clause shared by the fault event queries"""
+        clauses = []
+        params = []
+        if serial_number:
+            clauses.append("serial_number = ?")
+            params.append(str(serial_number))
+        if start is not None:
+            clauses.append("datetime >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S"))
+        if end is not None:
+            clauses.append("datetime <= ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d %H:%M:%S"))
+        return clauses, params
+
+    def get_fault_frequency(
+        self,
+        serial_number: Optional[str] = None,
+        start=None,
+        end=None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Get fault occurrence counts per code, joined with the fault catalogue"""
+        try:
+            with self.get_read_connection() as conn:
+                clauses, params = self._fault_event_filters(serial_number, start, end)
+                clauses.append("state = 'assert'")
+                where = " WHERE " + " AND ".join(clauses)
+
+                # Aggregate first, then join the (much smaller) result with
+                # the catalogue so the join never touches individual events
+                query = f"""
+                    SELECT
+                        f.fault_code,
+                        f.occurrences,
+                        f.serials,
+                        f.first_seen,
+                        f.last_seen,
+                        COALESCE(hal.description, tb.description) AS description,
+                        CASE
+                            WHEN hal.code IS NOT NULL THEN 'HAL'
+                            WHEN tb.code IS NOT NULL THEN 'TB'
+                            ELSE 'NA'
+                        END AS database
+                    FROM (
+                        SELECT
+                            fault_code,
+                            COUNT(*) AS occurrences,
+                            COUNT(DISTINCT serial_number) AS serials,
+                            MIN(datetime) AS first_seen,
+                            MAX(datetime) AS last_seen
+                        FROM fault_events{where}
+                        GROUP BY fault_code
+                    ) f
+                    LEFT JOIN fault_codes hal
+                        ON hal.code = f.fault_code AND hal.source = 'uploaded'
+                    LEFT JOIN fault_codes tb
+                        ON tb.code = f.fault_code AND tb.source = 'tb'
+                    ORDER BY f.occurrences DESC
+                """
+                if limit:
+                    query += f" LIMIT {int(limit)}"
+
+                return pd.read_sql_query(
+                    query, conn, params=params, parse_dates=["first_seen", "last_seen"]
+                )
+
+        except Exception as e:
+            print(f"Error retrieving fault frequency: {e}")
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def get_fault_timeline(
+        self,
+        fault_code: Optional[str] = None,
+        serial_number: Optional[str] = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """Get fault events in time order with catalogue descriptions"""
+        try:
+            with self.get_read_connection() as conn:
+                clauses, params = self._fault_event_filters(serial_number, start, end)
+                if fault_code is not None:
+                    clauses.insert(0, "fault_code = ?")
+                    params.insert(0, str(fault_code))
+                where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+                query = f"""
+                    SELECT
+                        e.datetime,
+                        e.serial_number AS serial,
+                        e.fault_code,
+                        e.event_type,
+                        e.state,
+                        COALESCE(
+                            (SELECT description FROM fault_codes
+                             WHERE code = e.fault_code AND source = 'uploaded'),
+                            (SELECT description FROM fault_codes
+                             WHERE code = e.fault_code AND source = 'tb'),
+                            e.message
+                        ) AS description
+                    FROM (
+                        SELECT * FROM fault_events{where}
+                    ) e
+                    ORDER BY e.datetime ASC
+                """
+                return pd.read_sql_query(
+                    query, conn, params=params, parse_dates=["datetime"]
+                )
+
+        except Exception as e:
+            print(f"Error retrieving fault timeline: {e}")
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def insert_file_metadata(
+        self,
+        filename: str,
+        file_size: int,
+        records_imported: int,
+        parsing_stats: str,
+        content_hash: Optional[str] = None,
+    ):
+        """Insert file metadata with error handling"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    """
+                    INSERT OR IGNORE INTO file_metadata
+                    (filename, file_size, records_imported, parsing_stats, content_hash)
+                    VALUES (?, ?, ?, ?, ?)
+                """,
+                    (filename, file_size, records_imported, parsing_stats, content_hash),
+                )
+        except Exception as e:
+            print(f"Error inserting file metadata: {e}")
+            traceback.print_exc()
+
+    def is_file_imported(self, content_hash: str) -> bool:
+        """Check whether a file with this content hash was already imported"""
+        try:
+            with self.get_read_connection() as conn:
+                return (
+                    conn.execute(
+                        "SELECT 1 FROM file_metadata WHERE content_hash = ?",
+                        (content_hash,),
+                    ).fetchone()
+                    is not None
+                )
+        except Exception as e:
+            print(f"Error checking file history: {e}")
+            traceback.print_exc()
+            return False
+
+    @cached_query(ignore=("chunk_size",))
+    def get_all_logs(
+        self, limit: Optional[int] = None, chunk_size: int = None
+    ) -> pd.DataFrame:
+        """
+        Get all logs with memory-optimized processing for large datasets
+
+        One query per source (main readings, each monthly partition, legacy
+        rows) returns avg/min/max per (datetime, serial, parameter). Every
+        source is counted first, then fetched chunk_size rows at a time into
+        one set of preallocated column arrays, so nothing is concatenated.
+        Use iter_logs() to process the history without holding it.
+        """
+        try:
+            with self.get_read_connection() as conn:
+                totals = []
+                remaining = int(limit) if limit else None
+                with closing(self._log_source_queries(conn)) as queries:
+                    for query in queries:
+                        total = conn.execute(
+                            f"SELECT COUNT(*) FROM ({query})"
+                        ).fetchone()[0]
+                        if remaining is not None:
+                            total = min(total, remaining)
+                            remaining -= total
+                        totals.append(total)
+                        if remaining == 0:
+                            break
+
+                columns = {
+                    name: np.empty(
+                        sum(totals),
+                        dtype=object if name in ("serial", "param", "unit") else np.float64,
+                    )
+                    for name in self.LOG_COLUMNS
+                }
+                names = {}
+                position = 0
+                with closing(self._log_source_queries(conn)) as queries:
+                    for total, query in zip(totals, queries):
+                        # Capped at the counted rows; rows stored since then
+                        # are left out rather than overflowing the arrays
+                        if total:
+                            position = self._fetch_log_columns(
+                                conn, f"{query} LIMIT {total}", columns, position, chunk_size, names
+                            )
+
+                if position == 0:
+                    return pd.DataFrame()
+                df = self._log_frame(
+                    {name: values[:position] for name, values in columns.items()}
+                )
+
+                # Calculate diff column
+                df["diff"] = df["max"] - df["min"]
+
+                return df
+
+        except Exception as e:
+            print(f"Error retrieving logs: {e}")
+            traceback.print_exc()
+            return pd.DataFrame()
+
+    def _log_source_queries(self, conn):
+        """
+        Yield one (ts, serial, param, avg, min, max, unit) query per source
+
+        Main readings and each monthly partition come first (a partition is
+        attached only while its query is the current one), then legacy rows
+        pivoted in SQL.
+        """
+        with closing(self._iter_reading_sources(conn)) as tables:
+            for table in tables:
+                yield f"""
+                    SELECT
+                        r.ts,
+                        s.serial_number AS serial,
+                        p.parameter_type AS param,
+                        r.avg,
+                        r.min,
+                        r.max,
+                        p.unit
+                    FROM {table} r
+                    JOIN serials s ON s.id = r.serial_id
+                    JOIN parameters p ON p.id = r.parameter_id
+                """
+
+        # Rows imported before the wide layout existed
+        if self._has_table(conn, "water_logs_legacy"):
+            yield """
+                SELECT
+                    CAST(strftime('%s', datetime) AS INTEGER) AS ts,
+                    serial_number AS serial,
+                    parameter_type AS param,
+                    MAX(CASE WHEN statistic_type = 'avg' THEN value END) AS avg,
+                    MAX(CASE WHEN statistic_type = 'min' THEN value END) AS min,
+                    MAX(CASE WHEN statistic_type = 'max' THEN value END) AS max,
+                    MAX(unit) AS unit
+                FROM water_logs_legacy
+                GROUP BY datetime, serial_number, parameter_type
+            """
+
+    @staticmethod
+    def _log_rows_to_columns(rows, names: Dict) -> Dict[str, np.ndarray]:
+        """(ts, serial, param, avg, min, max, unit) tuples -> typed column arrays"""
+        times, serials, params, avgs, mins, maxs, units = zip(*rows)
+        return {
+            # Epoch seconds as float64 so an unparseable legacy time becomes NaT
+            "ts": np.array(times, dtype=np.float64),
+            # Serial/parameter names repeat on every row; share one string object each
+            "serial": np.array([names.setdefault(v, v) for v in serials], dtype=object),
+            "param": np.array([names.setdefault(v, v) for v in params], dtype=object),
+            "unit": np.array([names.setdefault(v, v) for v in units], dtype=object),
+            "avg": np.array(avgs, dtype=np.float64),
+            "min": np.array(mins, dtype=np.float64),
+            "max": np.array(maxs, dtype=np.float64),
+        }
+
+    def _fetch_log_columns(
+        self,
+        conn,
+        query: str,
+        columns: Dict[str, np.ndarray],
+        position: int,
+        chunk_size: Optional[int] = None,
+        names: Optional[Dict] = None,
+    ) -> int:
+        """Stream (ts, serial, param, avg, min, max, unit) rows into columns from position on"""
+        if names is None:
+            names = {}
+        capacity = len(columns["ts"])
+
+        cursor = conn.execute(query)
+        try:
+            while position < capacity:
+                rows = cursor.fetchmany(min(chunk_size or 50000, capacity - position))
+                if not rows:
+                    break
+                end = position + len(rows)
+                for name, values in self._log_rows_to_columns(rows, names).items():
+                    columns[name][position:end] = values
+                position = end
+        finally:
+            cursor.close()
+        return position
+
+    # Column order of get_all_logs() before the derived diff column
+    LOG_COLUMNS = ["ts", "serial", "param", "avg", "min", "max", "unit"]
+
+    def _log_frame(self, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Typed log DataFrame (datetime first) from _log_rows_to_columns arrays"""
+        return pd.DataFrame(
+            {
+                "datetime": self._epoch_to_datetime(columns["ts"]),
+                "serial": columns["serial"],
+                "param": columns["param"],
+                "avg": columns["avg"],
+                "min": columns["min"],
+                "max": columns["max"],
+                "unit": columns["unit"],
+            }
+        )
+
+    def iter_logs(
+        self, chunk_size: int = 50000, limit: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield the rows of get_all_logs() lazily, at most chunk_size at a time
+
+        Chunks have the same typed columns (including diff) as get_all_logs,
+        so peak memory is one chunk whatever the history length. The iterator
+        holds its own reader connection until it is exhausted or closed.
+        """
+        with self.get_read_connection(dedicated=True) as conn:
+            names = {}
+            remaining = int(limit) if limit else None
+            with closing(self._log_source_queries(conn)) as queries:
+                for query in queries:
+                    if remaining is not None:
+                        query += f" LIMIT {remaining}"
+                    cursor = conn.execute(query)
+                    try:
+                        while remaining is None or remaining > 0:
+                            rows = cursor.fetchmany(chunk_size)
+                            if not rows:
+                                break
+                            chunk = self._log_frame(self._log_rows_to_columns(rows, names))
+                            chunk["diff"] = chunk["max"] - chunk["min"]
+                            if remaining is not None:
+                                remaining -= len(rows)
+                            yield chunk
+                    finally:
+                        cursor.close()
+                    if remaining == 0:
+                        return
+
+    def iter_logs_by_parameter(
+        self,
+        parameter_type: str,
+        serial_number: Optional[str] = None,
+        chunk_size: int = 50000,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield get_logs_by_parameter() rows lazily, at most chunk_size at a time
+
+        Rows are in time order within each source (main readings, each
+        monthly partition, legacy rows).
+        """
+        with self.get_read_connection(dedicated=True) as conn:
+            with closing(
+                self._parameter_log_queries(conn, parameter_type, serial_number)
+            ) as queries:
+                for query, params in queries:
+                    yield from pd.read_sql_query(
+                        query,
+                        conn,
+                        params=params,
+                        parse_dates=["datetime"],
+                        chunksize=chunk_size,
+                    )
 
-        if thread_id not in self.connection_pool:
-            self.connection_pool[thread_id] = sqlite3.connect(
-                self.db_path, timeout=30.0, isolation_level=None
+    def iter_file_history(self, chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+        """Yield the import history lazily, newest first"""
+        with self.get_read_connection(dedicated=True) as conn:
+            yield from pd.read_sql_query(
+                self.FILE_HISTORY_QUERY,
+                conn,
+                parse_dates=["import_timestamp"],
+                chunksize=chunk_size,
             )
-            # Enable foreign keys
-            self.connection_pool[thread_id].execute("PRAGMA foreign_keys=ON")
 
-        conn = self.connection_pool[thread_id]
+    def export_logs_csv(self, path: str, chunk_size: int = 50000) -> int:
+        """
+        Write all logs to a CSV file chunk by chunk; returns rows written
+
+        The file is written under a temporary name and renamed when complete,
+        so a failed export raises and leaves nothing at path.
+        """
+        written = 0
+        partial = path + ".partial"
         try:
-            yield conn
-        except Exception as e:
-            conn.rollback()
-            raise e
+            with open(partial, "w", newline="", encoding="utf-8") as f:
+                for chunk in self.iter_logs(chunk_size=chunk_size):
+                    chunk.to_csv(f, header=written == 0, index=False)
+                    written += len(chunk)
+            os.replace(partial, path)
+            return written
         finally:
-            # Don't close the connection, keep it in the pool
-            pass
+            if os.path.exists(partial):
+                os.remove(partial)
 
-    def insert_data_batch(self, df: pd.DataFrame, batch_size: int = 1000) -> int:
-        """Insert data in optimized batches for better performance"""
-        if df.empty:
-            return 0
+    @cached_query()
+    def load_readings(
+        self,
+        parameter_type: Optional[str] = None,
+        serial_number: Optional[str] = None,
+        start=None,
+        end=None,
+        columns=None,
+    ) -> pd.DataFrame:
+        """
+        Get raw readings with only the requested columns
 
-        total_inserted = 0
-        start_time = time.time()
+        columns is any of serial, param, avg, min, max, count, data_quality
+        (datetime is always included). Served from the hot replica when start
+        is inside it, else from the columnar mirror when it is complete,
+        otherwise from SQLite with partitions pruned by time.
+        """
+        available = ["serial", "param", "avg", "min", "max", "count", "data_quality"]
+        columns = [c for c in (columns or available) if c in available]
+        start_ts = self._epoch_seconds(start) if start is not None else None
+        end_ts = self._epoch_seconds(end) if end is not None else None
 
         try:
-            with self.get_connection() as conn:
-                # Begin transaction for all inserts
-                conn.execute("BEGIN TRANSACTION")
-
-                # Prepare DataFrame for insertion
-                df_clean = df.copy()
-                if (
-                    "datetime" in df_clean.columns
-                    and pd.api.types.is_datetime64_any_dtype(df_clean["datetime"])
+            with self._replica_connection(raw=True, start_ts=start_ts) as conn:
+                if conn is not self._hot and (
+                    self.columnar_cache is not None and self.columnar_cache.is_complete()
                 ):
-                    df_clean["datetime"] = df_clean["datetime"].dt.strftime(
-                        "%Y-%m-%d %H:%M:%S"
+                    df = self.columnar_cache.load(
+                        parameter_type, serial_number, start_ts, end_ts, ["ts"] + columns
                     )
-
-                # Ensure all required columns exist
-                columns_to_insert = [
-                    "datetime",
-                    "serial_number",
-                    "parameter_type",
-                    "statistic_type",
-                    "value",
-                    "count",
-                    "unit",
-                    "description",
-                    "data_quality",
-                    "raw_parameter",
-                    "line_number",
-                ]
-
-                for col in columns_to_insert:
-                    if col not in df_clean.columns:
-                        df_clean[col] = None
-
-                # Prepare the insert statement once
-                insert_sql = """
-                    INSERT INTO water_logs
-                    (datetime, serial_number, parameter_type, statistic_type,
-                     value, count, unit, description, data_quality,
-                     raw_parameter, line_number)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-
-                # Process in batches for memory efficiency
-                for start_idx in range(0, len(df_clean), batch_size):
-                    end_idx = min(start_idx + batch_size, len(df_clean))
-                    batch_df = df_clean.iloc[start_idx:end_idx]
-                    data_to_insert = batch_df[columns_to_insert].values.tolist()
-
-                    # Execute batch insert
-                    conn.executemany(insert_sql, data_to_insert)
-                    total_inserted += len(batch_df)
-
-                    # Intermediate commit for very large datasets to avoid transaction overhead
-                    if total_inserted % 10000 == 0:
-                        conn.execute("COMMIT")
-                        conn.execute("BEGIN TRANSACTION")
-
-                # Final commit
-                conn.execute("COMMIT")
-
-                # Log performance metrics
-                elapsed = time.time() - start_time
-                print(
-                    f"Batch insert completed: {total_inserted:,} records in {elapsed:.2f}s ({total_inserted/elapsed:.1f} records/sec)"
-                )
+                    df = df.sort_values("ts", kind="stable", ignore_index=True)
+                else:
+                    clauses = []
+                    params = []
+                    if parameter_type is not None:
+                        clauses.append("param = ?")
+                        params.append(parameter_type)
+                    if serial_number is not None:
+                        clauses.append("serial = ?")
+                        params.append(str(serial_number))
+                    if start_ts is not None:
+                        clauses.append("ts >= ?")
+                        params.append(start_ts)
+                    if end_ts is not None:
+                        clauses.append("ts <= ?")
+                        params.append(end_ts)
+                    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+                    with closing(
+                        self._iter_reading_sources(conn, start_ts, end_ts)
+                    ) as tables:
+                        frames = [
+                            pd.read_sql_query(
+                                f"SELECT {', '.join(['ts'] + columns)} "
+                                f"FROM ({self._mirror_query(table)}){where} ORDER BY ts",
+                                conn,
+                                params=params,
+                            )
+                            for table in tables
+                        ]
+                    df = pd.concat(frames, ignore_index=True)
+                    if len(frames) > 1:
+                        df = df.sort_values("ts", kind="stable", ignore_index=True)
+
+            df.insert(0, "datetime", self._epoch_to_datetime(df.pop("ts")))
+            return df
 
         except Exception as e:
-            print(f"Error inserting data: {e}")
+            print(f"Error loading readings: {e}")
             traceback.print_exc()
-            return 0
+            return pd.DataFrame()
 
-        return total_inserted
+    @cached_query()
+    def get_parameter_trend(
+        self,
+        parameter_type: str,
+        serial_number: Optional[str] = None,
+        start=None,
+        end=None,
+        resolution_seconds: Optional[float] = None,
+        max_points: int = 2000,
+    ) -> pd.DataFrame:
+        """
+        Get a parameter trend from the coarsest table that meets the resolution
 
-    def insert_file_metadata(
-        self, filename: str, file_size: int, records_imported: int, parsing_stats: str
-    ):
-        """Insert file metadata with error handling"""
+        Without an explicit resolution, the span is divided into max_points.
+        Hourly/daily rows carry the bucket start as datetime; the chosen table
+        is reported in df.attrs["source"].
+        """
         try:
-            with self.get_connection() as conn:
-                conn.execute(
+            with self._replica_connection() as conn:
+                parameter_row = conn.execute(
+                    "SELECT id FROM parameters WHERE parameter_type = ?",
+                    (parameter_type,),
+                ).fetchone()
+                if parameter_row is None:
+                    return pd.DataFrame()
+                parameter_id = parameter_row[0]
+
+                start = pd.Timestamp(start) if start is not None else None
+                end = pd.Timestamp(end) if end is not None else None
+
+                if resolution_seconds is None:
+                    if start is None or end is None:
+                        bounds = conn.execute(
+                            "SELECT MIN(bucket), MAX(bucket) FROM water_logs_daily "
+                            "WHERE parameter_id = ?",
+                            (parameter_id,),
+                        ).fetchone()
+                        if bounds[0] is None:
+                            return pd.DataFrame()
+                        start_bound = (
+                            start if start is not None else pd.Timestamp(bounds[0], unit="s")
+                        )
+                        end_bound = (
+                            end
+                            if end is not None
+                            else pd.Timestamp(bounds[1], unit="s") + pd.Timedelta(days=1)
+                        )
+                    else:
+                        start_bound, end_bound = start, end
+                    span = max((end_bound - start_bound).total_seconds(), 0)
+                    resolution_seconds = span / max(max_points, 1)
+
+                source = "readings"
+                for table, width in sorted(
+                    self.ROLLUP_TABLES.items(), key=lambda item: -item[1]
+                ):
+                    if resolution_seconds >= width:
+                        source = table
+                        break
+
+                if source == "readings":
+                    query = """
+                        SELECT r.ts, s.serial_number AS serial,
+                               r.avg, r.min, r.max,
+                               COALESCE(r.count, 1) AS sample_count
+                        FROM {table} r
+                        JOIN serials s ON s.id = r.serial_id
+                        WHERE r.parameter_id = ?
                     """
-                    INSERT INTO file_metadata
-                    (filename, file_size, records_imported, parsing_stats)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    (filename, file_size, records_imported, parsing_stats),
-                )
+                    time_column = "r.ts"
+                else:
+                    width = self.ROLLUP_TABLES[source]
+                    query = f"""
+                        SELECT t.bucket AS ts, s.serial_number AS serial,
+                               t.avg, t.min, t.max, t.sample_count
+                        FROM {source} t
+                        JOIN serials s ON s.id = t.serial_id
+                        WHERE t.parameter_id = ?
+                    """
+                    time_column = "t.bucket"
+                    # Include the bucket that contains start
+                    if start is not None:
+                        start = start.floor(f"{width}s")
+
+                params = [parameter_id]
+                if serial_number:
+                    query += " AND s.serial_number = ?"
+                    params.append(serial_number)
+                if start is not None:
+                    query += f" AND {time_column} >= ?"
+                    params.append(self._epoch_seconds(start))
+                if end is not None:
+                    query += f" AND {time_column} <= ?"
+                    params.append(self._epoch_seconds(end))
+                query += f" ORDER BY {time_column} ASC"
+
+                start_ts = self._epoch_seconds(start) if start is not None else None
+                end_ts = self._epoch_seconds(end) if end is not None else None
+                if source == "readings" and (
+                    self.columnar_cache is not None
+                    and self.columnar_cache.is_complete()
+                ):
+                    # Raw rows from the hot replica or the Parquet mirror
+                    df = self.load_readings(
+                        parameter_type,
+                        serial_number or None,
+                        start,
+                        end,
+                        columns=["serial", "avg", "min", "max", "count"],
+                    )
+                    if df.empty:
+                        return pd.DataFrame()
+                    df["sample_count"] = df.pop("count").fillna(1).astype(np.int64)
+                elif source == "readings":
+                    # Only partitions overlapping [start, end] are attached
+                    with self._raw_reading_connection(
+                        conn, start_ts
+                    ) as reader, closing(
+                        self._iter_reading_sources(reader, start_ts, end_ts)
+                    ) as tables:
+                        frames = [
+                            pd.read_sql_query(
+                                query.format(table=table), reader, params=params
+                            )
+                            for table in tables
+                        ]
+                    df = pd.concat(frames, ignore_index=True)
+                    if len(frames) > 1:
+                        df = df.sort_values("ts", kind="stable", ignore_index=True)
+                else:
+                    df = pd.read_sql_query(query, conn, params=params)
+                if "ts" in df.columns:
+                    df.insert(0, "datetime", self._epoch_to_datetime(df.pop("ts")))
+                df.insert(2, "param", parameter_type)
+                df.attrs["source"] = source
+                return df
+
         except Exception as e:
-            print(f"Error inserting file metadata: {e}")
+            print(f"Error retrieving parameter trend: {e}")
             traceback.print_exc()
+            return pd.DataFrame()
 
-    def get_all_logs(
-        self, limit: Optional[int] = None, chunk_size: int = None
+    @cached_query()
+    def get_series(
+        self,
+        parameter_type: str,
+        serial_number: Optional[str] = None,
+        start=None,
+        end=None,
+        max_points: int = 1000,
     ) -> pd.DataFrame:
         """
-        Get all logs with memory-optimized processing for large datasets
+        Get a parameter as at most max_points min/max/avg time buckets
+
+        The span is divided into equal buckets and aggregated in SQL, reading
+        the coarsest rollup that fits inside one bucket, so only the plotted
+        points leave the database. Without start/end the series' stored time
+        range is used. avg is count-weighted; rows carry the bucket start as
+        datetime and df.attrs holds the source table and bucket_seconds.
+        Rows still in water_logs_legacy (not rolled up) are bucketed as well.
         """
         try:
-            with self.get_connection() as conn:
-                stats = ["avg", "min", "max"]
-                frames = []
-
-                # Process each statistic type separately for memory efficiency
-                for stat in stats:
-                    stat_query = f"""
-                        SELECT
-                            datetime,
-                            serial_number AS serial,
-                            parameter_type AS param,
-                            value AS {stat},
-                            unit
-                        FROM water_logs
-                        WHERE statistic_type = ?
-                    """
-
-                    # Add limit if specified
-                    if limit:
-                        stat_query += f" LIMIT {limit}"
-
-                    # Use chunked reading for large datasets
-                    if chunk_size:
-                        chunks = []
-                        for chunk in pd.read_sql_query(
-                            stat_query,
-                            conn,
-                            params=[stat],
-                            parse_dates=["datetime"],
-                            chunksize=chunk_size,
-                        ):
-                            chunks.append(chunk)
-
-                        if chunks:
-                            df_stat = pd.concat(chunks)
-                        else:
-                            df_stat = pd.DataFrame()
-                    else:
-                        df_stat = pd.read_sql_query(
-                            stat_query, conn, params=[stat], parse_dates=["datetime"]
-                        )
-
-                    frames.append(df_stat)
-
-                # If any frames are empty, return empty dataframe
-                if any(df.empty for df in frames):
+            with self._replica_connection() as conn:
+                parameter_row = conn.execute(
+                    "SELECT id FROM parameters WHERE parameter_type = ?",
+                    (parameter_type,),
+                ).fetchone()
+                # A parameter only known from legacy rows has no id
+                clauses = ["t.parameter_id = ?"]
+                params = [parameter_row[0] if parameter_row else None]
+                legacy_clauses = ["parameter_type = ?"]
+                legacy_params = [parameter_type]
+
+                bounds_query = (
+                    "SELECT MIN(first_ts), MAX(last_ts) FROM reading_summary "
+                    "WHERE parameter_type = ?"
+                )
+                bounds_params = [parameter_type]
+                if serial_number:
+                    serial_row = conn.execute(
+                        "SELECT id FROM serials WHERE serial_number = ?",
+                        (str(serial_number),),
+                    ).fetchone()
+                    clauses.append("t.serial_id = ?")
+                    params.append(serial_row[0] if serial_row else None)
+                    legacy_clauses.append("serial_number = ?")
+                    legacy_params.append(str(serial_number))
+                    bounds_query += " AND serial_number = ?"
+                    bounds_params.append(str(serial_number))
+
+                if start is None or end is None:
+                    first_ts, last_ts = conn.execute(
+                        bounds_query, bounds_params
+                    ).fetchone()
+                    if first_ts is None:
+                        return pd.DataFrame()
+                start_ts = self._epoch_seconds(start) if start is not None else first_ts
+                end_ts = self._epoch_seconds(end) if end is not None else last_ts
+                if end_ts < start_ts:
                     return pd.DataFrame()
 
-                # Optimize merge for memory efficiency
-                def merge_func(left, right):
-                    return pd.merge(
-                        left,
-                        right,
-                        on=["datetime", "serial", "param", "unit"],
-                        how="outer",
-                        # Use copy=False for memory efficiency (modifies in place)
-                        copy=False,
+                max_points = max(int(max_points), 1)
+                width = max(-(-(end_ts - start_ts + 1) // max_points), 1)
+                source, source_width = "readings", 1
+                for table, table_width in sorted(
+                    self.ROLLUP_TABLES.items(), key=lambda item: -item[1]
+                ):
+                    if width >= table_width:
+                        source, source_width = table, table_width
+                        break
+                if source != "readings":
+                    # Align buckets to the rollup grid so no rollup row
+                    # straddles two of them
+                    start_ts -= start_ts % source_width
+                    width = max(-(-(end_ts - start_ts + 1) // max_points), 1)
+                    width = -(-width // source_width) * source_width
+                    time_column, weight = "t.bucket", "t.sample_count"
+                else:
+                    time_column = "t.ts"
+                    weight = (
+                        "CASE WHEN t.avg IS NOT NULL THEN COALESCE(t.count, 1) END"
+                    )
+                clauses.append(f"{time_column} BETWEEN ? AND ?")
+                params += [start_ts, end_ts]
+
+                query = f"""
+                    SELECT ({time_column} - {start_ts}) / {width} AS slot,
+                           MIN(t.min) AS min,
+                           MAX(t.max) AS max,
+                           SUM(t.avg * {weight}) AS weighted_sum,
+                           COALESCE(SUM({weight}), 0) AS sample_count
+                    FROM {{table}} t
+                    WHERE {" AND ".join(clauses)}
+                    GROUP BY slot
+                """
+
+                frames = []
+                if source == "readings":
+                    # Partitions are aggregated separately and merged per slot
+                    with self._raw_reading_connection(
+                        conn, start_ts
+                    ) as reader, closing(
+                        self._iter_reading_sources(reader, start_ts, end_ts)
+                    ) as tables:
+                        frames += [
+                            pd.read_sql_query(
+                                query.format(table=table), reader, params=params
+                            )
+                            for table in tables
+                        ]
+                else:
+                    frames.append(
+                        pd.read_sql_query(query.format(table=source), conn, params=params)
                     )
 
-                df_merged = reduce(merge_func, frames)
+                # Legacy rows are in neither the readings nor the rollups
+                # until migrate_legacy_readings() moves them
+                with self._raw_reading_connection(conn) as reader:
+                    if self._has_table(reader, "water_logs_legacy"):
+                        legacy_clauses.append("datetime BETWEEN ? AND ?")
+                        legacy_params += [
+                            pd.Timestamp(ts, unit="s").strftime("%Y-%m-%d %H:%M:%S")
+                            for ts in (start_ts, end_ts)
+                        ]
+                        frames.append(
+                            pd.read_sql_query(
+                                f"""
+                                SELECT (CAST(strftime('%s', datetime) AS INTEGER)
+                                        - {start_ts}) / {width} AS slot,
+                                       MIN(CASE WHEN statistic_type = 'min' THEN value END) AS min,
+                                       MAX(CASE WHEN statistic_type = 'max' THEN value END) AS max,
+                                       SUM(CASE WHEN statistic_type = 'avg'
+                                           THEN value * COALESCE(count, 1) END) AS weighted_sum,
+                                       COALESCE(SUM(CASE WHEN statistic_type = 'avg'
+                                           THEN COALESCE(count, 1) END), 0) AS sample_count
+                                FROM water_logs_legacy
+                                WHERE {" AND ".join(legacy_clauses)}
+                                GROUP BY slot
+                            """,
+                                reader,
+                                params=legacy_params,
+                            )
+                        )
 
-                # Calculate diff column
-                df_merged["diff"] = df_merged["max"] - df_merged["min"]
+                filled = [frame for frame in frames if not frame.empty]
+                df = pd.concat(filled or frames[:1], ignore_index=True)
+                if len(filled) > 1:
+                    df = df.groupby("slot", as_index=False).agg(
+                        min=("min", "min"),
+                        max=("max", "max"),
+                        weighted_sum=("weighted_sum", "sum"),
+                        sample_count=("sample_count", "sum"),
+                    )
 
-                return df_merged
+            df = df.sort_values("slot", ignore_index=True)
+            samples = df["sample_count"].astype(np.int64)
+            avg = df.pop("weighted_sum") / samples.where(samples > 0)
+            df.insert(0, "datetime", self._epoch_to_datetime(start_ts + df.pop("slot") * width))
+            df.insert(1, "param", parameter_type)
+            df.insert(2, "avg", avg)
+            df["sample_count"] = samples
+            df.attrs["source"] = source
+            df.attrs["bucket_seconds"] = width
+            return df
 
         except Exception as e:
-            print(f"Error retrieving logs: {e}")
+            print(f"Error retrieving parameter series: {e}")
             traceback.print_exc()
             return pd.DataFrame()
 
+    def _parameter_log_queries(
+        self, conn, parameter_type: str, serial_number: Optional[str] = None
+    ):
+        """Yield (query, params) per source for the long rows of one parameter"""
+        params = [parameter_type]
+        serial_clause = ""
+        if serial_number:
+            serial_clause = " AND serial_number = ?"
+            params.append(serial_number)
+
+        def query(source):
+            return f"""
+                SELECT
+                    datetime,
+                    serial_number as serial,
+                    parameter_type as param,
+                    value as avg,
+                    unit,
+                    statistic_type,
+                    data_quality
+                FROM ({source})
+                WHERE parameter_type = ?{serial_clause}
+                ORDER BY datetime ASC
+            """
+
+        with closing(self._iter_reading_sources(conn)) as tables:
+            for table in tables:
+                yield query(self._long_readings_query(table)), params
+        if self._has_table(conn, "water_logs_legacy"):
+            yield query("SELECT * FROM water_logs_legacy"), params
+
+    @cached_query(ignore=("chunk_size",))
     def get_logs_by_parameter(
         self,
         parameter_type: str,
         serial_number: Optional[str] = None,
         chunk_size: Optional[int] = None,
     ) -> pd.DataFrame:
-        """Get logs filtered by parameter type with chunked processing"""
-        try:
-            with self.get_connection() as conn:
-                query = """
-                    SELECT
-                        datetime,
-                        serial_number as serial,
-                        parameter_type as param,
-                        value as avg,
-                        unit,
-                        statistic_type,
-                        data_quality
-                    FROM water_logs
-                    WHERE parameter_type = ?
-                """
-                params = [parameter_type]
-
-                if serial_number:
-                    query += " AND serial_number = ?"
-                    params.append(serial_number)
-
-                query += " ORDER BY datetime ASC"
+        """
+        Get logs filtered by parameter type
 
-                # Use chunked reading for large datasets
-                if chunk_size:
-                    chunks = []
-                    for chunk in pd.read_sql_query(
-                        query,
-                        conn,
-                        params=params,
-                        parse_dates=["datetime"],
-                        chunksize=chunk_size,
-                    ):
-                        chunks.append(chunk)
+        The whole result is returned at once; use iter_logs_by_parameter()
+        to process it in chunks (chunk_size is kept for compatibility).
+        """
+        try:
+            with self.get_read_connection() as conn:
+                with closing(
+                    self._parameter_log_queries(conn, parameter_type, serial_number)
+                ) as queries:
+                    frames = [
+                        pd.read_sql_query(
+                            query, conn, params=params, parse_dates=["datetime"]
+                        )
+                        for query, params in queries
+                    ]
 
-                    if chunks:
-                        return pd.concat(chunks)
+                frames = [frame for frame in frames if not frame.empty]
+                if not frames:
                     return pd.DataFrame()
-                else:
-                    return pd.read_sql_query(
-                        query, conn, params=params, parse_dates=["datetime"]
-                    )
+                if len(frames) == 1:
+                    return frames[0]
+                return pd.concat(frames, ignore_index=True).sort_values(
+                    "datetime", kind="stable", ignore_index=True
+                )
 
         except Exception as e:
             print(f"Error retrieving parameter logs: {e}")
             traceback.print_exc()
             return pd.DataFrame()
 
-    def get_summary_statistics(self) -> Dict:
-        """Get summary statistics with optimized queries"""
+    def get_record_count(self) -> int:
+        """Get the number of stored readings (from the summary counters)"""
         try:
-            with self.get_connection() as conn:
-                # Use a single transaction for better performance
-                conn.execute("BEGIN")
-
-                # Get basic counts with optimized queries
-                total_records = conn.execute(
-                    "SELECT COUNT(*) FROM water_logs"
-                ).fetchone()[0]
-
-                unique_params = conn.execute(
-                    "SELECT COUNT(DISTINCT parameter_type) FROM water_logs"
+            with self._replica_connection() as conn:
+                return conn.execute(
+                    "SELECT COALESCE(SUM(readings), 0) FROM reading_summary"
                 ).fetchone()[0]
+        except Exception as e:
+            print(f"Error counting readings: {e}")
+            traceback.print_exc()
+            return 0
 
-                unique_serials = conn.execute(
-                    "SELECT COUNT(DISTINCT serial_number) FROM water_logs"
-                ).fetchone()[0]
-
-                date_range = conn.execute(
-                    "SELECT MIN(datetime), MAX(datetime) FROM water_logs"
-                ).fetchone()
-
-                # Get quality distribution efficiently
-                quality_dist = pd.read_sql_query(
+    @cached_query()
+    def get_series_summary(self) -> pd.DataFrame:
+        """Readings, statistics and time range per (serial, parameter) series"""
+        try:
+            with self._replica_connection() as conn:
+                df = pd.read_sql_query(
                     """
-                    SELECT data_quality, COUNT(*) as count
-                    FROM water_logs
-                    GROUP BY data_quality
-                    """,
+                    SELECT serial_number, parameter_type, readings, statistics,
+                           first_ts, last_ts
+                    FROM reading_summary
+                    ORDER BY serial_number, parameter_type
+                """,
                     conn,
                 )
+            df["first"] = self._epoch_to_datetime(df.pop("first_ts"))
+            df["last"] = self._epoch_to_datetime(df.pop("last_ts"))
+            return df
+        except Exception as e:
+            print(f"Error getting series summary: {e}")
+            traceback.print_exc()
+            return pd.DataFrame()
 
-                conn.execute("COMMIT")
+    @cached_query()
+    def get_summary_statistics(self) -> Dict:
+        """
+        Get summary statistics from the counter tables
+
+        Costs one pass over the series and quality counters, whatever the
+        number of stored readings.
+        """
+        try:
+            with self._replica_connection() as conn:
+                conn.execute("BEGIN")
+                try:
+                    totals = conn.execute(
+                        """
+                        SELECT COALESCE(SUM(statistics), 0),
+                               COALESCE(SUM(readings), 0),
+                               COUNT(DISTINCT parameter_type),
+                               COUNT(DISTINCT serial_number),
+                               datetime(MIN(first_ts), 'unixepoch'),
+                               datetime(MAX(last_ts), 'unixepoch')
+                        FROM reading_summary
+                    """
+                    ).fetchone()
+                    latest = conn.execute(
+                        "SELECT serial_number FROM reading_summary "
+                        "ORDER BY last_ts DESC LIMIT 1"
+                    ).fetchone()
+                    by_serial = conn.execute(
+                        "SELECT serial_number, SUM(readings) FROM reading_summary "
+                        "GROUP BY serial_number"
+                    ).fetchall()
+                    by_parameter = conn.execute(
+                        "SELECT parameter_type, SUM(readings) FROM reading_summary "
+                        "GROUP BY parameter_type"
+                    ).fetchall()
+                    quality = conn.execute(
+                        "SELECT NULLIF(data_quality, ''), statistics "
+                        "FROM reading_quality_summary WHERE statistics > 0"
+                    ).fetchall()
+                finally:
+                    conn.execute("COMMIT")
 
                 return {
-                    "total_records": total_records,
-                    "unique_parameters": unique_params,
-                    "unique_serials": unique_serials,
-                    "date_range": date_range,
-                    "quality_distribution": (
-                        quality_dist.to_dict("records")
-                        if not quality_dist.empty
-                        else []
-                    ),
+                    "total_records": totals[0],
+                    "total_readings": totals[1],
+                    "unique_parameters": totals[2],
+                    "unique_serials": totals[3],
+                    "date_range": (totals[4], totals[5]),
+                    "latest_serial": latest[0] if latest else None,
+                    "readings_by_serial": dict(by_serial),
+                    "readings_by_parameter": dict(by_parameter),
+                    "quality_distribution": [
+                        {"data_quality": data_quality, "count": count}
+                        for data_quality, count in quality
+                    ],
                 }
 
         except Exception as e:
@@ -421,38 +3454,29 @@ class DatabaseManager:
             traceback.print_exc()
             return {}
 
-    def get_file_history(self, chunk_size: Optional[int] = None) -> pd.DataFrame:
-        """Get file import history with chunked reading"""
-        try:
-            with self.get_connection() as conn:
-                query = """
-                    SELECT
-                        filename,
-                        file_size,
-                        records_imported,
-                        import_timestamp,
-                        parsing_stats
-                    FROM file_metadata
-                    ORDER BY import_timestamp DESC
-                """
+    FILE_HISTORY_QUERY = """
+        SELECT
+            filename,
+            file_size,
+            records_imported,
+            import_timestamp,
+            parsing_stats
+        FROM file_metadata
+        ORDER BY import_timestamp DESC
+    """
 
-                if chunk_size:
-                    chunks = []
-                    for chunk in pd.read_sql_query(
-                        query,
-                        conn,
-                        parse_dates=["import_timestamp"],
-                        chunksize=chunk_size,
-                    ):
-                        chunks.append(chunk)
+    def get_file_history(self, chunk_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Get file import history
 
-                    if chunks:
-                        return pd.concat(chunks)
-                    return pd.DataFrame()
-                else:
-                    return pd.read_sql_query(
-                        query, conn, parse_dates=["import_timestamp"]
-                    )
+        Use iter_file_history() to process it in chunks (chunk_size is kept
+        for compatibility).
+        """
+        try:
+            with self.get_read_connection() as conn:
+                return pd.read_sql_query(
+                    self.FILE_HISTORY_QUERY, conn, parse_dates=["import_timestamp"]
+                )
 
         except Exception as e:
             print(f"Error retrieving file history: {e}")
@@ -464,25 +3488,472 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 conn.execute("BEGIN TRANSACTION")
-                conn.execute("DELETE FROM water_logs")
+                conn.execute("DELETE FROM readings")
+                conn.execute("DELETE FROM serials")
+                conn.execute("DELETE FROM parameters")
+                for table in self.ROLLUP_TABLES:
+                    conn.execute(f"DELETE FROM {table}")
+                if self._has_table(conn, "water_logs_legacy"):
+                    conn.execute("DELETE FROM water_logs_legacy")
                 conn.execute("DELETE FROM file_metadata")
+                conn.execute("DELETE FROM fault_events")
+                conn.execute("DELETE FROM fault_intervals")
+                conn.execute("DELETE FROM retention_horizons")
+                conn.execute("DELETE FROM reading_summary")
+                conn.execute("DELETE FROM reading_quality_summary")
+                partitions = self._list_partitions(conn)
+                conn.execute("DELETE FROM partitions")
                 conn.execute("COMMIT")
+                self.query_cache.invalidate()
+
+                for _, filename, _ in partitions:
+                    self._remove_partition_file(filename)
+                if self.columnar_cache is not None:
+                    self.columnar_cache.clear()
+                    self.columnar_cache.mark_complete()
+                self._load_hot_replica()
 
                 # Reset auto-increment counters
                 conn.execute("BEGIN TRANSACTION")
-                conn.execute("DELETE FROM sqlite_sequence WHERE name='water_logs'")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name='readings'")
                 conn.execute("DELETE FROM sqlite_sequence WHERE name='file_metadata'")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name='fault_events'")
+                conn.execute("DELETE FROM sqlite_sequence WHERE name='fault_intervals'")
                 conn.execute("COMMIT")
 
         except Exception as e:
             print(f"Error clearing database: {e}")
             traceback.print_exc()
 
+    def _delete_in_chunks(
+        self,
+        table: Optional[str],
+        key: str,
+        where: str,
+        params,
+        chunk_rows: int,
+        partition=None,
+        counted: bool = False,
+    ) -> int:
+        """
+        Delete matching rows chunk_rows at a time, one short transaction each
+
+        The writer is released between chunks so imports are never held up
+        for long. With partition, table is that partition's readings. With
+        counted, each chunk is subtracted from the summary counters in its
+        own transaction.
+        """
+        total = 0
+        while True:
+            with self.get_connection() as conn:
+                with (
+                    self._attached_partition(conn, partition)
+                    if partition is not None
+                    else nullcontext(table)
+                ) as target:
+                    chunk = (
+                        f"SELECT {key} FROM {target} WHERE {where} "
+                        f"ORDER BY {key} LIMIT {int(chunk_rows)}"
+                    )
+                    conn.execute("BEGIN TRANSACTION")
+                    if counted:
+                        self._update_summary(
+                            conn, target, f"r.{key} IN ({chunk})", params, sign=-1
+                        )
+                    deleted = conn.execute(
+                        f"DELETE FROM {target} WHERE ({key}) IN ({chunk})", params
+                    ).rowcount
+                    conn.execute("COMMIT")
+            total += deleted
+            if deleted < chunk_rows:
+                return total
+
+    def _expire_readings(self, cutoff_ts: int, chunk_rows: int) -> int:
+        """
+        Delete raw readings (main and partitions) older than cutoff_ts
+
+        water_logs_legacy is left alone: those rows are not in the rollups,
+        so they are only expired once migrate_legacy_readings() has moved them.
+        """
+        deleted = self._delete_in_chunks(
+            "readings", "id", "ts < ?", (cutoff_ts,), chunk_rows, counted=True
+        )
+
+        with self.get_read_connection() as conn:
+            partitions = self._list_partitions(conn, end_ts=cutoff_ts - 1)
+
+        for month, filename, read_only in partitions:
+            start_ts, end_ts = self._month_bounds(month)
+            if end_ts <= cutoff_ts:
+                # A month entirely past the cutoff goes as a whole file
+                with self.get_connection() as conn:
+                    with self._attached_partition(
+                        conn, (month, filename, read_only)
+                    ) as table:
+                        conn.execute("BEGIN TRANSACTION")
+                        self._update_summary(conn, table, sign=-1)
+                        conn.execute("DELETE FROM partitions WHERE month = ?", (month,))
+                        conn.execute("COMMIT")
+                self._remove_partition_file(filename)
+                deleted += 1
+                print(f"Dropped expired partition {month}")
+            else:
+                with self.get_connection() as conn:
+                    partition = self._ensure_partition(conn, month)
+                deleted += self._delete_in_chunks(
+                    None, "id", "ts < ?", (cutoff_ts,), chunk_rows, partition, True
+                )
+
+        with self.get_connection() as conn:
+            self._refresh_summary_ranges(conn, cutoff_ts)
+
+        if self.columnar_cache is not None:
+            self.columnar_cache.drop_before(cutoff_ts)
+        return deleted
+
+    def apply_retention(self, now=None, chunk_rows: int = 5000) -> Dict[str, int]:
+        """
+        Expire rows older than the retention_days policy
+
+        Ages are measured from now, which defaults to the newest stored
+        reading rather than the clock, so an old archive opened today is not
+        emptied. Returns rows deleted per table (a dropped monthly partition
+        counts as one). Call reclaim_space() afterwards to shrink the files.
+        """
+        deleted = {}
+        if all(days is None for days in self.retention_days.values()):
+            return deleted
+        try:
+            if now is None:
+                with self.get_read_connection() as conn:
+                    newest = conn.execute(
+                        "SELECT MAX(last_ts) FROM reading_summary"
+                    ).fetchone()[0]
+                if newest is None:
+                    return deleted
+                now = pd.Timestamp(newest, unit="s")
+            now = pd.Timestamp(now)
+            for table, days in self.retention_days.items():
+                if days is None:
+                    continue
+                cutoff_ts = self._epoch_seconds(now - pd.Timedelta(days=days))
+
+                if table == "readings":
+                    deleted[table] = self._expire_readings(cutoff_ts, chunk_rows)
+                else:
+                    deleted[table] = self._delete_in_chunks(
+                        table,
+                        "parameter_id, serial_id, bucket",
+                        "bucket < ?",
+                        (cutoff_ts,),
+                        chunk_rows,
+                    )
+
+                with self.get_connection() as conn:
+                    conn.execute(
+                        "INSERT INTO retention_horizons (name, cutoff_ts) VALUES (?, ?) "
+                        "ON CONFLICT (name) DO UPDATE SET "
+                        "cutoff_ts = MAX(cutoff_ts, excluded.cutoff_ts)",
+                        (table, cutoff_ts),
+                    )
+            if deleted:
+                print(f"Retention applied: {deleted}")
+        except Exception as e:
+            print(f"Error applying retention: {e}")
+            traceback.print_exc()
+        finally:
+            self._load_hot_replica()
+            self.query_cache.invalidate()
+        return deleted
+
+    def reclaim_space(self, pages_per_step: int = 1000) -> int:
+        """Return free pages to the filesystem with incremental vacuum steps"""
+        freed = 0
+        try:
+            with self.get_connection() as conn:
+                schemas = ["main"]
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    print("auto_vacuum is not INCREMENTAL; run vacuum_database() once")
+                    schemas = []
+                open_partitions = [
+                    partition
+                    for partition in self._list_partitions(conn)
+                    if not partition[2]
+                ]
+
+            for schema in schemas:
+                freed += self._incremental_vacuum(schema, pages_per_step)
+            for partition in open_partitions:
+                with self.get_connection() as conn:
+                    with self._attached_partition(conn, partition) as table:
+                        schema = table.split(".")[0]
+                        if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] == 2:
+                            freed += self._incremental_vacuum(schema, pages_per_step)
+        except Exception as e:
+            print(f"Error reclaiming space: {e}")
+            traceback.print_exc()
+        return freed
+
+    def _incremental_vacuum(
+        self, schema: str, pages_per_step: int, max_pages: Optional[int] = None
+    ) -> int:
+        """
+        Run incremental_vacuum steps on one schema until its freelist is empty
+        (or max_pages were freed); the writer is released between steps
+        """
+        freed = 0
+        while max_pages is None or freed < max_pages:
+            step = pages_per_step
+            if max_pages is not None:
+                step = min(step, max_pages - freed)
+            with self.get_connection() as conn:
+                free_pages = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+                if free_pages == 0:
+                    return freed
+                # execute() stops after the first page; executescript steps
+                # the pragma to completion
+                conn.executescript(f"PRAGMA {schema}.incremental_vacuum({int(step)})")
+                step_freed = (
+                    free_pages
+                    - conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+                )
+            if step_freed <= 0:
+                return freed
+            freed += step_freed
+        return freed
+
+    def get_maintenance_status(self) -> Dict:
+        """Free pages, WAL size and vacuum mode of the main database file"""
+        try:
+            with self.get_connection() as conn:
+                status = {
+                    "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+                    "page_count": conn.execute("PRAGMA page_count").fetchone()[0],
+                    "freelist_count": conn.execute("PRAGMA freelist_count").fetchone()[0],
+                    "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+                }
+            wal_path = self.db_path + "-wal"
+            status["wal_bytes"] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+            return status
+        except Exception as e:
+            print(f"Error reading maintenance status: {e}")
+            traceback.print_exc()
+            return {}
+
+    def run_maintenance(
+        self,
+        max_vacuum_pages: int = 10000,
+        free_page_threshold: Optional[int] = None,
+        wal_bytes_threshold: Optional[int] = None,
+    ) -> Dict:
+        """
+        One bounded maintenance pass; returns what was done
+
+        Frees at most max_vacuum_pages pages once the freelist passes
+        free_page_threshold, checkpoints the WAL (truncating it once it
+        passes wal_bytes_threshold), seals old partitions and runs
+        PRAGMA optimize at most every MAINTENANCE_OPTIMIZE_SECONDS.
+        """
+        if free_page_threshold is None:
+            free_page_threshold = self.MAINTENANCE_FREE_PAGES
+        if wal_bytes_threshold is None:
+            wal_bytes_threshold = self.MAINTENANCE_WAL_BYTES
+        done = {}
+        try:
+            status = self.get_maintenance_status()
+            if (
+                status.get("auto_vacuum") == 2
+                and status.get("freelist_count", 0) >= free_page_threshold
+            ):
+                done["vacuumed_pages"] = self._incremental_vacuum(
+                    "main", 1000, max_vacuum_pages
+                )
+
+            if status.get("wal_bytes", 0):
+                with self.get_connection() as conn:
+                    busy, log_frames, checkpointed = conn.execute(
+                        "PRAGMA wal_checkpoint(PASSIVE)"
+                    ).fetchone()
+                    done["checkpointed_frames"] = checkpointed
+                    if (
+                        status["wal_bytes"] >= wal_bytes_threshold
+                        and not busy
+                        and checkpointed == log_frames
+                    ):
+                        # Every frame is in the database; shrink the file,
+                        # giving up quickly if a reader still needs it
+                        conn.execute("PRAGMA busy_timeout=100")
+                        try:
+                            truncated = conn.execute(
+                                "PRAGMA wal_checkpoint(TRUNCATE)"
+                            ).fetchone()
+                            done["wal_truncated"] = truncated[0] == 0
+                        finally:
+                            conn.execute("PRAGMA busy_timeout=30000")
+
+            if self.partition_by_month:
+                done["sealed_partitions"] = self.seal_old_partitions()
+
+            now = time.monotonic()
+            if (
+                self._last_optimize is None
+                or now - self._last_optimize >= self.MAINTENANCE_OPTIMIZE_SECONDS
+            ):
+                with self.get_connection() as conn:
+                    conn.execute("PRAGMA optimize")
+                self._last_optimize = now
+                done["optimized"] = True
+        except Exception as e:
+            print(f"Error running maintenance: {e}")
+            traceback.print_exc()
+        return done
+
+    def start_maintenance(self, interval_seconds: float = 60.0, idle_seconds: float = 30.0):
+        """
+        Run run_maintenance() in a background thread while the database is idle
+
+        A pass is skipped while imports are queued or one finished less than
+        idle_seconds ago. Stopped by stop_maintenance() or close().
+        """
+        with self._service_lock:
+            if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+                return
+            self._maintenance_stop.clear()
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop,
+                args=(interval_seconds, idle_seconds),
+                name="halog-maintenance",
+                daemon=True,
+            )
+            self._maintenance_thread.start()
+
+    def _maintenance_loop(self, interval_seconds: float, idle_seconds: float):
+        while not self._maintenance_stop.wait(interval_seconds):
+            if not self._ingest_queue.empty():
+                continue
+            if time.monotonic() - self._last_write < idle_seconds:
+                continue
+            self.run_maintenance()
+
+    def stop_maintenance(self):
+        """Stop the maintenance thread (waits for a pass in progress)"""
+        with self._service_lock:
+            thread, self._maintenance_thread = self._maintenance_thread, None
+        if thread is not None and thread.is_alive():
+            self._maintenance_stop.set()
+            thread.join()
+
+    def backup(
+        self, dest: str, pages_per_step: int = 1024, progress=None
+    ) -> Future:
+        """
+        Copy the database to dest with the SQLite online backup API
+
+        Runs in a background thread and returns a Future resolving to the
+        files written. Read snapshots of the main file and of every monthly
+        partition are opened together between two writes; the pages are then
+        copied pages_per_step at a time from those snapshots, so the copy is
+        consistent, imports keep committing meanwhile (WAL) and no step has
+        to start over. Partitions go to <dest stem>_partitions. Each file is
+        written under a temporary name and renamed when complete.
+        progress(filename, remaining_pages, total_pages) is called per step.
+        """
+        future = Future()
+        threading.Thread(
+            target=self._run_backup,
+            args=(dest, pages_per_step, progress, future),
+            name="halog-backup",
+            daemon=True,
+        ).start()
+        return future
+
+    def _open_snapshot(self, path: str) -> sqlite3.Connection:
+        """Read-only connection holding a read transaction on path"""
+        conn = sqlite3.connect(
+            Path(path).resolve().as_uri() + "?mode=ro",
+            uri=True,
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("BEGIN")
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        return conn
+
+    def _backup_file(self, source, dest: str, pages_per_step: int, progress):
+        """Copy one snapshot to dest through a temporary file"""
+        partial = dest + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        try:
+            target = sqlite3.connect(partial)
+            try:
+                name = os.path.basename(dest)
+                source.backup(
+                    target,
+                    pages=max(int(pages_per_step), 1),
+                    progress=(
+                        (lambda status, remaining, total: progress(name, remaining, total))
+                        if progress
+                        else None
+                    ),
+                )
+            finally:
+                target.close()
+            os.replace(partial, dest)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def _run_backup(self, dest: str, pages_per_step: int, progress, future: Future):
+        """Backup thread: snapshot every file, then copy them one by one"""
+        sources = []
+        try:
+            start_time = time.time()
+            partition_dir = os.path.splitext(dest)[0] + "_partitions"
+            # Writes hold the writer lock until they commit, so snapshots
+            # opened under it agree across the main file and the partitions
+            with self._writer_lock:
+                main = self._open_snapshot(self.db_path)
+                sources.append((main, dest))
+                if self._has_table(main, "partitions"):
+                    for (filename,) in main.execute(
+                        "SELECT filename FROM partitions ORDER BY month"
+                    ).fetchall():
+                        path = self._partition_path(filename)
+                        if os.path.exists(path):
+                            sources.append(
+                                (
+                                    self._open_snapshot(path),
+                                    os.path.join(partition_dir, filename),
+                                )
+                            )
+
+            if len(sources) > 1:
+                os.makedirs(partition_dir, exist_ok=True)
+            for source, target_path in sources:
+                self._backup_file(source, target_path, pages_per_step, progress)
+
+            print(
+                f"Backup of {len(sources)} database files to {dest} "
+                f"completed in {time.time() - start_time:.2f}s"
+            )
+            future.set_result([target_path for _, target_path in sources])
+        except Exception as e:
+            print(f"Error backing up database: {e}")
+            traceback.print_exc()
+            future.set_exception(e)
+        finally:
+            for source, _ in sources:
+                source.close()
+
     def vacuum_database(self):
         """Optimize database by running VACUUM"""
         try:
             # VACUUM requires its own connection
             with sqlite3.connect(self.db_path) as conn:
+                # Existing files switch to incremental auto-vacuum on this rebuild
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
                 conn.execute("VACUUM")
                 print("Database vacuumed successfully")
         except Exception as e:
@@ -492,7 +3963,14 @@ class DatabaseManager:
     def get_database_size(self) -> int:
         """Get database file size in bytes with error handling"""
         try:
-            return os.path.getsize(self.db_path)
+            size = os.path.getsize(self.db_path)
+            if os.path.isdir(self.partition_dir):
+                size += sum(
+                    entry.stat().st_size
+                    for entry in os.scandir(self.partition_dir)
+                    if entry.is_file()
+                )
+            return size
         except Exception as e:
             print(f"Error getting database size: {e}")
             return 0
@@ -509,8 +3987,11 @@ class DatabaseManager:
                 conn.execute("PRAGMA mmap_size=30000000")
 
                 # Analyze tables for query planner
-                conn.execute("ANALYZE water_logs")
+                conn.execute("ANALYZE readings")
+                conn.execute("ANALYZE serials")
+                conn.execute("ANALYZE parameters")
                 conn.execute("ANALYZE file_metadata")
+                conn.execute("ANALYZE fault_events")
 
                 print("Database optimized for reading")
         except Exception as e:
@@ -520,11 +4001,6 @@ class DatabaseManager:
     def __del__(self):
         """Cleanup database connections on object destruction"""
         try:
-            # Close all pooled connections
-            for thread_id, conn in self.connection_pool.items():
-                try:
-                    conn.close()
-                except:
-                    pass
+            self.close()
         except:
             pass
@@ -436,7 +436,29 @@ class HALogApp:
 
                 # FIFTH: Initialize database and components
                 try:
-                    self.db = DatabaseManager("halog_water.db")
+                    # The last 30 days, rollups and counters are kept in
+                    # memory for the tabs; retention stays off (keep all data)
+                    self.db = DatabaseManager(
+                        "halog_water.db",
+                        partition_by_month=True,
+                        columnar_mirror=True,
+                        hot_days=30,
+                    )
+                    # Existing readings are copied to the Parquet mirror once,
+                    # off the UI thread; reads use SQLite until it is complete
+                    if (
+                        self.db.columnar_cache is not None
+                        and not self.db.columnar_cache.is_complete()
+                    ):
+                        from worker_thread import DatabaseWorker
+
+                        self.columnar_worker = DatabaseWorker(
+                            self.db, "rebuild_columnar"
+                        )
+                        self.columnar_worker.db_finished.connect(
+                            lambda ok, message: print(message)
+                        )
+                        self.columnar_worker.start()
                     import pandas as pd
 
                     self.df = pd.DataFrame()
@@ -445,34 +467,31 @@ class HALogApp:
                     from unified_parser import UnifiedParser
                     self.fault_parser = UnifiedParser()
 
-                    # Load fault code databases from core data directory
-                    hal_fault_path = os.path.join(os.path.dirname(__file__), 'data', 'HALfault.txt')
-                    tb_fault_path = os.path.join(os.path.dirname(__file__), 'data', 'TBFault.txt')
+                    # Fault code catalogues live in the database (indexed by
+                    # code, FTS5 over descriptions); a file is only parsed
+                    # again when its content changes
+                    from database import file_content_hash
 
-                    # Load fault codes from both databases
-                    hal_loaded = self.fault_parser.load_fault_codes_from_uploaded_file(hal_fault_path)
-                    if hal_loaded:
-                        print("✓ HAL fault codes loaded successfully")
-
-                    # Load TB fault codes (append to existing)
-                    if os.path.exists(tb_fault_path):
+                    fault_files = [
+                        (os.path.join(os.path.dirname(__file__), 'data', 'HALfault.txt'), 'uploaded'),
+                        (os.path.join(os.path.dirname(__file__), 'data', 'TBFault.txt'), 'tb'),
+                    ]
+                    for fault_path, source in fault_files:
+                        if not os.path.exists(fault_path):
+                            continue
                         try:
-                            with open(tb_fault_path, 'r', encoding='utf-8') as file:
-                                for line_num, line in enumerate(file, 1):
-                                    line = line.strip()
-                                    if not line or line.startswith('#'):
-                                        continue
-                                    fault_info = self.fault_parser._parse_fault_code_line(line)
-                                    if fault_info:
-                                        code = fault_info['code']
-                                        self.fault_parser.fault_codes[code] = {
-                                            'description': fault_info['description'],
-                                            'source': 'tb',
-                                            'line_number': line_num
-                                        }
-                            print(f"✓ TB fault codes loaded successfully")
+                            digest = file_content_hash(fault_path)
+                            if self.db.is_fault_catalog_current(source, digest):
+                                continue
+                            fault_codes = self.fault_parser.parse_fault_code_file(fault_path, source)
+                            if fault_codes is not None:
+                                loaded = self.db.load_fault_code_catalog(
+                                    fault_codes, source=source, content_hash=digest
+                                )
+                                print(f"✓ {loaded} {source.upper()} fault codes stored in database")
                         except Exception as e:
-                            print(f"Warning: Could not load TB fault codes: {e}")
+                            print(f"Warning: Could not load fault codes from {fault_path}: {e}")
+                    self.fault_parser.use_fault_catalog(self.db)
 
                     self._initialize_fault_code_tab()
 
@@ -891,12 +910,36 @@ class HALogApp:
                     traceback.print_exc()
 
             def export_data(self):
-                """Export data functionality (placeholder)"""
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "Export Data",
-                    "Export functionality will be implemented in a future version.",
-                )
+                """Export all logs to CSV, streamed in chunks off the UI thread"""
+                try:
+                    if not hasattr(self, "db"):
+                        QtWidgets.QMessageBox.warning(self, "Error", "Database not initialized")
+                        return
+
+                    path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                        self, "Export Data", "halog_export.csv", "CSV Files (*.csv)"
+                    )
+                    if not path:
+                        return
+
+                    from worker_thread import DatabaseWorker
+
+                    self.export_worker = DatabaseWorker(self.db, "export_csv", path=path)
+                    self.export_worker.db_progress.connect(
+                        lambda percent, message: self.statusBar().showMessage(message)
+                    )
+                    self.export_worker.db_finished.connect(
+                        lambda ok, message: (
+                            QtWidgets.QMessageBox.information(self, "Export Data", message)
+                            if ok
+                            else QtWidgets.QMessageBox.critical(self, "Export Data", message)
+                        )
+                    )
+                    self.export_worker.start()
+                except Exception as e:
+                    QtWidgets.QMessageBox.critical(
+                        self, "Export Data", f"Export failed: {str(e)}"
+                    )
 
             def show_settings(self):
                 """Show settings dialog (placeholder)"""
@@ -915,9 +958,10 @@ class HALogApp:
                     stats = self.fault_parser.get_fault_code_statistics()
 
                     if hasattr(self.ui, 'lblTotalCodes'):
-                        # Calculate breakdown by source
-                        hal_codes = sum(1 for code_info in self.fault_parser.fault_codes.values() if code_info.get('source') == 'uploaded')
-                        tb_codes = sum(1 for code_info in self.fault_parser.fault_codes.values() if code_info.get('source') == 'tb')
+                        # Breakdown by source from the catalogue counts
+                        by_database = stats.get('by_database', {})
+                        hal_codes = by_database.get('HAL', 0)
+                        tb_codes = by_database.get('TB', 0)
                         self.ui.lblTotalCodes.setText(f"Total Codes: {stats['total_codes']} (HAL: {hal_codes}, TB: {tb_codes})")
 
                     if hasattr(self.ui, 'lblFaultTypes'):
@@ -1199,52 +1243,16 @@ class HALogApp:
                     all_params = list(self.df[param_column].unique())
                     print(f"🔍 Available parameters: {all_params[:10]}")
 
-                    # Enhanced mapping to match actual database format - UPDATED FOR COL PARAMETERS
-                    description_to_patterns = {
-                        # Water System - try multiple pattern matching approaches
-                        "Mag Flow": ["magnetronFlow", "magnetron", "mag", "flow"],
-                        "Flow Target": ["targetAndCirculatorFlow", "target", "circulator"],
-                        "Flow Chiller Water": ["cityWaterFlow", "city", "chiller", "water"],
-                        
-                        # Temperature - match COL temperature parameters
-                        "Temp Room": ["FanremoteTempStatistics", "remote", "room", "ambient"],
-                        "Temp Magnetron": ["magnetronTemp", "magnetron", "temp"],
-                        "Temp PDU": ["pduTemp", "pdu"],
-                        "Temp COL Board": ["colBoardTemp", "col", "board"],
-                        "Temp Water Tank": ["waterTankTemp", "tank"],
-                        "Temp MLC Bank A": ["mlc", "bank", "a", "temp"],
-                        "Temp MLC Bank B": ["mlc", "bank", "b", "temp"],
-                        
-                        # Humidity
-                        "Room Humidity": ["FanhumidityStatistics", "humidity", "humid"],
-                        
-                        # Fan Speeds
-                        "Speed FAN 1": ["fanSpeed1", "fan", "speed", "1"],
-                        "Speed FAN 2": ["fanSpeed2", "fan", "speed", "2"],
-                        "Speed FAN 3": ["fanSpeed3", "fan", "speed", "3"],
-                        "Speed FAN 4": ["fanSpeed4", "fan", "speed", "4"],
-                        
-                        # Voltages - match COL voltage parameters
-                        "MLC Bank A 24V": ["BANKA", "bank", "a", "24v", "mlc"],
-                        "MLC Bank B 24V": ["BANKB", "bank", "b", "24v", "mlc"],
-                        "MLC Bank A 48V": ["BANKA", "bank", "a", "48v", "mlc"],
-                        "MLC Bank B 48V": ["BANKB", "bank", "b", "48v", "mlc"],
-                        "COL 48V": ["col", "48v"],
-                        "MLC Bank A 5V": ["bank", "a", "5v", "mlc"],
-                        "MLC Bank B 5V": ["bank", "b", "5v", "mlc"],
-                        "COL 24V Monitor": ["col", "24v", "mon"],
-                        "COL 5V Monitor": ["col", "5v", "mon"],
-                    }
+                    # Description -> parameter names shared with the parser
+                    # (data/parameter_mapping.json)
+                    from parameter_mapping import get_parameter_mapping
+                    compiled_mapping = get_parameter_mapping().current()
 
                     # Get all available parameters
                     all_params = self.df[param_column].unique()
                     print(f"🔍 Available parameters: {all_params[:10]}")
 
-                    # Find matching parameter by searching within the full parameter names
                     matching_params = []
-                    patterns = description_to_patterns.get(parameter_description, [parameter_description])
-
-                    print(f"🔍 Looking for patterns: {patterns}")
 
                     # SPECIAL HANDLING FOR COL PARAMETERS
                     # Since your data shows "COL" parameters, let's match them directly
@@ -1255,27 +1263,13 @@ class HALogApp:
                             matching_params.append(col_params[0])
                             print(f"✓ COL parameter matched: '{col_params[0]}' for '{parameter_description}'")
 
-                    # If no COL match found, continue with pattern matching
+                    # If no COL match found, match whole parameter names
                     if not matching_params:
-                        # Search for patterns within the full parameter names
-                        for pattern in patterns:
-                            for param in all_params:
-                                # Check if pattern exists anywhere in the parameter name
-                                if pattern in str(param):
-                                    matching_params.append(param)
-                                    print(f"✓ Pattern '{pattern}' matched parameter: '{param}'")
-                                    break  # Take first match for each pattern
-
-                        # If no exact matches found, try case-insensitive search
-                        if not matching_params:
-                            print(f"🔍 No exact matches found, trying case-insensitive search...")
-                            for pattern in patterns:
-                                pattern_lower = str(pattern).lower()
-                                for param in all_params:
-                                    if pattern_lower in str(param).lower():
-                                        matching_params.append(param)
-                                        print(f"✓ Case-insensitive match: '{param}' for pattern '{pattern}'")
-                                        break
+                        matching_params = compiled_mapping.parameters_for_description(
+                            parameter_description, all_params
+                        )
+                        for param in matching_params:
+                            print(f"✓ Parameter '{param}' matched '{parameter_description}'")
 
                         # If still no matches, try partial keyword matching
                         if not matching_params:
@@ -1308,8 +1302,28 @@ class HALogApp:
                     if matching_params:
                         # Use the first matching parameter
                         selected_param = matching_params[0]
-                        param_data = self.df[self.df[param_column] == selected_param].copy()
                         print(f"✓ Using parameter: '{selected_param}'")
+
+                        # Min/max/avg buckets aggregated in the database, so a
+                        # multi-year trend transfers only the plotted points;
+                        # one machine's readings, never several serials merged
+                        series = self.db.get_series(
+                            selected_param,
+                            serial_number=self._get_active_serial(),
+                            max_points=2000,
+                        )
+                        if not series.empty:
+                            print(f"✓ Retrieved {len(series)} buckets of {series.attrs['bucket_seconds']}s "
+                                  f"from {series.attrs['source']} for '{parameter_description}'")
+                            return pd.DataFrame({
+                                'datetime': series['datetime'],
+                                'avg': series['avg'],
+                                'parameter_name': parameter_description,
+                                'min_value': series['min'],
+                                'max_value': series['max'],
+                            })
+
+                        param_data = self.df[self.df[param_column] == selected_param].copy()
                     else:
                         print(f"⚠️ No data found for parameter '{parameter_description}'")
                         print(f"⚠️ Available parameters: {all_params}")
@@ -1400,6 +1414,9 @@ class HALogApp:
                             date_info = f" (Date A: {date_a})"
                         elif date_b:
                             date_info = f" (Date B: {date_b})"
+                        serial = self._get_active_serial()
+                        if serial:
+                            date_info += f" - daily averages, serial {serial}"
                         self.ui.lblLastMPCUpdate.setText(f"Last MPC Update: {update_time}{date_info}")
 
                     # Update the MPC table with comparison data
@@ -1481,8 +1498,13 @@ class HALogApp:
                     import pandas as pd
                     results = []
 
+                    # One machine is compared at a time
+                    serial = self._get_active_serial()
+
                     for param in mpc_params:
                         param_data = self.df[self.df['param'] == param]
+                        if serial is not None:
+                            param_data = param_data[param_data['serial'].astype(str) == serial]
 
                         if param_data.empty:
                             continue
@@ -1497,17 +1519,15 @@ class HALogApp:
                         value_b = "NA"
                         status = "NA"
 
-                        # Get data for Date A
                         if date_a:
-                            date_a_data = param_data[param_data['datetime'].dt.date == pd.to_datetime(date_a).date()]
-                            if not date_a_data.empty:
-                                value_a = f"{date_a_data['average'].iloc[-1]:.2f}"
+                            daily = self._get_mpc_daily_average(param, serial, param_data, date_a)
+                            if daily is not None:
+                                value_a = f"{daily:.2f}"
 
-                        # Get data for Date B  
                         if date_b:
-                            date_b_data = param_data[param_data['datetime'].dt.date == pd.to_datetime(date_b).date()]
-                            if not date_b_data.empty:
-                                value_b = f"{date_b_data['average'].iloc[-1]:.2f}"
+                            daily = self._get_mpc_daily_average(param, serial, param_data, date_b)
+                            if daily is not None:
+                                value_b = f"{daily:.2f}"
 
                         # Determine status based on comparison
                         if value_a != "NA" and value_b != "NA":
@@ -1539,6 +1559,35 @@ class HALogApp:
                     traceback.print_exc()
                     return None
 
+            def _get_active_serial(self):
+                """Serial selected in the trend controls, else the latest imported one"""
+                try:
+                    if hasattr(self.ui, 'comboTrendSerial'):
+                        selected = self.ui.comboTrendSerial.currentText()
+                        if selected and selected != "All":
+                            return selected
+                    return self.db.get_summary_statistics().get("latest_serial")
+                except Exception as e:
+                    print(f"Error getting active serial: {e}")
+                    return None
+
+            def _get_mpc_daily_average(self, param, serial, param_data, date):
+                """Average of one serial's readings on a date (daily rollup, else raw rows)"""
+                import pandas as pd
+
+                day = pd.to_datetime(date).normalize()
+                daily = self.db.get_parameter_trend(
+                    param, serial_number=serial, start=day, end=day, resolution_seconds=86400
+                )
+                if not daily.empty and pd.notna(daily['avg'].iloc[0]):
+                    return float(daily['avg'].iloc[0])
+
+                # Legacy rows are not rolled up; average what self.df holds
+                day_rows = param_data[param_data['datetime'].dt.normalize() == day]
+                if day_rows.empty or day_rows['avg'].isna().all():
+                    return None
+                return float(day_rows['avg'].mean())
+
             def _populate_mpc_comparison_table(self, mpc_data, date_a, date_b):
                 """Populate MPC table with comparison data"""
                 try:
@@ -1922,6 +1971,26 @@ class HALogApp:
                 try:
                     if hasattr(self, "db"):
                         self.db.optimize_for_reading()
+
+                        # Expire old data in chunked transactions off the UI
+                        # thread, only when a retention policy was configured
+                        if any(
+                            days is not None
+                            for days in self.db.retention_days.values()
+                        ):
+                            from worker_thread import DatabaseWorker
+
+                            self.retention_worker = DatabaseWorker(
+                                self.db, "retention"
+                            )
+                            self.retention_worker.db_finished.connect(
+                                lambda ok, message: print(message)
+                            )
+                            self.retention_worker.start()
+
+                        # Incremental vacuum, WAL checkpoints and PRAGMA
+                        # optimize run in the background while imports are idle
+                        self.db.start_maintenance()
                 except Exception as e:
                     print(f"Database optimization error: {e}")
 
@@ -2017,45 +2086,27 @@ class HALogApp:
 
                     print(f"📊 Dashboard loading with {len(self.df)} records")
 
-                    if not self.df.empty:
-                        # Find correct column names dynamically
-                        serial_col = None
-                        param_col = None
-                        for col in self.df.columns:
-                            if col in ['serial', 'serial_number']:
-                                serial_col = col
-                            elif col in ['param', 'parameter_type', 'parameter_name']:
-                                param_col = col
-
-                        latest = self.df.sort_values("datetime").iloc[-1]
-                        
-                        # Display serial using correct column
-                        if serial_col:
-                            self.ui.lblSerial.setText(f"Serial: {latest[serial_col]}")
-                        else:
-                            self.ui.lblSerial.setText("Serial: Unknown")
-                        
-                        self.ui.lblDate.setText(f"Date: {latest['datetime'].date()}")
-
-                        dt_min = self.df["datetime"].min()
-                        dt_max = self.df["datetime"].max()
-                        duration = dt_max - dt_min
+                    # Headline figures come from the database's summary
+                    # counters instead of being recomputed from self.df
+                    summary = self.db.get_summary_statistics()
 
-                        self.ui.lblDuration.setText(f"Duration: {duration}")
+                    if summary.get("total_readings"):
+                        first, last = (
+                            pd.Timestamp(value) for value in summary["date_range"]
+                        )
+                        self.ui.lblSerial.setText(
+                            f"Serial: {summary['latest_serial'] or 'Unknown'}"
+                        )
+                        self.ui.lblDate.setText(f"Date: {last.date()}")
+                        self.ui.lblDuration.setText(f"Duration: {last - first}")
                         self.ui.lblRecordCount.setText(
-                            f"Total Records: {len(self.df):,}"
+                            f"Total Records: {summary['total_readings']:,}"
+                        )
+                        self.ui.lblParameterCount.setText(
+                            f"Parameters: {summary['unique_parameters']}"
                         )
 
-                        # Count unique parameters using correct column
-                        if param_col:
-                            unique_params = self.df[param_col].nunique()
-                            self.ui.lblParameterCount.setText(
-                                f"Parameters: {unique_params}"
-                            )
-                        else:
-                            self.ui.lblParameterCount.setText("Parameters: 0")
-
-                        print(f"✓ Dashboard updated - Records: {len(self.df):,}, Parameters: {unique_params if param_col else 0}")
+                        print(f"✓ Dashboard updated - Records: {summary['total_readings']:,}, Parameters: {summary['unique_parameters']}")
                     else:
                         self.ui.lblSerial.setText("Serial: No data imported")
                         self.ui.lblDate.setText("Date: No data imported")
@@ -2752,6 +2803,10 @@ class HALogApp:
                     for file_path in file_paths:
                         print(f"  - {file_path}")
 
+                    from database import file_content_hash
+
+                    skipped_files = []
+
                     # Process each file
                     for file_path in file_paths:
                         file_size = os.path.getsize(file_path)
@@ -2763,20 +2818,37 @@ class HALogApp:
                         if 'shortdata' in filename:
                             print(f"⚠️ Treating {os.path.basename(file_path)} as sample data only (not permanently stored)")
                             self._process_sample_shortdata(file_path)
+                            continue
+
+                        # Identical content was imported before - nothing new to store
+                        content_hash = file_content_hash(file_path)
+                        if self.db.is_file_imported(content_hash):
+                            print(f"⏭️ Skipping {os.path.basename(file_path)}: already imported")
+                            skipped_files.append(os.path.basename(file_path))
+                            continue
+
                         # Check if it's a fault file that should be filtered and stored permanently
-                        elif 'tbfault' in filename or 'halfault' in filename:
+                        if 'tbfault' in filename or 'halfault' in filename:
                             print(f"🔍 Processing fault file with filtering: {os.path.basename(file_path)}")
                             if file_size < 5 * 1024 * 1024:
-                                self._import_small_file_filtered(file_path)
+                                self._import_small_file_filtered(file_path, content_hash)
                             else:
-                                self._import_large_file_filtered(file_path, file_size)
+                                self._import_large_file_filtered(file_path, file_size, content_hash)
                         else:
                             # Regular machine log file - import all data for MPC, trend, analysis
                             print(f"📊 Processing machine log file: {os.path.basename(file_path)}")
                             if file_size < 5 * 1024 * 1024:
-                                self._import_small_file(file_path)
+                                self._import_small_file(file_path, content_hash)
                             else:
-                                self._import_large_file(file_path, file_size)
+                                self._import_large_file(file_path, file_size, content_hash)
+
+                    if skipped_files:
+                        QtWidgets.QMessageBox.information(
+                            self,
+                            "Already Imported",
+                            "These files were imported before and were skipped:\n\n"
+                            + "\n".join(skipped_files),
+                        )
 
                 except Exception as e:
                     print(f"Error in import_log_file: {e}")
@@ -2785,7 +2857,7 @@ class HALogApp:
                         self, "Import Error", f"Error importing log file: {str(e)}"
                     )
 
-            def _import_small_file(self, file_path):
+            def _import_small_file(self, file_path, content_hash=None):
                 """Import small log file with professional progress"""
                 try:
                     from progress_dialog import ProgressDialog
@@ -2803,12 +2875,18 @@ class HALogApp:
                     self.progress_dialog.set_phase("processing", 30)
                     QtWidgets.QApplication.processEvents()
 
-                    df = parser.parse_linac_file(file_path)
+                    def store_faults(events, intervals):
+                        self.db.insert_fault_events(events)
+                        self.db.insert_fault_intervals(intervals)
+
+                    df = parser.parse_linac_file(file_path, fault_callback=store_faults)
 
                     self.progress_dialog.set_phase("processing", 70)
                     QtWidgets.QApplication.processEvents()
 
-                    records_inserted = self.db.insert_data_batch(df)
+                    # Raises on a failed insert, so the file's hash is only
+                    # recorded once its readings are stored
+                    records_inserted = self.db.submit_data_batch(df).result()
 
                     self.progress_dialog.set_phase("finalizing", 90)
                     QtWidgets.QApplication.processEvents()
@@ -2821,6 +2899,7 @@ class HALogApp:
                         file_size=os.path.getsize(file_path),
                         records_imported=records_inserted,
                         parsing_stats=parsing_stats_json,
+                        content_hash=content_hash,
                     )
 
                     self.progress_dialog.setValue(100)
@@ -2863,7 +2942,7 @@ class HALogApp:
                         self, "Import Error", f"Error importing log file: {str(e)}"
                     )
 
-            def _import_large_file(self, file_path, file_size):
+            def _import_large_file(self, file_path, file_size, content_hash=None):
                 """Import large log file with enhanced progress phases"""
                 try:
                     from progress_dialog import ProgressDialog
@@ -2880,7 +2959,9 @@ class HALogApp:
 
                     from worker_thread import FileProcessingWorker
 
-                    self.worker = FileProcessingWorker(file_path, file_size, self.db)
+                    self.worker = FileProcessingWorker(
+                        file_path, file_size, self.db, content_hash=content_hash
+                    )
                     self.worker.chunk_size = 5000
 
                     # Enhanced progress handling with phases
@@ -3004,7 +3085,7 @@ class HALogApp:
                         f"Error processing shortdata file: {str(e)}"
                     )
 
-            def _import_small_file_filtered(self, file_path):
+            def _import_small_file_filtered(self, file_path, content_hash=None):
                 """Import small log file with TB/HALfault filtering"""
                 try:
                     from progress_dialog import ProgressDialog
@@ -3047,7 +3128,7 @@ class HALogApp:
                         QtWidgets.QApplication.processEvents()
 
                         # Insert only the filtered data
-                        records_inserted = self.db.insert_data_batch(df)
+                        records_inserted = self.db.submit_data_batch(df).result()
 
                         progress_dialog.setValue(90)
                         QtWidgets.QApplication.processEvents()
@@ -3064,6 +3145,7 @@ class HALogApp:
                             file_size=len(''.join(filtered_lines)),
                             records_imported=records_inserted,
                             parsing_stats=parsing_stats_json,
+                            content_hash=content_hash,
                         )
 
                         progress_dialog.setValue(100)
@@ -3095,7 +3177,7 @@ class HALogApp:
                     )
                     traceback.print_exc()
 
-            def _import_large_file_filtered(self, file_path, file_size):
+            def _import_large_file_filtered(self, file_path, file_size, content_hash=None):
                 """Import large log file with TB/HALfault filtering"""
                 try:
                     from progress_dialog import ProgressDialog
@@ -3154,7 +3236,7 @@ class HALogApp:
                         progress_dialog.setValue(85)
                         QtWidgets.QApplication.processEvents()
 
-                        records_inserted = self.db.insert_data_batch(df)
+                        records_inserted = self.db.submit_data_batch(df).result()
 
                         # Clean up
                         os.unlink(temp_path)
@@ -3168,6 +3250,7 @@ class HALogApp:
                             file_size=len(''.join(filtered_lines)),
                             records_imported=records_inserted,
                             parsing_stats=parsing_stats_json,
+                            content_hash=content_hash,
                         )
 
                         progress_dialog.setValue(100)
@@ -3322,8 +3405,10 @@ class HALogApp:
                         self.memory_timer.stop()
 
                     if hasattr(self, "db"):
+                        # Space is reclaimed by the maintenance thread, so
+                        # closing only finishes queued imports
                         try:
-                            self.db.vacuum_database()
+                            self.db.close()
                         except:
                             pass
 
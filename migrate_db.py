@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Legacy Migration - Gobioeng HALog
+Moves readings still stored in the old one-row-per-statistic layout
+(water_logs_legacy) into the readings table: epoch timestamps, serial and
+parameter dimensions, duplicates dropped. Each chunk is committed with its
+checkpoint, so the database stays readable throughout and an interrupted run
+continues where it stopped when started again.
+
+Usage: python migrate_db.py [DATABASE] [--chunk-rows N] [--max-chunks N] [--status]
+"""
+
+import argparse
+import time
+
+from database import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate legacy water_logs rows into readings")
+    parser.add_argument("database", nargs="?", default="halog_water.db", help="database file")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="legacy rows per committed chunk")
+    parser.add_argument("--max-chunks", type=int, help="stop after this many chunks (resume later)")
+    parser.add_argument(
+        "--no-partitions",
+        action="store_true",
+        help="store readings in the main file (the application writes monthly partitions)",
+    )
+    parser.add_argument("--status", action="store_true", help="only report progress")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.database, partition_by_month=not args.no_partitions)
+    try:
+        status = db.get_legacy_migration_status()
+        if args.status or status["complete"]:
+            print(
+                f"{status['rows']:,} legacy rows migrated in {status['chunks']} chunks, "
+                f"{status['remaining_rows']:,} remaining"
+                + (" (complete)" if status["complete"] else "")
+            )
+            return
+
+        total = status["rows"] + status["remaining_rows"]
+        start = time.perf_counter()
+
+        def report(progress):
+            done = progress["rows"]
+            rate = (done - status["rows"]) / max(time.perf_counter() - start, 1e-9)
+            print(
+                f"  chunk {progress['chunks']}: {done:,}/{total:,} legacy rows "
+                f"({100.0 * done / max(total, 1):.1f}%), {rate:,.0f} rows/sec"
+            )
+
+        print(f"Migrating {status['remaining_rows']:,} legacy rows from {args.database}")
+        result = db.migrate_legacy_readings(
+            chunk_rows=args.chunk_rows, max_chunks=args.max_chunks, progress_callback=report
+        )
+        if not result:
+            print("Migration stopped by an error; run again to resume")
+        elif result["complete"]:
+            print(f"Done: {result['readings']:,} readings from {result['rows']:,} legacy rows")
+        else:
+            print(f"Paused with {result['remaining_rows']:,} legacy rows remaining; run again to resume")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Parameter Mapping - Gobioeng HALog
+Loads the shared parameter mapping file (data/parameter_mapping.json) and
+compiles it into the lookup structures used by the parser, the analyzer
+and the trend views. The file is re-read only when it changes on disk.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_MAPPING_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "parameter_mapping.json"
+)
+
+
+def normalize_parameter_key(name: str) -> str:
+    """Normalize a parameter name for lookups (case, spaces, colons, underscores)"""
+    return name.lower().replace(" ", "").replace(":", "").replace("_", "")
+
+
+class CompiledMapping:
+    """Read-only snapshot of the mapping file compiled for fast lookups"""
+
+    # Upper bound for memoized target-parameter decisions
+    MAX_CACHED_NAMES = 10000
+
+    def __init__(self, document: Dict):
+        self.parameter_mapping: Dict[str, Dict] = {}
+        self.pattern_to_unified: Dict[str, str] = {}
+
+        for unified_name, config in document.get("parameters", {}).items():
+            config = dict(config)
+            for range_key in ("expected_range", "critical_range"):
+                if range_key in config:
+                    config[range_key] = tuple(config[range_key])
+            self.parameter_mapping[unified_name] = config
+
+            for pattern in config.get("patterns", []):
+                self.pattern_to_unified[normalize_parameter_key(pattern)] = unified_name
+
+        self.target_keys = tuple(self.pattern_to_unified)
+        self.thresholds: Dict[str, Dict] = document.get("thresholds", {})
+
+        # Description -> exact parameter names: each mapped parameter's unified
+        # name and raw patterns, then names the parser does not map
+        self.description_patterns: Dict[str, list] = {}
+        for unified_name, config in self.parameter_mapping.items():
+            if config.get("description"):
+                self.description_patterns.setdefault(config["description"], []).extend(
+                    [unified_name] + list(config.get("patterns", []))
+                )
+        for description, names in document.get("description_patterns", {}).items():
+            self.description_patterns.setdefault(description, []).extend(names)
+        self._description_keys = {
+            description: {normalize_parameter_key(name) for name in names}
+            for description, names in self.description_patterns.items()
+        }
+        self._target_cache: Dict[str, bool] = {}
+
+    def is_target(self, param_name: str) -> bool:
+        """Check whether a raw parameter name belongs to a mapped trend parameter"""
+        key = normalize_parameter_key(param_name)
+        cached = self._target_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = key in self.pattern_to_unified or any(
+            pattern in key or key in pattern for pattern in self.target_keys
+        )
+        if len(self._target_cache) < self.MAX_CACHED_NAMES:
+            self._target_cache[key] = result
+        return result
+
+    def parameters_for_description(self, description: str, available) -> list:
+        """Names in available that are one of a description's parameters (whole names only)"""
+        keys = self._description_keys.get(
+            description, {normalize_parameter_key(description)}
+        )
+        return [
+            name for name in available if normalize_parameter_key(str(name)) in keys
+        ]
+
+
+class ParameterMapping:
+    """Hot-reloadable parameter mapping backed by a JSON file"""
+
+    def __init__(self, path: str = DEFAULT_MAPPING_PATH, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._last_check = 0.0
+        self._compiled = CompiledMapping({})
+        self.reload(force=True)
+
+    def current(self) -> CompiledMapping:
+        """Return the compiled mapping, recompiling first if the file changed"""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self.reload()
+        return self._compiled
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the mapping if the file changed; returns True when reloaded"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                if force:
+                    print(f"Warning: parameter mapping file not available: {e}")
+                return False
+
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if not force and signature == self._signature:
+                return False
+
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    document = json.load(f)
+                self._compiled = CompiledMapping(document)
+                self._signature = signature
+                return True
+            except Exception as e:
+                # Keep serving the previous mapping while the file is being edited
+                print(f"Error loading parameter mapping {self.path}: {e}")
+                self._signature = signature
+                return False
+
+
+_shared_mappings: Dict[str, ParameterMapping] = {}
+_shared_lock = threading.Lock()
+
+
+def get_parameter_mapping(path: Optional[str] = None) -> ParameterMapping:
+    """Get the process-wide mapping instance for a mapping file"""
+    path = os.path.abspath(path or DEFAULT_MAPPING_PATH)
+    with _shared_lock:
+        if path not in _shared_mappings:
+            _shared_mappings[path] = ParameterMapping(path)
+        return _shared_mappings[path]
@@ -86,6 +86,61 @@ class TestEnhancedTrendMapping(unittest.TestCase):
                 all_patterns.append(pattern)
 
 
+class TestParameterMappingReload(unittest.TestCase):
+    """Test the shared parameter mapping file and its hot reload"""
+
+    def test_mapping_file_hot_reload(self):
+        """Test that the mapping is recompiled only after the file changes"""
+        import json
+        import shutil
+        import tempfile
+        from parameter_mapping import ParameterMapping, DEFAULT_MAPPING_PATH
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "parameter_mapping.json")
+            shutil.copy(DEFAULT_MAPPING_PATH, path)
+            mapping = ParameterMapping(path, check_interval=0)
+            compiled = mapping.current()
+
+            self.assertIs(mapping.current(), compiled, "Unchanged file was recompiled")
+            self.assertTrue(compiled.is_target("magnetron flow"))
+            self.assertFalse(compiled.is_target("gantry speed"))
+
+            with open(path, "r", encoding="utf-8") as f:
+                document = json.load(f)
+            document["parameters"]["gantrySpeed"] = {
+                "patterns": ["gantry speed"],
+                "unit": "deg/s",
+                "description": "Gantry Speed",
+                "expected_range": [0, 6],
+                "critical_range": [0, 7],
+            }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+
+            reloaded = mapping.current()
+            self.assertIsNot(reloaded, compiled)
+            self.assertTrue(reloaded.is_target("gantry speed"))
+            self.assertEqual(reloaded.pattern_to_unified["gantryspeed"], "gantrySpeed")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+    def test_each_parameter_matches_one_description(self):
+        """Test that every shipped parameter is found under its own description only"""
+        from parameter_mapping import get_parameter_mapping
+
+        compiled = get_parameter_mapping().current()
+        for unified_name, config in compiled.parameter_mapping.items():
+            matches = [
+                description
+                for description in compiled.description_patterns
+                if compiled.parameters_for_description(description, [unified_name])
+            ]
+            self.assertEqual(matches, [config["description"]], unified_name)
+
 class TestUIStructure(unittest.TestCase):
     """Test UI structure and dropdown functionality"""
     
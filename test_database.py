@@ -0,0 +1,1339 @@
+#!/usr/bin/env python3
+"""
+Database and log extraction tests for HALog
+Uses temporary SQLite files so the application database is never touched
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+import columnar_cache
+from columnar_cache import PYARROW_AVAILABLE
+from database import DatabaseManager, file_content_hash
+from unified_parser import UnifiedParser
+
+
+SAMPLE_LOG_LINES = [
+    "2024-08-01\t10:00:00\tTB\tSN# 001\tmagnetronFlow: count=60, max=12.1, min=10.8, avg=11.5",
+    "2024-08-01\t10:00:05\tTB\tSN# 001\tInterlock 2000 asserted",
+    "2024-08-01\t10:00:10\tTB\tSN# 001\tFanhumidityStatistics: count=60, max=46.2, min=44.8, avg=45.5",
+    "2024-08-01\t10:01:05\tTB\tSN# 001\tInterlock 2000 cleared",
+    "2024-08-01\t10:02:00\tTB\tSN# 002\tFault 400027 occurred",
+    "2024-08-01\t10:03:00\tTB\tSN# 001\tInterlock 2000 asserted",
+]
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base class creating a throwaway database per test"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "halog_test.db")
+        self.db = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        del self.db
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def readings(self, rows):
+        """Parser-shaped frame from (datetime, serial, parameter, count, min, max, avg) rows"""
+        return pd.DataFrame(
+            rows,
+            columns=["datetime", "serial_number", "parameter_type", "count", "min_value", "max_value", "avg_value"],
+        ).assign(datetime=lambda df: pd.to_datetime(df["datetime"]))
+
+    def write_log(self, lines, name="machine.log"):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+
+class TestFaultEvents(DatabaseTestCase):
+    """Test fault/interlock event extraction and queries"""
+
+    def test_parser_extracts_fault_events(self):
+        parser = UnifiedParser()
+        parser.parse_linac_file(self.write_log(SAMPLE_LOG_LINES))
+        events = parser.get_fault_events()
+
+        self.assertEqual(len(events), 4)
+        self.assertEqual(list(events["state"]), ["assert", "clear", "assert", "assert"])
+        self.assertEqual(events.iloc[2]["fault_code"], "400027")
+        self.assertEqual(events.iloc[2]["serial_number"], "002")
+
+    def test_fault_frequency_joins_catalog(self):
+        parser = UnifiedParser()
+        parser.parse_linac_file(self.write_log(SAMPLE_LOG_LINES))
+        self.assertEqual(self.db.insert_fault_events(parser.get_fault_events()), 4)
+        self.db.load_fault_code_catalog(
+            {
+                "2000": {"description": "BGM subsystem has detected an error.", "source": "uploaded"},
+                "400027": {"description": "COL: network socket error", "source": "tb"},
+            }
+        )
+
+        freq = self.db.get_fault_frequency()
+        self.assertEqual(list(freq["fault_code"]), ["2000", "400027"])
+        self.assertEqual(list(freq["occurrences"]), [2, 1])
+        self.assertEqual(list(freq["database"]), ["HAL", "TB"])
+
+        timeline = self.db.get_fault_timeline(fault_code="2000", serial_number="001")
+        self.assertEqual(len(timeline), 3)
+        self.assertTrue(timeline["datetime"].is_monotonic_increasing)
+
+    def test_interval_pairing_and_downtime(self):
+        parser = UnifiedParser()
+        parser.parse_linac_file(self.write_log(SAMPLE_LOG_LINES))
+        intervals = parser.get_fault_intervals()
+
+        closed = intervals.dropna(subset=["end_time"])
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(closed.iloc[0]["duration_seconds"], 60.0)
+        # Second 2000 assert and the 400027 occurrence are still open
+        self.assertEqual(intervals["end_time"].isna().sum(), 2)
+        self.assertEqual(parser.fault_tracker.open_faults, {})
+
+        self.db.insert_fault_intervals(intervals)
+        stats = self.db.get_fault_duration_statistics().set_index("fault_code")
+        self.assertEqual(stats.loc["2000", "occurrences"], 2)
+        self.assertEqual(stats.loc["2000", "total_downtime_seconds"], 60.0)
+        # Starts at 10:00:05 and 10:03:00
+        self.assertAlmostEqual(stats.loc["2000", "mtbf_hours"], 175 / 3600.0, places=4)
+
+    def test_clear_in_later_file_closes_open_interval(self):
+        first = UnifiedParser()
+        first.parse_linac_file(self.write_log(SAMPLE_LOG_LINES, "first.log"))
+        self.db.insert_fault_intervals(first.get_fault_intervals())
+
+        second = UnifiedParser()
+        second.parse_linac_file(
+            self.write_log(["2024-08-01\t10:05:00\tTB\tSN# 001\tInterlock 2000 cleared"], "second.log")
+        )
+        self.db.insert_fault_intervals(second.get_fault_intervals())
+
+        stats = self.db.get_fault_duration_statistics(serial_number="001")
+        row = stats[stats["fault_code"] == "2000"].iloc[0]
+        self.assertEqual(row["open_intervals"], 0)
+        self.assertEqual(row["total_downtime_seconds"], 60.0 + 120.0)
+
+
+    def test_faults_are_handed_over_per_buffer(self):
+        handed = []
+        parser = UnifiedParser()
+        parser.parse_linac_file(
+            self.write_log(SAMPLE_LOG_LINES),
+            buffer_size=64,
+            fault_callback=lambda events, intervals: handed.append((events, intervals)),
+        )
+        self.assertGreater(len(handed), 2)
+        self.assertEqual((parser.fault_events, parser.fault_intervals), ([], []))
+        self.assertEqual(parser.fault_tracker.open_faults, {})
+
+        events = pd.concat([events for events, _ in handed], ignore_index=True)
+        intervals = pd.concat([intervals for _, intervals in handed], ignore_index=True)
+        self.assertEqual(list(events["state"]), ["assert", "clear", "assert", "assert"])
+        self.assertEqual(len(intervals), 3)
+        self.assertEqual(intervals["end_time"].isna().sum(), 2)
+
+    def test_overlapping_logs_store_each_fault_once(self):
+        first = UnifiedParser()
+        first.parse_linac_file(self.write_log(SAMPLE_LOG_LINES[:2], "first.log"))
+        self.assertEqual(self.db.insert_fault_events(first.get_fault_events()), 1)
+        self.db.insert_fault_intervals(first.get_fault_intervals())
+
+        # The second log repeats the assert and also contains its clear
+        for _ in range(2):
+            second = UnifiedParser()
+            second.parse_linac_file(self.write_log(SAMPLE_LOG_LINES, "second.log"))
+            self.db.insert_fault_events(second.get_fault_events())
+            self.db.insert_fault_intervals(second.get_fault_intervals())
+
+        self.assertEqual(len(self.db.get_fault_timeline()), 4)
+        stats = self.db.get_fault_duration_statistics().set_index("fault_code")
+        self.assertEqual(stats.loc["2000", "occurrences"], 2)
+        self.assertEqual(stats.loc["2000", "open_intervals"], 1)
+        self.assertEqual(stats.loc["2000", "total_downtime_seconds"], 60.0)
+        self.assertEqual(stats.loc["400027", "occurrences"], 1)
+
+    def test_duplicate_faults_of_older_databases_are_removed(self):
+        with self.db.get_connection() as conn:
+            conn.execute("DROP INDEX idx_fault_event_key")
+            conn.execute("DROP INDEX idx_interval_key")
+            conn.execute("PRAGMA user_version = 7")
+            for _ in range(2):
+                conn.execute(
+                    "INSERT INTO fault_events (datetime, serial_number, fault_code, state) "
+                    "VALUES ('2024-08-01 10:00:05', '001', '2000', 'assert')"
+                )
+            for end_time in (None, "2024-08-01 10:01:05", None):
+                conn.execute(
+                    "INSERT INTO fault_intervals (serial_number, fault_code, start_time, end_time) "
+                    "VALUES ('001', '2000', '2024-08-01 10:00:05', ?)",
+                    (end_time,),
+                )
+        self.db.close()
+
+        self.db = DatabaseManager(self.db_path)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM fault_events").fetchone()[0], 1)
+            self.assertEqual(
+                conn.execute("SELECT end_time FROM fault_intervals").fetchall(),
+                [("2024-08-01 10:01:05",)],
+            )
+
+class TestFaultCodeCatalog(DatabaseTestCase):
+    """Test the fault code catalogue stored in the database"""
+
+    def write_catalog(self, name, lines):
+        return self.write_log(["ID\tDescription\tType"] + lines, name)
+
+    def test_lookup_and_ranked_search(self):
+        parser = UnifiedParser()
+        hal = self.write_catalog("HALfault.txt", [
+            "2000\tBGM subsystem has detected an error.\tInterlock",
+            "2001\tValidity of configuration has not been confirmed.\tInterlock",
+        ])
+        tb = self.write_catalog("TBFault.txt", [
+            "2000\tCOL: configuration error in collimator.\tFault",
+            "400027\tCOL: Software was not able to create network socket.\tFault",
+        ])
+        for path, source in ((hal, "uploaded"), (tb, "tb")):
+            digest = file_content_hash(path)
+            self.assertFalse(self.db.is_fault_catalog_current(source, digest))
+            codes = parser.parse_fault_code_file(path, source)
+            self.assertEqual(self.db.load_fault_code_catalog(codes, source=source, content_hash=digest), 2)
+            self.assertTrue(self.db.is_fault_catalog_current(source, digest))
+
+        parser.use_fault_catalog(self.db)
+        result = parser.search_fault_code("2000")
+        self.assertEqual(
+            (result["found"], result["database"], result["type"], result["description"]),
+            (True, "HAL", "Interlock", "BGM subsystem has detected an error."),
+        )
+        self.assertEqual(parser.search_fault_code("400027")["database"], "TB")
+        self.assertFalse(parser.search_fault_code("999999")["found"])
+        self.assertEqual(
+            parser.get_fault_descriptions_by_database("2000")["tb_description"],
+            "COL: configuration error in collimator.",
+        )
+
+        # Every word must match, as a prefix; punctuation is not FTS syntax
+        matches = parser.search_description("config")
+        self.assertEqual({(code, info["database"]) for code, info in matches}, {("2001", "HAL"), ("2000", "TB")})
+        self.assertEqual([code for code, _ in parser.search_description('COL: "socket')], ["400027"])
+        self.assertEqual(parser.get_fault_code_statistics()["by_database"], {"HAL": 2, "TB": 2})
+
+        # Reloading a source replaces its codes
+        self.db.load_fault_code_catalog({"2002": {"description": "Sync pulse missing", "type": "Interlock"}}, source="uploaded")
+        self.assertFalse(parser.search_fault_code("2001")["found"])
+        self.assertEqual([code for code, _ in parser.search_description("sync")], ["2002"])
+
+
+class TestBufferedExtraction(DatabaseTestCase):
+    """Test finditer extraction over newline-aligned buffers"""
+
+    def test_small_buffers_match_single_buffer(self):
+        path = self.write_log(SAMPLE_LOG_LINES * 20)
+
+        whole = UnifiedParser()
+        df_whole = whole.parse_linac_file(path)
+        split = UnifiedParser()
+        df_split = split.parse_linac_file(path, buffer_size=64)
+
+        self.assertTrue(df_whole.equals(df_split))
+        self.assertEqual(whole.fault_events, split.fault_events)
+        self.assertEqual(split.parsing_stats["lines_processed"], len(SAMPLE_LOG_LINES) * 20)
+
+        # A last line without a newline still counts
+        unterminated = os.path.join(self.temp_dir, "unterminated.log")
+        with open(unterminated, "w", encoding="utf-8") as f:
+            f.write("\n".join(SAMPLE_LOG_LINES))
+        for buffer_size in (64, 8 * 1024 * 1024):
+            parser = UnifiedParser()
+            parser.parse_linac_file(unterminated, buffer_size=buffer_size)
+            self.assertEqual(parser.parsing_stats["lines_processed"], len(SAMPLE_LOG_LINES))
+
+    def test_line_numbers_follow_file_lines(self):
+        lines = ["2024-08-01\t09:59:00\tTB\tSN# 001\tsystem idle"] * 7 + SAMPLE_LOG_LINES
+        parser = UnifiedParser()
+        parser.parse_linac_file(self.write_log(lines), buffer_size=100)
+
+        for event in parser.fault_events:
+            self.assertIn(event["fault_code"], lines[event["line_number"]])
+
+    def test_empty_file(self):
+        parser = UnifiedParser()
+        self.assertTrue(parser.parse_linac_file(self.write_log([])).empty)
+
+
+class TestReadingsStorage(DatabaseTestCase):
+    """Test the wide readings layout and the water_logs compatibility view"""
+
+    def parse_sample(self):
+        parser = UnifiedParser()
+        return parser.parse_linac_file(self.write_log(SAMPLE_LOG_LINES))
+
+    def test_one_row_per_reading(self):
+        df = self.parse_sample()
+        self.assertEqual(len(df), 6)
+        self.assertEqual(self.db.insert_data_batch(df), 2)
+
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0], 2)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM serials").fetchone()[0], 1)
+            # The view still exposes one row per statistic
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM water_logs").fetchone()[0], 6)
+
+        logs = self.db.get_all_logs().set_index("param")
+        self.assertEqual(len(logs), 2)
+        self.assertEqual(logs.loc["magnetronFlow", "avg"], 11.5)
+        self.assertAlmostEqual(logs.loc["magnetronFlow", "diff"], 1.3)
+        self.assertEqual(logs["datetime"].dtype, "datetime64[ns]")
+
+        by_param = self.db.get_logs_by_parameter("magnetronFlow", serial_number="001")
+        self.assertEqual(sorted(by_param["statistic_type"]), ["avg", "max", "min"])
+
+    def test_small_batches_and_text_datetimes(self):
+        df = self.parse_sample()
+        text = df.assign(datetime=df["datetime"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+        text.loc[len(text)] = text.iloc[0].copy()
+        text.loc[len(text) - 1, "serial_number"] = None
+
+        self.assertEqual(self.db.insert_data_batch(text, batch_size=1), 2)
+        with self.db.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT datetime(ts, 'unixepoch'), avg, min, max, count, data_quality "
+                "FROM readings ORDER BY id"
+            ).fetchall()
+        self.assertEqual(rows[0], ("2024-08-01 10:00:00", 11.5, 10.8, 12.1, 60, "good"))
+
+        self.db.clear_all()
+        self.assertEqual(self.db.insert_data_batch(df, batch_size=1), 2)
+        with self.db.get_connection() as conn:
+            self.assertEqual(
+                conn.execute("SELECT ts FROM readings ORDER BY id").fetchall(),
+                [(1722506400,), (1722506410,)],
+            )
+
+    def test_long_rows_are_pivoted(self):
+        df = self.parse_sample()[["datetime", "serial_number", "parameter_type", "statistic_type", "value"]]
+        self.assertEqual(self.db.insert_data_batch(df), 2)
+        logs = self.db.get_all_logs().set_index("param")
+        self.assertEqual(logs.loc["FanhumidityStatistics", "max"], 46.2)
+
+    def test_legacy_table_is_migrated(self):
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(
+            """
+            CREATE TABLE water_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL,
+                serial_number TEXT NOT NULL, parameter_type TEXT NOT NULL,
+                statistic_type TEXT NOT NULL, value REAL NOT NULL, count INTEGER,
+                unit TEXT, description TEXT, data_quality TEXT, raw_parameter TEXT,
+                line_number INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+            """
+        )
+        conn.execute("CREATE INDEX idx_datetime ON water_logs(datetime)")
+        conn.execute("CREATE INDEX idx_combined ON water_logs(datetime, serial_number, parameter_type, statistic_type)")
+        conn.executemany(
+            "INSERT INTO water_logs (datetime, serial_number, parameter_type, statistic_type, value) "
+            "VALUES ('2024-07-01 08:00:00', '001', 'magnetronFlow', ?, ?)",
+            [("avg", 11.0), ("min", 10.0), ("max", 12.0)],
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(legacy_path)
+        db.insert_data_batch(self.parse_sample())
+
+        logs = db.get_all_logs()
+        self.assertEqual(len(logs), 3)
+        self.assertEqual(db.get_record_count(), 3)
+        legacy_row = logs[logs["datetime"] == pd.Timestamp("2024-07-01 08:00:00")].iloc[0]
+        self.assertEqual(legacy_row["diff"], 2.0)
+        self.assertEqual(len(db.get_logs_by_parameter("magnetronFlow")), 6)
+
+        with db.get_connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], db.SCHEMA_VERSION)
+            legacy_indexes = [
+                row[1] for row in conn.execute("PRAGMA index_list(water_logs_legacy)")
+            ]
+            self.assertEqual(legacy_indexes, ["idx_legacy_parameter_serial_time"])
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT datetime, value, unit, statistic_type, data_quality "
+                "FROM water_logs_legacy WHERE parameter_type = 'x' AND serial_number = '001' "
+                "ORDER BY datetime"
+            ).fetchall()
+            self.assertIn("COVERING INDEX", plan[0][3])
+            # A legacy reading with only an avg row still pivots into one row
+            conn.execute(
+                "INSERT INTO water_logs_legacy (datetime, serial_number, parameter_type, statistic_type, value) "
+                "VALUES ('2024-07-01 09:00:00', '001', 'magnetronFlow', 'avg', 11.2)"
+            )
+        # Raw SQL writes bypass the manager's write generation
+        db.query_cache.invalidate()
+
+        chunked = db.get_all_logs(chunk_size=1)
+        self.assertEqual(len(chunked), 4)
+        self.assertTrue(chunked.equals(db.get_all_logs()))
+        partial = chunked[chunked["datetime"] == pd.Timestamp("2024-07-01 09:00:00")].iloc[0]
+        self.assertEqual(partial["avg"], 11.2)
+        self.assertTrue(pd.isna(partial["max"]))
+        self.assertEqual(len(db.get_all_logs(limit=2)), 2)
+        del db
+
+    def test_legacy_rows_migrate_in_chunks(self):
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(
+            "CREATE TABLE water_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL, "
+            "serial_number TEXT NOT NULL, parameter_type TEXT NOT NULL, statistic_type TEXT NOT NULL, "
+            "value REAL NOT NULL, count INTEGER, unit TEXT, description TEXT, data_quality TEXT, "
+            "raw_parameter TEXT, line_number INTEGER)"
+        )
+        rows = [
+            (f"2024-07-0{day} 08:00:00", serial, "magnetronFlow", stat, value)
+            for day in (1, 2, 3)
+            for serial in ("001", "002")
+            for stat, value in (("avg", 11.0 + day), ("min", 10.0), ("max", 13.0))
+        ]
+        # A re-imported copy, the reading also in the parsed sample, and an unparseable time
+        rows += rows[:3] + [("2024-08-01 10:00:00", "001", "magnetronFlow", "avg", 11.5), ("n/a", "001", "x", "avg", 1.0)]
+        conn.executemany(
+            "INSERT INTO water_logs (datetime, serial_number, parameter_type, statistic_type, value) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(legacy_path)
+        db.insert_data_batch(self.parse_sample())
+        self.assertEqual(db.get_record_count(), 2 + 9)
+        self.assertEqual(len(db.get_all_logs()), 2 + 8)
+
+        # The chunk is widened to the end of the reading at its seventh row
+        status = db.migrate_legacy_readings(chunk_rows=7, max_chunks=1)
+        self.assertEqual((status["chunks"], status["rows"], status["complete"]), (1, 9, False))
+        # Readers see each reading once while the migration is paused
+        self.assertEqual(len(db.get_all_logs()), 2 + 8)
+        self.assertEqual(db.get_record_count(), 2 + 9 - 3 + 2)
+
+        progress = []
+        status = db.migrate_legacy_readings(chunk_rows=7, progress_callback=progress.append)
+        self.assertTrue(status["complete"])
+        self.assertEqual(status["rows"], len(rows))
+        self.assertEqual([p["rows"] for p in progress], [9 + 7, len(rows)])
+
+        with db.get_connection() as conn:
+            self.assertFalse(db._has_table(conn, "water_logs_legacy"))
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0], 2 + 6)
+            self.assertEqual(conn.execute("SELECT SUM(reading_count) FROM water_logs_daily").fetchone()[0], 2 + 6)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM water_logs").fetchone()[0], 6 + 18)
+        summary = db.get_series_summary()
+        db.rebuild_summary()
+        self.assertTrue(summary.equals(db.get_series_summary()))
+        self.assertEqual(db.get_record_count(), 2 + 6)
+        # Nothing left to do on a rerun
+        self.assertTrue(db.migrate_legacy_readings()["complete"])
+        db.close()
+
+    def test_text_datetimes_are_converted_to_epoch(self):
+        upgrade_path = os.path.join(self.temp_dir, "version3.db")
+        conn = sqlite3.connect(upgrade_path)
+        conn.executescript(
+            """
+            CREATE TABLE serials (id INTEGER PRIMARY KEY, serial_number TEXT NOT NULL UNIQUE);
+            CREATE TABLE parameters (id INTEGER PRIMARY KEY, parameter_type TEXT NOT NULL UNIQUE,
+                                     unit TEXT, description TEXT, raw_parameter TEXT);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL,
+                                   serial_id INTEGER NOT NULL, parameter_id INTEGER NOT NULL,
+                                   avg REAL, min REAL, max REAL, count INTEGER,
+                                   data_quality TEXT, line_number INTEGER);
+            INSERT INTO serials VALUES (1, '001');
+            INSERT INTO parameters (id, parameter_type) VALUES (1, 'magnetronFlow');
+            INSERT INTO readings (datetime, serial_id, parameter_id, avg, min, max, count)
+                VALUES ('2024-08-01 10:00:00', 1, 1, 11.5, 10.8, 12.1, 60),
+                       ('2024-08-01 11:30:00', 1, 1, 11.0, 10.0, 12.0, 60);
+            PRAGMA user_version = 3;
+            """
+        )
+        conn.close()
+
+        db = DatabaseManager(upgrade_path)
+        logs = db.get_all_logs()
+        self.assertEqual(list(logs["datetime"]), [pd.Timestamp("2024-08-01 10:00:00"), pd.Timestamp("2024-08-01 11:30:00")])
+        self.assertEqual(len(db.get_parameter_trend("magnetronFlow", resolution_seconds=3600)), 2)
+        with db.get_read_connection() as conn:
+            self.assertEqual(
+                conn.execute("SELECT datetime FROM water_logs WHERE statistic_type = 'avg' ORDER BY datetime").fetchall(),
+                [("2024-08-01 10:00:00",), ("2024-08-01 11:30:00",)],
+            )
+        db.close()
+
+
+class TestIdempotentImport(DatabaseTestCase):
+    """Test natural-key deduplication and file content hashes"""
+
+    def test_reimport_adds_nothing(self):
+        path = self.write_log(SAMPLE_LOG_LINES)
+        df = UnifiedParser().parse_linac_file(path)
+
+        self.assertEqual(self.db.insert_data_batch(df), 2)
+        self.assertEqual(self.db.insert_data_batch(df), 0)
+        self.assertEqual(len(self.db.get_all_logs()), 2)
+        with self.db.get_connection() as conn:
+            self.assertEqual(
+                conn.execute("SELECT SUM(reading_count) FROM water_logs_hourly").fetchone()[0], 2
+            )
+
+        content_hash = file_content_hash(path)
+        self.assertFalse(self.db.is_file_imported(content_hash))
+        self.db.insert_file_metadata("machine.log", os.path.getsize(path), 2, "{}", content_hash)
+        self.assertTrue(self.db.is_file_imported(content_hash))
+        self.assertEqual(content_hash, file_content_hash(self.write_log(SAMPLE_LOG_LINES, "copy.log")))
+
+    def test_upgrade_removes_duplicate_readings(self):
+        df = UnifiedParser().parse_linac_file(self.write_log(SAMPLE_LOG_LINES))
+        self.db.insert_data_batch(df)
+        with self.db.get_connection() as conn:
+            # Simulate a version 2 database that accepted the same readings twice
+            conn.execute("DROP INDEX idx_readings_natural_key")
+            conn.execute(
+                "INSERT INTO readings (ts, serial_id, parameter_id, avg, min, max, count) "
+                "SELECT ts, serial_id, parameter_id, avg, min, max, count FROM readings"
+            )
+            conn.execute("PRAGMA user_version = 2")
+        del self.db
+
+        self.db = DatabaseManager(self.db_path)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0], 2)
+            self.assertEqual(
+                conn.execute("SELECT SUM(reading_count) FROM water_logs_daily").fetchone()[0], 2
+            )
+        self.assertEqual(self.db.insert_data_batch(df), 0)
+
+
+class TestConnectionPool(DatabaseTestCase):
+    """Test the writer connection and the read-only reader pool"""
+
+    def test_reads_do_not_wait_for_write_transaction(self):
+        df = UnifiedParser().parse_linac_file(self.write_log(SAMPLE_LOG_LINES))
+        self.db.insert_data_batch(df)
+
+        with self.db.get_connection() as writer:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.execute("DELETE FROM readings")
+            # The uncommitted delete is invisible and does not block readers
+            with self.db.get_read_connection() as reader:
+                self.assertEqual(reader.execute("SELECT COUNT(*) FROM readings").fetchone()[0], 2)
+            writer.execute("ROLLBACK")
+
+        with self.db.get_read_connection() as reader:
+            with self.assertRaises(sqlite3.OperationalError):
+                reader.execute("DELETE FROM readings")
+
+    def test_readers_are_bounded_and_returned(self):
+        db = DatabaseManager(os.path.join(self.temp_dir, "pool.db"), reader_pool_size=2)
+        results = []
+
+        def read():
+            with db.get_read_connection() as conn:
+                # Nested leases reuse the thread's connection
+                with db.get_read_connection() as inner:
+                    results.append(conn is inner)
+                results.append(conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0])
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 8)
+        self.assertEqual(results.count(0), 8)
+        self.assertLessEqual(len(db._idle_readers), 2)
+        db.close()
+
+
+class TestIngestQueue(DatabaseTestCase):
+    """Test the single writer thread behind submit_data_batch"""
+
+    def test_concurrent_producers_are_group_committed(self):
+        frames = [
+            self.readings(
+                [(f"2024-08-01 {hour:02d}:00:00", f"00{serial}", "magnetronFlow", 60, 10.0, 12.0, 11.0) for hour in range(6)]
+            )
+            for serial in range(1, 5)
+        ]
+        results = {}
+
+        def produce(position):
+            results[position] = self.db.submit_data_batch(frames[position]).result(timeout=30)
+
+        # Hold the writer so the producers' frames queue up behind it
+        with self.db.get_connection():
+            threads = [threading.Thread(target=produce, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.2)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {0: 6, 1: 6, 2: 6, 3: 6})
+        self.assertEqual(self.db.get_record_count(), 24)
+        self.assertEqual(self.db.submit_data_batch(frames[0]).result(timeout=30), 0)
+
+    def test_failed_frame_only_fails_its_producer(self):
+        good = self.readings([("2024-08-01 08:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0)])
+        bad = pd.DataFrame({"datetime": [pd.Timestamp("2024-08-01")], "value": [1.0]})
+
+        with self.db.get_connection():
+            futures = [self.db.submit_data_batch(frame) for frame in (good, bad, good)]
+        self.assertEqual(futures[0].result(timeout=30), 1)
+        with self.assertRaises(KeyError):
+            futures[1].result(timeout=30)
+        self.assertEqual(futures[2].result(timeout=30), 0)
+
+        self.db.close()
+        self.assertEqual(self.db.get_record_count(), 1)
+
+
+class TestRollups(DatabaseTestCase):
+    """Test incrementally maintained hourly/daily rollups"""
+
+    def test_batches_merge_into_buckets(self):
+        self.db.insert_data_batch(
+            self.readings([("2024-08-01 10:05:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0)])
+        )
+        self.db.insert_data_batch(
+            self.readings(
+                [
+                    ("2024-08-01 10:40:00", "001", "magnetronFlow", 30, 9.5, 11.0, 10.0),
+                    ("2024-08-01 14:00:00", "001", "magnetronFlow", 60, 10.0, 13.0, 12.0),
+                ]
+            )
+        )
+
+        with self.db.get_connection() as conn:
+            hourly = conn.execute(
+                "SELECT bucket, min, max, avg, sample_count, reading_count "
+                "FROM water_logs_hourly ORDER BY bucket"
+            ).fetchall()
+            daily = conn.execute(
+                "SELECT min, max, avg, sample_count, reading_count FROM water_logs_daily"
+            ).fetchall()
+
+        self.assertEqual(len(hourly), 2)
+        bucket, low, high, avg, samples, count = hourly[0]
+        self.assertEqual(bucket, pd.Timestamp("2024-08-01 10:00:00").value // 10**9)
+        self.assertEqual((low, high, samples, count), (9.5, 12.0, 90, 2))
+        self.assertAlmostEqual(avg, (11.0 * 60 + 10.0 * 30) / 90)
+        self.assertEqual(len(daily), 1)
+        self.assertAlmostEqual(daily[0][2], (11.0 * 60 + 10.0 * 30 + 12.0 * 60) / 150)
+
+        before = hourly
+        self.db.rebuild_rollups()
+        with self.db.get_connection() as conn:
+            self.assertEqual(
+                conn.execute(
+                    "SELECT bucket, min, max, avg, sample_count, reading_count "
+                    "FROM water_logs_hourly ORDER BY bucket"
+                ).fetchall(),
+                before,
+            )
+
+    def test_trend_picks_coarsest_table(self):
+        rows = [
+            (f"2024-{month:02d}-01 08:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0)
+            for month in range(1, 13)
+        ]
+        self.db.insert_data_batch(self.readings(rows))
+
+        year = self.db.get_parameter_trend(
+            "magnetronFlow", start="2024-01-01", end="2024-12-31", max_points=300
+        )
+        self.assertEqual(year.attrs["source"], "water_logs_daily")
+        self.assertEqual(len(year), 12)
+
+        day = self.db.get_parameter_trend(
+            "magnetronFlow", start="2024-03-01", end="2024-03-02", max_points=10
+        )
+        self.assertEqual(day.attrs["source"], "water_logs_hourly")
+        self.assertEqual(list(day["datetime"]), [pd.Timestamp("2024-03-01 08:00:00")])
+
+        raw = self.db.get_parameter_trend("magnetronFlow", resolution_seconds=1, serial_number="001")
+        self.assertEqual(raw.attrs["source"], "readings")
+        self.assertEqual(len(raw), 12)
+        self.assertTrue(self.db.get_parameter_trend("unknown").empty)
+
+    def test_series_is_bucketed_in_sql(self):
+        times = pd.date_range("2024-01-01", periods=600, freq="10min")
+        rows = [
+            (str(t), "001", "magnetronFlow", 60, 10.0 + i % 7, 12.0 + i % 5, 11.0 + i % 3)
+            for i, t in enumerate(times)
+        ]
+        self.db.insert_data_batch(self.readings(rows))
+
+        series = self.db.get_series("magnetronFlow", "001", max_points=50)
+        self.assertLessEqual(len(series), 50)
+        self.assertEqual(series.attrs["source"], "water_logs_hourly")
+        self.assertEqual(series.attrs["bucket_seconds"] % 3600, 0)
+        self.assertEqual(series["sample_count"].sum(), 600 * 60)
+
+        raw = self.db.load_readings("magnetronFlow", "001")
+        width = series.attrs["bucket_seconds"]
+        origin = raw["datetime"].iloc[0].floor("h")
+        expected = raw.groupby(
+            origin + (raw["datetime"] - origin) // pd.Timedelta(seconds=width) * pd.Timedelta(seconds=width)
+        ).agg(min=("min", "min"), max=("max", "max"), avg=("avg", "mean"))
+        self.assertEqual(list(series["datetime"]), list(expected.index))
+        for column in ("min", "max", "avg"):
+            self.assertEqual(
+                list(series[column].round(9)), list(expected[column].round(9))
+            )
+
+        fine = self.db.get_series(
+            "magnetronFlow", start="2024-01-01 00:00", end="2024-01-01 01:00", max_points=1000
+        )
+        self.assertEqual(fine.attrs["source"], "readings")
+        self.assertEqual(len(fine), 7)
+        self.assertTrue(self.db.get_series("magnetronFlow", "999").empty)
+
+    def test_series_includes_unmigrated_legacy_rows(self):
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(
+            "CREATE TABLE water_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL, "
+            "serial_number TEXT NOT NULL, parameter_type TEXT NOT NULL, statistic_type TEXT NOT NULL, "
+            "value REAL NOT NULL, count INTEGER, unit TEXT, description TEXT, data_quality TEXT, "
+            "raw_parameter TEXT, line_number INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO water_logs (datetime, serial_number, parameter_type, statistic_type, value, count) "
+            "VALUES (?, ?, 'magnetronFlow', ?, ?, 60)",
+            [
+                (f"2024-06-0{day} 08:00:00", serial, stat, value + offset)
+                for day in (1, 2)
+                for serial, offset in (("001", 0.0), ("002", 100.0))
+                for stat, value in (("avg", 11.0), ("min", 10.0), ("max", 12.0))
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(legacy_path)
+        # Legacy-only: the parameter is not in the dimension tables yet
+        series = db.get_series("magnetronFlow", "001", max_points=10)
+        self.assertEqual(list(series["sample_count"]), [60, 60])
+        self.assertEqual(list(series["avg"]), [11.0, 11.0])
+
+        db.insert_data_batch(self.readings([("2024-06-03 08:00:00", "001", "magnetronFlow", 60, 9.0, 13.0, 12.0)]))
+        series = db.get_series("magnetronFlow", "001", max_points=3)
+        self.assertEqual(series.attrs["source"], "water_logs_hourly")
+        self.assertEqual(list(series["avg"]), [11.0, 11.0, 12.0])
+        self.assertEqual((series["min"].min(), series["max"].max()), (9.0, 13.0))
+        self.assertEqual(db.get_series("magnetronFlow", max_points=1)["sample_count"].sum(), 5 * 60)
+        db.close()
+
+
+class TestMonthlyPartitions(DatabaseTestCase):
+    """Test readings routed to attached per-month database files"""
+
+    def setUp(self):
+        super().setUp()
+        self.db.close()
+        self.db = DatabaseManager(self.db_path, partition_by_month=True)
+
+    def test_readings_are_routed_by_month(self):
+        rows = [
+            ("2024-07-31 23:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0),
+            ("2024-08-01 01:00:00", "001", "magnetronFlow", 60, 10.0, 13.0, 12.0),
+            ("2024-08-02 01:00:00", "002", "magnetronFlow", 60, 9.0, 11.0, 10.0),
+        ]
+        self.assertEqual(self.db.insert_data_batch(self.readings(rows)), 3)
+        self.assertEqual(self.db.insert_data_batch(self.readings(rows)), 0)
+
+        partitions = self.db.get_partitions()
+        self.assertEqual(list(partitions["month"]), ["2024_07", "2024_08"])
+        for filename in partitions["filename"]:
+            self.assertTrue(os.path.exists(os.path.join(self.db.partition_dir, filename)))
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0], 0)
+            self.assertEqual(
+                conn.execute("SELECT SUM(reading_count) FROM water_logs_daily").fetchone()[0], 3
+            )
+
+        logs = self.db.get_all_logs()
+        self.assertEqual(len(logs), 3)
+        self.assertEqual(len(self.db.get_all_logs(limit=2)), 2)
+        self.assertEqual(len(self.db.get_logs_by_parameter("magnetronFlow")), 9)
+        self.assertEqual(self.db.get_summary_statistics()["unique_serials"], 2)
+
+        with self.db.get_read_connection() as conn:
+            pruned = self.db._list_partitions(
+                conn,
+                DatabaseManager._epoch_seconds("2024-08-01"),
+                DatabaseManager._epoch_seconds("2024-08-03"),
+            )
+        self.assertEqual([row[0] for row in pruned], ["2024_08"])
+        raw = self.db.get_parameter_trend(
+            "magnetronFlow", start="2024-08-01", end="2024-08-03", resolution_seconds=1
+        )
+        self.assertEqual(list(raw["serial"]), ["001", "002"])
+
+        self.db.clear_all()
+        self.assertTrue(self.db.get_partitions().empty)
+        self.assertEqual(os.listdir(self.db.partition_dir), [])
+
+    def test_sealed_partition_stays_readable_and_reopens(self):
+        rows = [
+            (f"2024-{month:02d}-10 08:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0)
+            for month in (1, 2, 3)
+        ]
+        self.db.insert_data_batch(self.readings(rows))
+
+        self.assertEqual(self.db.seal_old_partitions(keep_months=1), 2)
+        partitions = self.db.get_partitions()
+        self.assertEqual(list(partitions["read_only"]), [1, 1, 0])
+        path = os.path.join(self.db.partition_dir, partitions["filename"][0])
+        self.assertFalse(os.stat(path).st_mode & 0o200)
+        self.assertEqual(len(self.db.get_all_logs()), 3)
+
+        self.db.insert_data_batch(
+            self.readings([("2024-01-20 08:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0)])
+        )
+        self.assertEqual(list(self.db.get_partitions()["read_only"]), [0, 1, 0])
+        self.assertEqual(len(self.db.get_all_logs()), 4)
+
+    def test_readings_stored_before_partitioning_are_not_duplicated(self):
+        row = [("2024-08-01 10:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0)]
+        plain = DatabaseManager(self.db_path)
+        plain.insert_data_batch(self.readings(row))
+        plain.close()
+
+        self.assertEqual(self.db.insert_data_batch(self.readings(row)), 0)
+        self.assertEqual(len(self.db.get_all_logs()), 1)
+
+
+class TestRetention(DatabaseTestCase):
+    """Test expiry of old raw readings and rollups"""
+
+    ROWS = [
+        (f"2024-{month:02d}-{day:02d} {hour:02d}:00:00", serial, "magnetronFlow", 60, 10.0, 12.0, 11.0)
+        for month in (1, 2, 3, 4)
+        for day in (5, 20)
+        for hour in (8, 9)
+        for serial in ("001", "002")
+    ]
+
+    def test_raw_readings_expire_but_trends_remain(self):
+        self.db.retention_days.update(readings=30, water_logs_hourly=60)
+        self.db.insert_data_batch(self.readings(self.ROWS))
+
+        deleted = self.db.apply_retention(now="2024-04-30", chunk_rows=3)
+        self.assertEqual(deleted["readings"], 24)
+        self.assertEqual(deleted["water_logs_hourly"], 16)
+
+        logs = self.db.get_all_logs()
+        self.assertEqual(len(logs), 8)
+        self.assertGreaterEqual(logs["datetime"].min(), pd.Timestamp("2024-03-31"))
+
+        # Daily rollups keep the full history, also across a rebuild
+        for _ in range(2):
+            daily = self.db.get_parameter_trend(
+                "magnetronFlow", serial_number="001", resolution_seconds=86400
+            )
+            self.assertEqual(len(daily), 8)
+            self.assertEqual(list(daily["sample_count"]), [120] * 8)
+            self.db.rebuild_rollups()
+
+    def test_default_cutoff_follows_newest_reading_and_keeps_legacy_rows(self):
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(
+            "CREATE TABLE water_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, datetime TEXT NOT NULL, "
+            "serial_number TEXT NOT NULL, parameter_type TEXT NOT NULL, statistic_type TEXT NOT NULL, "
+            "value REAL NOT NULL, count INTEGER, unit TEXT, description TEXT, data_quality TEXT, "
+            "raw_parameter TEXT, line_number INTEGER)"
+        )
+        conn.execute(
+            "INSERT INTO water_logs (datetime, serial_number, parameter_type, statistic_type, value) "
+            "VALUES ('2023-06-01 08:00:00', '001', 'magnetronFlow', 'avg', 11.0)"
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(legacy_path)
+        self.assertEqual(db.apply_retention(), {})
+        db.retention_days.update(readings=30)
+        db.insert_data_batch(self.readings(self.ROWS))
+
+        # Measured from 2024-04-20 (newest reading), not from today
+        deleted = db.apply_retention()
+        self.assertEqual(deleted["readings"], 24)
+        logs = db.get_all_logs()
+        self.assertEqual(len(logs), 8 + 1)
+        self.assertIn(pd.Timestamp("2023-06-01 08:00:00"), set(logs["datetime"]))
+        with db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM water_logs_legacy").fetchone()[0], 1)
+        db.close()
+
+    def test_expired_partitions_are_dropped_and_space_reclaimed(self):
+        self.db.close()
+        self.db = DatabaseManager(
+            self.db_path, partition_by_month=True, retention_days={"readings": 30}
+        )
+        self.db.insert_data_batch(self.readings(self.ROWS))
+        self.db.seal_partition("2024_03")
+
+        deleted = self.db.apply_retention(now="2024-04-30")
+        # Two whole months dropped, plus March's readings before the cutoff
+        self.assertEqual(deleted["readings"], 2 + 8)
+        self.assertEqual(list(self.db.get_partitions()["month"]), ["2024_03", "2024_04"])
+        self.assertEqual(len(self.db.get_all_logs()), 8)
+
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+            conn.execute("CREATE TABLE filler AS SELECT zeroblob(100000) AS blob FROM readings")
+            conn.execute("DROP TABLE filler")
+            self.assertGreater(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.assertGreater(self.db.reclaim_space(pages_per_step=10), 0)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+
+class TestSummaryCounters(DatabaseTestCase):
+    """Test the summary counters against a recount of the readings"""
+
+    def assert_counters_match_recount(self, db):
+        incremental = db.get_series_summary()
+        summary = db.get_summary_statistics()
+        db.rebuild_summary()
+        pd.testing.assert_frame_equal(incremental, db.get_series_summary())
+        self.assertEqual(summary, db.get_summary_statistics())
+
+        logs = db.get_all_logs()
+        self.assertEqual(summary["total_readings"], len(logs))
+        self.assertEqual(
+            summary["total_records"],
+            int(logs[["avg", "min", "max"]].notna().sum().sum()),
+        )
+        if not logs.empty:
+            self.assertEqual(pd.Timestamp(summary["date_range"][0]), logs["datetime"].min())
+            self.assertEqual(pd.Timestamp(summary["date_range"][1]), logs["datetime"].max())
+        return summary
+
+    def test_counters_follow_inserts_and_retention(self):
+        self.db.close()
+        self.db = DatabaseManager(
+            self.db_path, partition_by_month=True, retention_days={"readings": 30}
+        )
+        rows = TestRetention.ROWS + [
+            ("2024-04-21 08:00:00", "003", "FanhumidityStatistics", 60, 40.0, 46.0, 45.0),
+            ("2024-01-07 08:00:00", "003", "magnetronFlow", 60, None, None, 11.0),
+        ]
+        self.db.insert_data_batch(self.readings(rows))
+        # Re-imported rows are not counted twice
+        self.db.insert_data_batch(self.readings(rows[:5]))
+
+        summary = self.assert_counters_match_recount(self.db)
+        self.assertEqual(summary["total_readings"], 34)
+        self.assertEqual(summary["unique_serials"], 3)
+        self.assertEqual(summary["readings_by_parameter"]["FanhumidityStatistics"], 1)
+        self.assertEqual(summary["latest_serial"], "003")
+
+        self.db.seal_partition("2024_03")
+        self.db.apply_retention(now="2024-04-30")
+        summary = self.assert_counters_match_recount(self.db)
+        self.assertEqual(summary["total_readings"], 9)
+        self.assertEqual(summary["readings_by_serial"], {"001": 4, "002": 4, "003": 1})
+
+        self.db.clear_all()
+        self.assertEqual(self.db.get_record_count(), 0)
+        self.assertEqual(self.db.get_summary_statistics()["unique_parameters"], 0)
+
+
+class TestMaintenance(DatabaseTestCase):
+    """Test bounded background maintenance instead of a full VACUUM"""
+
+    def make_free_pages(self):
+        with self.db.get_connection() as conn:
+            conn.execute("CREATE TABLE filler AS SELECT zeroblob(100000) AS blob FROM serials")
+            conn.execute("DROP TABLE filler")
+
+    def test_pass_is_bounded_by_thresholds(self):
+        self.db.insert_data_batch(self.readings(TestRetention.ROWS))
+        self.make_free_pages()
+        free_pages = self.db.get_maintenance_status()["freelist_count"]
+        self.assertGreater(free_pages, 10)
+
+        # Below the thresholds nothing but a checkpoint happens
+        done = self.db.run_maintenance(free_page_threshold=free_pages + 1)
+        self.assertNotIn("vacuumed_pages", done)
+        self.assertNotIn("wal_truncated", done)
+        self.assertTrue(done["optimized"])
+
+        free_pages = self.db.get_maintenance_status()["freelist_count"]
+        done = self.db.run_maintenance(
+            max_vacuum_pages=10, free_page_threshold=1, wal_bytes_threshold=1
+        )
+        self.assertEqual(done["vacuumed_pages"], 10)
+        self.assertTrue(done["wal_truncated"])
+        self.assertNotIn("optimized", done)
+        status = self.db.get_maintenance_status()
+        self.assertEqual(status["freelist_count"], free_pages - 10)
+        self.assertEqual(status["wal_bytes"], 0)
+
+    def test_background_thread_runs_when_idle(self):
+        self.make_free_pages()
+        self.db.MAINTENANCE_FREE_PAGES = 1
+        self.db.start_maintenance(interval_seconds=0.01, idle_seconds=0)
+        for _ in range(500):
+            if self.db.get_maintenance_status()["freelist_count"] == 0:
+                break
+            time.sleep(0.01)
+        self.db.close()
+        self.assertEqual(self.db.get_maintenance_status()["freelist_count"], 0)
+
+
+class TestBackup(DatabaseTestCase):
+    """Test the online backup of the database and its partitions"""
+
+    def test_backup_is_a_consistent_snapshot_during_imports(self):
+        self.db.close()
+        self.db = DatabaseManager(self.db_path, partition_by_month=True)
+        times = pd.date_range("2024-07-01", periods=2000, freq="15min")
+        self.db.insert_data_batch(
+            self.readings([(str(t), "001", "magnetronFlow", 60, 10.0, 12.0, 11.0) for t in times])
+        )
+
+        importing = threading.Event()
+
+        def import_more():
+            importing.set()
+            for day in range(1, 20):
+                self.db.insert_data_batch(
+                    self.readings([(f"2024-12-{day:02d} 08:00:00", "002", "magnetronFlow", 60, 9.0, 10.0, 9.5)])
+                )
+
+        writer = threading.Thread(target=import_more)
+        writer.start()
+        importing.wait()
+        steps = []
+        dest = os.path.join(self.temp_dir, "backup", "halog_copy.db")
+        os.makedirs(os.path.dirname(dest))
+        written = self.db.backup(dest, pages_per_step=1, progress=lambda *step: steps.append(step)).result()
+        writer.join()
+
+        self.assertEqual(written[0], dest)
+        self.assertGreater(len(written), 1)
+        self.assertGreater(len(steps), len(written))
+        self.assertEqual(steps[-1][1], 0)
+
+        copy = DatabaseManager(dest, partition_by_month=True)
+        try:
+            # Counters and readings in the copy agree, whichever imports it caught
+            stored = sum(len(chunk) for chunk in copy.iter_logs())
+            self.assertEqual(copy.get_record_count(), stored)
+            self.assertGreaterEqual(stored, 2000)
+            self.assertEqual(list(copy.get_partitions()["month"]), list(self.db.get_partitions()["month"])[: len(written) - 1])
+        finally:
+            copy.close()
+
+
+class TestLoadReadings(DatabaseTestCase):
+    """Test column-pruned reading loads from SQLite and the Parquet mirror"""
+
+    ROWS = [
+        ("2024-07-31 23:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0),
+        ("2024-08-01 01:00:00", "001", "magnetronFlow", None, 10.0, 13.0, 12.0),
+        ("2024-08-01 01:00:00", "002", "magnetronFlow", 60, 9.0, 11.0, 10.0),
+        ("2024-08-01 02:00:00", "001", "FanhumidityStatistics", 60, 40.0, 46.0, 45.0),
+    ]
+
+    def check_loads(self, db):
+        db.insert_data_batch(self.readings(self.ROWS))
+
+        august = db.load_readings(
+            "magnetronFlow", "001", start="2024-08-01", columns=["avg"]
+        )
+        self.assertEqual(list(august.columns), ["datetime", "avg"])
+        self.assertEqual(list(august["avg"]), [12.0])
+
+        everything = db.load_readings()
+        self.assertEqual(len(everything), 4)
+        self.assertTrue(everything["datetime"].is_monotonic_increasing)
+
+        raw = db.get_parameter_trend("magnetronFlow", resolution_seconds=1)
+        self.assertEqual(list(raw["sample_count"]), [60, 1, 60])
+
+    def test_sqlite_loads(self):
+        self.check_loads(self.db)
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+    def test_mirror_loads(self):
+        self.db.close()
+        db = DatabaseManager(self.db_path, partition_by_month=True, columnar_mirror=True)
+        self.assertTrue(db.columnar_cache.is_complete())
+        self.assertTrue(db.load_readings("magnetronFlow").empty)
+        self.check_loads(db)
+
+        # Re-imports must not duplicate mirrored rows
+        db.insert_data_batch(self.readings(self.ROWS[:1]))
+        self.assertEqual(len(db.load_readings()), 4)
+        self.assertEqual(db.rebuild_columnar_mirror(), 4)
+        self.assertEqual(len(db.load_readings()), 4)
+        db.close()
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+    def test_mirror_months_are_compacted(self):
+        self.db.close()
+        db = DatabaseManager(self.db_path, columnar_mirror=True)
+        db.columnar_cache.MAX_MONTH_FILES = 3
+        for day in range(1, 11):
+            db.insert_data_batch(
+                self.readings([(f"2024-08-{day:02d} 08:00:00", "001", "magnetronFlow", 60, 9.0, 10.0, 9.5)])
+            )
+        month_dir = os.path.join(db.columnar_cache.root, "serial=001", "month=2024_08")
+        self.assertLessEqual(len(os.listdir(month_dir)), 3)
+        loaded = db.load_readings("magnetronFlow", "001")
+        self.assertEqual(len(loaded), 10)
+        self.assertTrue(loaded["datetime"].is_monotonic_increasing)
+
+        # A rebuild in small chunks still leaves one file per month
+        self.assertEqual(db.rebuild_columnar_mirror(chunk_size=2), 10)
+        self.assertEqual(len(os.listdir(month_dir)), 1)
+        self.assertEqual(len(db.load_readings("magnetronFlow", "001")), 10)
+        db.close()
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+    def test_load_waits_for_month_compaction(self):
+        self.db.close()
+        db = DatabaseManager(self.db_path, columnar_mirror=True)
+        for day in range(1, 5):
+            db.insert_data_batch(
+                self.readings([(f"2024-08-{day:02d} 08:00:00", "001", "magnetronFlow", 60, 9.0, 10.0, 9.5)])
+            )
+        cache = db.columnar_cache
+
+        # Hold a compaction after it has listed the month's files
+        writing = threading.Event()
+        release = threading.Event()
+        write_table = columnar_cache.pq.write_table
+
+        def slow_write(*args, **kwargs):
+            writing.set()
+            release.wait(5)
+            return write_table(*args, **kwargs)
+
+        loaded = []
+        with patch.object(columnar_cache.pq, "write_table", slow_write):
+            compactor = threading.Thread(target=cache.compact)
+            compactor.start()
+            self.assertTrue(writing.wait(5))
+            reader = threading.Thread(
+                target=lambda: loaded.append(cache.load("magnetronFlow", "001"))
+            )
+            reader.start()
+            reader.join(0.2)
+            self.assertTrue(reader.is_alive())
+            release.set()
+            compactor.join(5)
+            reader.join(5)
+
+        self.assertEqual(len(loaded[0]), 4)
+        month_dir = os.path.join(cache.root, "serial=001", "month=2024_08")
+        self.assertEqual(len(os.listdir(month_dir)), 1)
+        db.close()
+
+
+class TestStreamingReads(DatabaseTestCase):
+    """Test lazy chunk iterators and their consumers"""
+
+    ROWS = [
+        ("2024-07-31 23:00:00", "001", "magnetronFlow", 60, 10.0, 12.0, 11.0),
+        ("2024-08-01 01:00:00", "001", "magnetronFlow", 60, 10.0, 13.0, 12.0),
+        ("2024-08-01 01:30:00", "001", "magnetronFlow", 60, 9.0, 14.0, 13.5),
+        ("2024-08-01 01:00:00", "002", "magnetronFlow", 60, 9.0, 11.0, 10.0),
+        ("2024-08-01 02:00:00", "001", "FanhumidityStatistics", 60, 40.0, 46.0, 45.0),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.db.close()
+        self.db = DatabaseManager(self.db_path, partition_by_month=True)
+        self.db.insert_data_batch(self.readings(self.ROWS))
+
+    def test_chunks_match_full_read(self):
+        chunks = list(self.db.iter_logs(chunk_size=2))
+        self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True), self.db.get_all_logs()
+        )
+        self.assertEqual(sum(len(c) for c in self.db.iter_logs(chunk_size=2, limit=3)), 3)
+
+        by_parameter = pd.concat(
+            self.db.iter_logs_by_parameter("magnetronFlow", "001", chunk_size=1),
+            ignore_index=True,
+        )
+        self.assertEqual(sorted(by_parameter["avg"][by_parameter["statistic_type"] == "avg"]), [11.0, 12.0, 13.5])
+
+        # Other reads on the same thread work while an iterator is suspended
+        iterator = self.db.iter_logs(chunk_size=1)
+        next(iterator)
+        self.assertEqual(len(self.db.get_logs_by_parameter("magnetronFlow")), 12)
+        self.assertEqual(sum(len(chunk) for chunk in iterator), 4)
+
+    def test_csv_export_and_full_read_without_concat(self):
+        path = os.path.join(self.temp_dir, "export.csv")
+        self.assertEqual(self.db.export_logs_csv(path, chunk_size=2), 5)
+        self.assertEqual(len(pd.read_csv(path)), 5)
+
+        # A failure partway raises and leaves no file behind
+        failed = os.path.join(self.temp_dir, "failed.csv")
+
+        def broken_logs(chunk_size=2):
+            yield self.db.get_all_logs().head(2)
+            raise sqlite3.OperationalError("disk I/O error")
+
+        with patch.object(self.db, "iter_logs", broken_logs):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.db.export_logs_csv(failed)
+        self.assertFalse(os.path.exists(failed))
+        self.assertFalse(os.path.exists(failed + ".partial"))
+
+        # Sources (main file and two partitions) fill one set of arrays
+        full = self.db.get_all_logs(chunk_size=2)
+        self.assertEqual(len(full), 5)
+        self.assertEqual(len(self.db.get_all_logs(limit=4, chunk_size=3)), 4)
+        pd.testing.assert_frame_equal(
+            full.sort_values(["datetime", "serial", "param"], ignore_index=True),
+            pd.concat(self.db.iter_logs(chunk_size=2), ignore_index=True)
+            .sort_values(["datetime", "serial", "param"], ignore_index=True),
+        )
+
+
+class TestQueryCache(DatabaseTestCase):
+    """Test read caching and write-generation invalidation"""
+
+    def test_repeated_reads_hit_cache_until_write(self):
+        parser = UnifiedParser()
+        self.db.insert_data_batch(parser.parse_linac_file(self.write_log(SAMPLE_LOG_LINES)))
+
+        first = self.db.get_all_logs()
+        first["extra"] = 1.0
+        first.loc[0, "avg"] = -1.0
+        second = self.db.get_all_logs(chunk_size=1)
+        self.assertEqual(self.db.query_cache.hits, 1)
+        self.assertNotIn("extra", second.columns)
+        self.assertNotIn(-1.0, list(second["avg"]))
+        second.loc[0, "avg"] = -2.0
+        self.assertNotIn(-2.0, list(self.db.get_all_logs()["avg"]))
+
+        summary = self.db.get_summary_statistics()
+        self.assertEqual(self.db.get_summary_statistics(), summary)
+        self.assertEqual(self.db.query_cache.hits, 3)
+
+        self.db.insert_data_batch(
+            parser.parse_linac_file(
+                self.write_log(["2024-08-02\t10:00:00\tTB\tSN# 001\tmagnetronFlow: count=60, max=12.1, min=10.8, avg=11.5"], "next.log")
+            )
+        )
+        self.assertEqual(len(self.db.get_all_logs()), 3)
+        self.db.clear_all()
+        self.assertTrue(self.db.get_all_logs().empty)
+
+    def test_byte_budget_evicts_least_recent(self):
+        from database import QueryCache
+
+        cache = QueryCache(max_bytes=2000)
+        frame = pd.DataFrame({"value": range(100)})
+        cache.put("a", frame, cache.generation)
+        cache.put("b", frame, cache.generation)
+        cache.get("a")
+        cache.put("c", frame, cache.generation)
+
+        self.assertTrue(cache.get("a")[0])
+        self.assertFalse(cache.get("b")[0])
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+
+        # String columns are sized by their contents, also when sampled
+        strings = pd.DataFrame({"value": ["x" * 100] * 5000})
+        self.assertGreater(QueryCache._estimate_size(strings), 5000 * 100)
+
+        # A result read before a write must not be stored afterwards
+        generation = cache.generation
+        cache.invalidate()
+        cache.put("d", frame, generation)
+        self.assertFalse(cache.get("d")[0])
+
+
+class TestHotReplica(DatabaseTestCase):
+    """Test interactive reads served from the in-memory replica"""
+
+    def hourly(self, start, hours, serial="001", avg=11.0):
+        times = pd.date_range(start, periods=hours, freq="h")
+        return self.readings([(str(t), serial, "magnetronFlow", 60, avg - 1, avg + 1, avg) for t in times])
+
+    def test_replica_matches_database_and_follows_inserts(self):
+        self.db.close()
+        self.db = DatabaseManager(self.db_path, partition_by_month=True)
+        self.db.insert_data_batch(self.hourly("2024-06-20", 24 * 20))
+        hot = DatabaseManager(self.db_path, partition_by_month=True, hot_days=7)
+        try:
+            with hot._hot_lock:
+                self.assertEqual(hot._hot.execute("SELECT COUNT(*) FROM readings").fetchone()[0], 24 * 7 + 1)
+
+            recent = ("2024-07-05", "2024-07-09")
+            # (concatenating empty partition frames leaves object columns on disk reads)
+            pd.testing.assert_frame_equal(
+                hot.load_readings("magnetronFlow", start=recent[0]),
+                self.db.load_readings("magnetronFlow", start=recent[0]),
+                check_dtype=False,
+            )
+            # Raw reads starting before the horizon fall back to the files
+            self.assertEqual(len(hot.load_readings("magnetronFlow", start="2024-06-20")), 24 * 20)
+            for kwargs in ({"max_points": 10}, {"start": recent[0], "end": recent[1]}):
+                pd.testing.assert_frame_equal(
+                    hot.get_series("magnetronFlow", **kwargs),
+                    self.db.get_series("magnetronFlow", **kwargs),
+                    check_dtype=False,
+                )
+            self.assertEqual(hot.get_summary_statistics(), self.db.get_summary_statistics())
+
+            # A later import moves the horizon and updates rollups and counters
+            hot.insert_data_batch(self.hourly("2024-07-15", 24, serial="002", avg=9.0))
+            self.db.query_cache.invalidate()
+            self.assertEqual(hot.get_record_count(), 24 * 21)
+            self.assertEqual(hot.get_series_summary().to_dict(), self.db.get_series_summary().to_dict())
+            trend = hot.get_parameter_trend("magnetronFlow", "002", start="2024-07-15", end="2024-07-16")
+            self.assertEqual(trend.attrs["source"], "readings")
+            self.assertEqual(list(trend["avg"]), [9.0] * 24)
+            with hot._hot_lock:
+                oldest = hot._hot.execute("SELECT MIN(ts) FROM readings").fetchone()[0]
+            self.assertEqual(oldest, DatabaseManager._epoch_seconds("2024-07-08 23:00:00"))
+
+            hot.clear_all()
+            self.assertEqual(hot.get_record_count(), 0)
+        finally:
+            hot.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -15,8 +15,79 @@ import re
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import os
+import mmap
 from pathlib import Path
 
+from parameter_mapping import get_parameter_mapping, normalize_parameter_key
+
+
+class FaultIntervalTracker:
+    """
+    Streaming state machine pairing fault/interlock assert and clear events.
+
+    Events are fed in log order; one interval is emitted when a clear matches
+    an open fault for the same serial number and code. Only currently open
+    faults are held in memory, so the state is bounded by the number of
+    simultaneously active faults rather than by the size of the log.
+    """
+
+    def __init__(self):
+        # (serial_number, fault_code) -> opening event
+        self.open_faults: Dict[Tuple[str, str], Dict] = {}
+        self.stats = {"intervals_closed": 0, "repeated_asserts": 0, "orphan_clears": 0}
+
+    def feed(self, event: Dict) -> Optional[Dict]:
+        """Process one event, returning a closed interval when one completes"""
+        key = (event["serial_number"], event["fault_code"])
+
+        if event["state"] == "assert":
+            if key in self.open_faults:
+                # Already active - keep the original start time
+                self.stats["repeated_asserts"] += 1
+            else:
+                self.open_faults[key] = event
+            return None
+
+        opening = self.open_faults.pop(key, None)
+        if opening is None:
+            # Clear without an assert in this log; the fault may have been
+            # opened by a previously imported file, so report it unpaired
+            self.stats["orphan_clears"] += 1
+            return self._make_interval(None, event)
+
+        self.stats["intervals_closed"] += 1
+        return self._make_interval(opening, event)
+
+    def flush(self) -> List[Dict]:
+        """Return faults still open at the end of the stream as open intervals"""
+        intervals = [self._make_interval(event, None) for event in self.open_faults.values()]
+        self.open_faults = {}
+        return intervals
+
+    @staticmethod
+    def _make_interval(opening: Optional[Dict], closing: Optional[Dict]) -> Dict:
+        """Build an interval record from its opening and closing events"""
+        reference = opening or closing
+        start_time = opening["datetime"] if opening else None
+        end_time = closing["datetime"] if closing else None
+
+        duration = None
+        if start_time and end_time:
+            time_format = "%Y-%m-%d %H:%M:%S"
+            duration = (
+                datetime.strptime(end_time, time_format)
+                - datetime.strptime(start_time, time_format)
+            ).total_seconds()
+
+        return {
+            "serial_number": reference["serial_number"],
+            "fault_code": reference["fault_code"],
+            "event_type": reference["event_type"],
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration_seconds": duration,
+        }
+
 
 class UnifiedParser:
     """
@@ -36,6 +107,12 @@ class UnifiedParser:
             "processing_time": 0,
         }
         self.fault_codes: Dict[str, Dict[str, str]] = {}
+        # DatabaseManager holding the fault code catalogue; when set, fault
+        # code lookups and searches are served from it instead of fault_codes
+        self.fault_catalog = None
+        self.fault_events: List[Dict] = []
+        self.fault_intervals: List[Dict] = []
+        self.fault_tracker = FaultIntervalTracker()
 
     def _compile_patterns(self):
         """Compile regex patterns for enhanced log parsing"""
@@ -60,157 +137,39 @@ class UnifiedParser:
             "serial_number": re.compile(r"SN#?\s*(\d+)", re.IGNORECASE),
             "serial_alt": re.compile(r"Serial[:\s]+(\d+)", re.IGNORECASE),
             "machine_id": re.compile(r"Machine[:\s]+(\d+)", re.IGNORECASE),
+            # Lines worth parsing; searched on lowercased buffers
+            "candidate_line": re.compile(rb"count\s*=|fault|interlock"),
+            # Fault/interlock occurrences, e.g. "Interlock 2000 asserted",
+            # "Fault: 400027 cleared" or "INTERLOCK ID=2001"
+            "fault_event": re.compile(
+                r"\b(fault|interlock)\b\s*(?:id|code)?\s*[#:=]?\s*(\d{3,6})\b"
+                r"(?:.*?\b(asserted|set|active|raised|occurred|"
+                r"cleared|reset|released|inactive|removed)\b)?",
+                re.IGNORECASE,
+            ),
         }
 
+        # Words in a fault line that mark the end of a fault condition
+        self.fault_clear_words = {"cleared", "reset", "released", "inactive", "removed"}
+
     def _init_parameter_mapping(self):
-        """Initialize parameter mapping for trend tab parameters only"""
-        self.parameter_mapping = {
-            # Water/Flow parameters (for Water System tab)
-            "magnetronFlow": {
-                "patterns": [
-                    "magnetron flow", "magnetronFlow", "CoolingmagnetronFlowLowStatistics"
-                ],
-                "unit": "L/min",
-                "description": "Mag Flow",
-                "expected_range": (8, 18),
-                "critical_range": (6, 20),
-            },
-            "targetAndCirculatorFlow": {
-                "patterns": [
-                    "target and circulator flow", "targetAndCirculatorFlow", 
-                    "CoolingtargetFlowLowStatistics"
-                ],
-                "unit": "L/min",
-                "description": "Flow Target",
-                "expected_range": (6, 12),
-                "critical_range": (4, 15),
-            },
-            "CoolingtargetTempStatistics": {
-                "patterns": [
-                    "CoolingtargetTempStatistics", "cooling_target_temp_statistics",
-                    "Cooling target Temp Statistics", "targetTempStatistics"
-                ],
-                "unit": "°C",
-                "description": "Flow Target",
-                "expected_range": (15, 25),
-                "critical_range": (10, 30),
-            },
-            "cityWaterFlow": {
-                "patterns": [
-                    "cooling city water flow statistics", "CoolingcityWaterFlowLowStatistics",
-                    "cityWaterFlow", "city_water_flow"
-                ],
-                "unit": "L/min",
-                "description": "Flow Chiller Water",
-                "expected_range": (8, 18),
-                "critical_range": (6, 20),
-            },
-            
-            # Temperature parameters (for Temperature tab)
-            "FanremoteTempStatistics": {
-                "patterns": [
-                    "FanremoteTempStatistics", "Fan remote Temp Statistics", 
-                    "remoteTempStatistics", "remote_temp_stats"
-                ],
-                "unit": "°C",
-                "description": "Temp Room",
-                "expected_range": (18, 25),
-                "critical_range": (15, 30),
-            },
-            "magnetronTemp": {
-                "patterns": [
-                    "magnetronTemp", "magnetron temp", "magnetron temperature",
-                    "mag_temp"
-                ],
-                "unit": "°C",
-                "description": "Temp Magnetron",
-                "expected_range": (30, 50),
-                "critical_range": (20, 60),
-            },
-            
-            # Humidity parameters (for Humidity tab)
-            "FanhumidityStatistics": {
-                "patterns": [
-                    "FanhumidityStatistics", "Fan humidity Statistics", 
-                    "humidityStatistics", "humidity_stats"
-                ],
-                "unit": "%",
-                "description": "Room Humidity",
-                "expected_range": (40, 60),
-                "critical_range": (30, 80),
-            },
-            
-            # Fan speed parameters (for Fan Speed tab)
-            "FanfanSpeed1Statistics": {
-                "patterns": [
-                    "FanfanSpeed1Statistics", "Fan fan Speed 1 Statistics", 
-                    "fanSpeed1Statistics", "fan_speed_1"
-                ],
-                "unit": "RPM",
-                "description": "Speed FAN 1",
-                "expected_range": (1000, 3000),
-                "critical_range": (500, 4000),
-            },
-            "FanfanSpeed2Statistics": {
-                "patterns": [
-                    "FanfanSpeed2Statistics", "Fan fan Speed 2 Statistics", 
-                    "fanSpeed2Statistics", "fan_speed_2"
-                ],
-                "unit": "RPM",
-                "description": "Speed FAN 2",
-                "expected_range": (1000, 3000),
-                "critical_range": (500, 4000),
-            },
-            "FanfanSpeed3Statistics": {
-                "patterns": [
-                    "FanfanSpeed3Statistics", "Fan fan Speed 3 Statistics", 
-                    "fanSpeed3Statistics", "fan_speed_3"
-                ],
-                "unit": "RPM",
-                "description": "Speed FAN 3",
-                "expected_range": (1000, 3000),
-                "critical_range": (500, 4000),
-            },
-            "FanfanSpeed4Statistics": {
-                "patterns": [
-                    "FanfanSpeed4Statistics", "Fan fan Speed 4 Statistics", 
-                    "fanSpeed4Statistics", "fan_speed_4"
-                ],
-                "unit": "RPM",
-                "description": "Speed FAN 4",
-                "expected_range": (1000, 3000),
-                "critical_range": (500, 4000),
-            },
-            
-            # Voltage parameters (for Voltage tab)
-            "MLC_ADC_CHAN_TEMP_BANKA_STAT_24V": {
-                "patterns": [
-                    "MLC_ADC_CHAN_TEMP_BANKA_STAT", "MLC ADC CHAN TEMP BANKA STAT", 
-                    "BANKA_24V", "mlc_bank_a_24v"
-                ],
-                "unit": "V",
-                "description": "MLC Bank A 24V",
-                "expected_range": (22, 26),
-                "critical_range": (20, 28),
-            },
-            "MLC_ADC_CHAN_TEMP_BANKB_STAT_24V": {
-                "patterns": [
-                    "MLC_ADC_CHAN_TEMP_BANKB_STAT", "MLC ADC CHAN TEMP BANKB STAT", 
-                    "BANKB_24V", "mlc_bank_b_24v"
-                ],
-                "unit": "V",
-                "description": "MLC Bank B 24V",
-                "expected_range": (22, 26),
-                "critical_range": (20, 28),
-            },
-        }
+        """Attach the shared parameter mapping loaded from data/parameter_mapping.json"""
+        self._mapping = get_parameter_mapping()
+        self._compiled_mapping = self._mapping.current()
+
+    def _refresh_parameter_mapping(self):
+        """Pick up mapping file changes; recompiles only when the file changed"""
+        self._compiled_mapping = self._mapping.current()
 
-        # Create pattern to unified name mapping
-        self.pattern_to_unified = {}
-        for unified_name, config in self.parameter_mapping.items():
-            for pattern in config["patterns"]:
-                key = pattern.lower().replace(" ", "").replace(":", "").replace("_", "")
-                self.pattern_to_unified[key] = unified_name
+    @property
+    def parameter_mapping(self) -> Dict[str, Dict]:
+        """Trend tab parameters keyed by unified name"""
+        return self._compiled_mapping.parameter_mapping
+
+    @property
+    def pattern_to_unified(self) -> Dict[str, str]:
+        """Normalized pattern to unified parameter name"""
+        return self._compiled_mapping.pattern_to_unified
 
     def parse_linac_file(
         self,
@@ -218,49 +177,105 @@ class UnifiedParser:
         chunk_size: int = 1000,
         progress_callback=None,
         cancel_callback=None,
+        buffer_size: int = 8 * 1024 * 1024,
+        fault_callback=None,
     ) -> pd.DataFrame:
-        """Parse LINAC log file with chunked processing for large files"""
-        records = []
-
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-
-            total_lines = len(lines)
-            self.parsing_stats["lines_processed"] = 0
-
-            for i in range(0, total_lines, chunk_size):
-                if cancel_callback and cancel_callback():
-                    break
-
-                chunk_lines = [(i + j, lines[i + j].strip()) 
-                              for j in range(min(chunk_size, total_lines - i))]
+        """
+        Parse LINAC log file by scanning memory-mapped buffers.
 
-                chunk_records = self._process_chunk(chunk_lines)
-                records.extend(chunk_records)
+        Candidate lines (statistics and fault/interlock lines) are located with
+        a single finditer pass per buffer, so only matching lines are decoded
+        and parsed in Python. chunk_size is kept for existing callers; buffers
+        are sized by buffer_size and always end on a newline.
 
-                self.parsing_stats["lines_processed"] += len(chunk_lines)
+        With fault_callback, the fault events and closed intervals of each
+        buffer are handed over as (events_df, intervals_df) and not kept, so
+        only faults still open stay in memory; otherwise they are collected
+        for get_fault_events() / get_fault_intervals().
+        """
+        records = []
+        self._refresh_parameter_mapping()
+        self.fault_events = []
+        self.fault_intervals = []
+        self.fault_tracker = FaultIntervalTracker()
+        self.parsing_stats["lines_processed"] = 0
 
-                if progress_callback:
-                    progress = (i + len(chunk_lines)) / total_lines * 100
-                    progress_callback(progress)
+        try:
+            total_bytes = os.path.getsize(file_path)
+            with open(file_path, 'rb') as file:
+                if total_bytes > 0:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        for buffer, base_line, bytes_done in self._iter_line_buffers(
+                            mapped, total_bytes, buffer_size
+                        ):
+                            if cancel_callback and cancel_callback():
+                                break
+
+                            records.extend(self._extract_buffer_records(buffer, base_line))
+                            # The last buffer may end in a line without a newline
+                            self.parsing_stats["lines_processed"] = (
+                                base_line
+                                + buffer.count(b"\n")
+                                + (not buffer.endswith(b"\n"))
+                            )
+                            self._hand_over_faults(fault_callback)
+
+                            if progress_callback:
+                                progress_callback(bytes_done / total_bytes * 100)
 
         except Exception as e:
             print(f"Error reading file {file_path}: {e}")
             self.parsing_stats["errors_encountered"] += 1
 
+        # Faults still active at the end of the log become open intervals
+        self.fault_intervals.extend(self.fault_tracker.flush())
+        self._hand_over_faults(fault_callback)
+
         df = pd.DataFrame(records)
         return self._clean_and_validate_data(df)
 
-    def _process_chunk(self, chunk_lines: List[Tuple[int, str]]) -> List[Dict]:
-        """Process a chunk of lines"""
-        records = []
+    def _iter_line_buffers(self, mapped, total_bytes: int, buffer_size: int):
+        """Yield (buffer, first_line_number, end_offset) slices split at newlines"""
+        start = 0
+        line_number = 0
+        while start < total_bytes:
+            end = min(start + buffer_size, total_bytes)
+            if end < total_bytes:
+                newline = mapped.find(b"\n", end)
+                end = total_bytes if newline == -1 else newline + 1
 
-        for line_number, line in chunk_lines:
+            buffer = mapped[start:end]
+            yield buffer, line_number, end
+
+            line_number += buffer.count(b"\n")
+            start = end
+
+    def _extract_buffer_records(self, buffer: bytes, base_line: int) -> List[Dict]:
+        """Parse the candidate lines of one buffer located with finditer"""
+        records = []
+        # Case-insensitive search on a lowered copy keeps the literal fast path
+        lowered = buffer.lower()
+        line_number = base_line
+        counted_to = 0
+        line_end = -1
+
+        for match in self.patterns["candidate_line"].finditer(lowered):
+            if match.start() < line_end:
+                continue  # another keyword on a line already handled
+
+            line_start = lowered.rfind(b"\n", 0, match.start()) + 1
+            line_end = lowered.find(b"\n", match.end())
+            if line_end == -1:
+                line_end = len(lowered)
+
+            # Line numbers come from newline counts between matches only
+            line_number += lowered.count(b"\n", counted_to, line_start)
+            counted_to = line_start
+
+            line = buffer[line_start:line_end].decode("utf-8", errors="replace").strip()
             try:
-                parsed_records = self._parse_line_enhanced(line, line_number)
-                records.extend(parsed_records)
-            except Exception as e:
+                records.extend(self._parse_line_enhanced(line, line_number))
+            except Exception:
                 self.parsing_stats["errors_encountered"] += 1
 
         return records
@@ -316,9 +331,71 @@ class UnifiedParser:
                 'quality': self._assess_data_quality(normalized_param, avg_val, count)
             }
             records.append(record)
+        else:
+            # Not a statistics line - keep fault/interlock occurrences
+            fault_event = self._extract_fault_event(
+                line, line_number, datetime_str, serial_number
+            )
+            if fault_event:
+                self.fault_events.append(fault_event)
+                interval = self.fault_tracker.feed(fault_event)
+                if interval:
+                    self.fault_intervals.append(interval)
 
         return records
 
+    def _hand_over_faults(self, fault_callback):
+        """Pass the faults collected so far to fault_callback and forget them"""
+        if fault_callback is None or not (self.fault_events or self.fault_intervals):
+            return
+        events, intervals = self.get_fault_events(), self.get_fault_intervals()
+        self.fault_events = []
+        self.fault_intervals = []
+        fault_callback(events, intervals)
+
+    def _extract_fault_event(
+        self, line: str, line_number: int, datetime_str: str, serial_number: str
+    ) -> Optional[Dict]:
+        """Extract a timestamped fault/interlock occurrence from a log line"""
+        match = self.patterns["fault_event"].search(line)
+        if not match:
+            return None
+
+        state_word = (match.group(3) or "").lower()
+        return {
+            'datetime': datetime_str,
+            'serial_number': serial_number,
+            'fault_code': match.group(2),
+            'event_type': match.group(1).lower(),
+            'state': 'clear' if state_word in self.fault_clear_words else 'assert',
+            'message': line[match.start():].strip(),
+            'line_number': line_number,
+        }
+
+    def get_fault_intervals(self) -> pd.DataFrame:
+        """Get fault intervals paired by the last parse_linac_file call"""
+        columns = [
+            'serial_number', 'fault_code', 'event_type',
+            'start_time', 'end_time', 'duration_seconds',
+        ]
+        df = pd.DataFrame(self.fault_intervals, columns=columns)
+        for col in ('start_time', 'end_time'):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        return df
+
+    def get_fault_events(self) -> pd.DataFrame:
+        """Get fault/interlock events extracted by the last parse_linac_file call"""
+        columns = [
+            'datetime', 'serial_number', 'fault_code', 'event_type',
+            'state', 'message', 'line_number',
+        ]
+        if not self.fault_events:
+            return pd.DataFrame(columns=columns)
+
+        df = pd.DataFrame(self.fault_events, columns=columns)
+        df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
+        return df.dropna(subset=["datetime"]).sort_values("datetime").reset_index(drop=True)
+
     def _extract_datetime(self, line: str) -> Optional[str]:
         """Extract datetime with multiple pattern support"""
         # Try primary datetime pattern
@@ -364,34 +441,14 @@ class UnifiedParser:
 
     def _normalize_parameter_name(self, param_name: str) -> str:
         """Normalize parameter names to fix common naming issues"""
-        # Remove spaces, colons, underscores, convert to lowercase for lookup
-        lookup_key = param_name.lower().replace(" ", "").replace(":", "").replace("_", "")
-
         # Return unified name if found, otherwise return cleaned original
-        return self.pattern_to_unified.get(lookup_key, param_name.strip())
+        return self.pattern_to_unified.get(
+            normalize_parameter_key(param_name), param_name.strip()
+        )
 
     def _is_target_parameter(self, param_name: str) -> bool:
         """Check if parameter is one of the specific trend tab parameters only"""
-        param_lower = param_name.lower().replace(" ", "").replace(":", "").replace("_", "")
-        
-        # Only allow parameters that match our exact trend tab parameter patterns
-        target_patterns = []
-        for param_config in self.parameter_mapping.values():
-            for pattern in param_config["patterns"]:
-                target_patterns.append(pattern.lower().replace(" ", "").replace(":", "").replace("_", ""))
-        
-        # Check if the parameter name contains any of our target patterns
-        for pattern in target_patterns:
-            pattern_clean = pattern.lower().replace(" ", "").replace(":", "").replace("_", "")
-            if pattern_clean in param_lower or param_lower in pattern_clean:
-                return True
-        
-        # Also check if it's in our pattern-to-unified mapping
-        lookup_key = param_name.lower().replace(" ", "").replace(":", "").replace("_", "")
-        if lookup_key in self.pattern_to_unified:
-            return True
-            
-        return False
+        return self._compiled_mapping.is_target(param_name)
 
     def _assess_data_quality(self, param_name: str, value: float, count: int) -> str:
         """Assess data quality for each reading"""
@@ -482,42 +539,63 @@ class UnifiedParser:
             if not os.path.exists(file_path):
                 return False
 
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252']
+            fault_codes = self.parse_fault_code_file(file_path)
+            if fault_codes is None:
+                print(f"❌ Failed to load fault codes from {file_path}")
+                return False
 
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        for line_num, line in enumerate(file, 1):
-                            line = line.strip()
-                            if not line or line.startswith('#'):
-                                continue
-
-                            # Parse fault code line
-                            fault_info = self._parse_fault_code_line(line)
-                            if fault_info:
-                                code = fault_info['code']
-                                self.fault_codes[code] = {
-                                    'description': fault_info['description'],
-                                    'source': fault_info.get('source', 'uploaded'),
-                                    'line_number': line_num
-                                }
-
-                    print(f"✓ Loaded {len(self.fault_codes)} fault codes from uploaded file")
-                    return True
-
-                except UnicodeDecodeError:
-                    continue
-
-            print(f"❌ Failed to load fault codes from {file_path}")
-            return False
+            self.fault_codes = fault_codes
+            print(f"✓ Loaded {len(self.fault_codes)} fault codes from uploaded file")
+            return True
 
         except Exception as e:
             print(f"Error loading fault codes: {e}")
             return False
 
+    def parse_fault_code_file(
+        self, file_path: str, source: str = "uploaded"
+    ) -> Optional[Dict[str, Dict]]:
+        """Read a fault code file into {code: {description, type, source, line_number}}"""
+        # Try different encodings
+        encodings = ['utf-8', 'latin-1', 'cp1252']
+
+        for encoding in encodings:
+            try:
+                fault_codes = {}
+                with open(file_path, 'r', encoding=encoding) as file:
+                    for line_num, line in enumerate(file, 1):
+                        line = line.strip()
+                        if not line or line.startswith('#'):
+                            continue
+
+                        # Parse fault code line
+                        fault_info = self._parse_fault_code_line(line)
+                        if fault_info:
+                            code = fault_info['code']
+                            fault_codes[code] = {
+                                'description': fault_info['description'],
+                                'type': fault_info.get('type'),
+                                'source': fault_info.get('source', source),
+                                'line_number': line_num
+                            }
+                return fault_codes
+
+            except UnicodeDecodeError:
+                continue
+
+        return None
+
     def _parse_fault_code_line(self, line: str) -> Optional[Dict]:
         """Parse a single fault code line"""
+        # Shipped catalogues are tab separated: ID, Description, Type
+        fields = [field.strip() for field in line.split('\t')]
+        if len(fields) >= 3 and fields[0].isdigit():
+            return {
+                'code': fields[0],
+                'description': '\t'.join(fields[1:-1]),
+                'type': fields[-1] or None,
+            }
+
         # Handle different fault code formats
         patterns = [
             r'^(\d+)\s*[:\-\s]+(.+)$',  # "12345: Description"
@@ -535,8 +613,15 @@ class UnifiedParser:
 
         return None
 
+    def use_fault_catalog(self, catalog):
+        """Serve fault code lookups from a DatabaseManager's catalogue"""
+        self.fault_catalog = catalog
+
     def search_fault_code(self, code: str) -> Dict:
         """Search for fault code in loaded database"""
+        if self.fault_catalog is not None:
+            return self.fault_catalog.search_fault_code(code)
+
         code = str(code).strip()
 
         if code in self.fault_codes:
@@ -544,7 +629,9 @@ class UnifiedParser:
                 'found': True,
                 'code': code,
                 'description': self.fault_codes[code]['description'],
+                'type': self.fault_codes[code].get('type') or 'Unknown',
                 'source': self.fault_codes[code]['source'],
+                'database': self._fault_database(self.fault_codes[code]['source']),
                 'database_description': f"{self.fault_codes[code]['source'].title()} Database"
             }
         else:
@@ -552,12 +639,51 @@ class UnifiedParser:
                 'found': False,
                 'code': code,
                 'description': 'Fault code not found in uploaded database',
+                'type': 'Unknown',
                 'source': 'none',
+                'database': 'NA',
                 'database_description': 'Not Available'
             }
 
+    @staticmethod
+    def _fault_database(source: str) -> str:
+        return {'uploaded': 'HAL', 'tb': 'TB'}.get(source, source.upper())
+
+    def get_fault_descriptions_by_database(self, code: str) -> Dict[str, str]:
+        """HAL and TB descriptions of a fault code ('' when not catalogued)"""
+        if self.fault_catalog is not None:
+            return self.fault_catalog.get_fault_descriptions_by_database(code)
+
+        descriptions = {'hal_description': '', 'tb_description': ''}
+        info = self.fault_codes.get(str(code).strip())
+        if info:
+            database = self._fault_database(info['source'])
+            if database in ('HAL', 'TB'):
+                descriptions[f"{database.lower()}_description"] = info['description']
+        return descriptions
+
+    def search_description(self, search_term: str) -> List[Tuple[str, Dict]]:
+        """Fault codes whose description contains search_term, as (code, info)"""
+        if self.fault_catalog is not None:
+            return self.fault_catalog.search_fault_descriptions(search_term)
+
+        term = search_term.strip().lower()
+        return [
+            (code, {
+                'description': info['description'],
+                'type': info.get('type') or 'Unknown',
+                'source': info['source'],
+                'database': self._fault_database(info['source']),
+            })
+            for code, info in self.fault_codes.items()
+            if term and term in info['description'].lower()
+        ]
+
     def get_fault_code_statistics(self) -> Dict:
         """Get statistics about loaded fault codes"""
+        if self.fault_catalog is not None:
+            return self.fault_catalog.get_fault_code_statistics()
+
         return {
             'total_codes': len(self.fault_codes),
             'sources': list(set(info['source'] for info in self.fault_codes.values())),
@@ -567,6 +693,7 @@ class UnifiedParser:
     # Short Data Parsing Methods
     def parse_short_data_file(self, file_path: str) -> Dict:
         """Parse shortdata.txt file for additional parameters"""
+        self._refresh_parameter_mapping()
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 lines = file.readlines()
@@ -829,42 +956,16 @@ class UnifiedParser:
 
             print(f"🔍 Using parameter column: '{param_column}'")
 
-            # Enhanced mapping to match actual database format with partial string matching
-            description_to_patterns = {
-                "Mag Flow": ["magnetronFlow", "magnetron"],
-                "Flow Target": ["targetAndCirculatorFlow", "target", "circulator"],
-                "Flow Chiller Water": ["cityWaterFlow", "chiller", "city", "water"],
-                "Temp Room": ["FanremoteTempStatistics", "remoteTemp", "roomTemp"],
-                "Room Humidity": ["FanhumidityStatistics", "humidity"],
-                "Temp Magnetron": ["magnetronTemp", "magnetron"],
-                "Speed FAN 1": ["fanSpeed1", "FanSpeed1", "Speed1"],
-                "Speed FAN 2": ["fanSpeed2", "FanSpeed2", "Speed2"],
-                "Speed FAN 3": ["fanSpeed3", "FanSpeed3", "Speed3"],
-                "Speed FAN 4": ["fanSpeed4", "FanSpeed4", "Speed4"],
-                "MLC Bank A 24V": ["BANKA", "BankA", "24V"],
-                "MLC Bank B 24V": ["BANKB", "BankB", "24V"],
-            }
-
             # Get all available parameters
             all_params = self.df[param_column].unique()
             print(f"🔍 Available parameters: {all_params[:10]}")
 
-            # Find matching parameter using enhanced pattern matching
-            matching_params = []
-            patterns = description_to_patterns.get(parameter_description, [parameter_description])
-
-            print(f"🔍 Looking for patterns: {patterns}")
-
-            # Enhanced search with flexible matching
-            for pattern in patterns:
-                for param in all_params:
-                    param_lower = param.lower()
-                    pattern_lower = pattern.lower()
-                    
-                    # Check if pattern is contained in the parameter name
-                    if pattern_lower in param_lower and param not in matching_params:
-                        matching_params.append(param)
-                        print(f"✓ Pattern '{pattern}' matched parameter: '{param}'")
+            # Whole parameter names of the description from the mapping file
+            matching_params = self._compiled_mapping.parameters_for_description(
+                parameter_description, all_params
+            )
+            for param in matching_params:
+                print(f"✓ Parameter '{param}' matched '{parameter_description}'")
 
             # If no matches found, try even more flexible matching
             if not matching_params:
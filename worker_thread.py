@@ -16,11 +16,18 @@ class FileProcessingWorker(QThread):
     finished = pyqtSignal(int, dict)  # records_count, parsing_stats
     error = pyqtSignal(str)  # error message
 
-    def __init__(self, file_path: str, file_size: int, database: DatabaseManager):
+    def __init__(
+        self,
+        file_path: str,
+        file_size: int,
+        database: DatabaseManager,
+        content_hash: str = None,
+    ):
         super().__init__()
         self.file_path = file_path
         self.file_size = file_size
         self.database = database
+        self.content_hash = content_hash
         self.parser = UnifiedParser()
         self._cancel_requested = False
         self.chunk_size = 1000  # Process files in chunks of 1000 lines
@@ -34,11 +41,14 @@ class FileProcessingWorker(QThread):
             )
 
             # Parse file with chunked processing
+            # Fault/interlock events found in the same pass are stored per
+            # buffer instead of being held until the end of the file
             df = self.parser.parse_linac_file(
                 file_path=self.file_path,
                 chunk_size=self.chunk_size,
                 progress_callback=self._progress_callback,
                 cancel_callback=self._cancel_callback,
+                fault_callback=self._store_faults,
             )
 
             if self._cancel_requested:
@@ -60,8 +70,9 @@ class FileProcessingWorker(QThread):
                 self.file_size,
             )
 
-            # Insert data into database in batches
-            records_inserted = self.database.insert_data_batch(df, batch_size=500)
+            # Hand the readings to the database's writer thread; imports
+            # running in parallel are committed together
+            records_inserted = self.database.submit_data_batch(df).result()
 
             # Insert file metadata
             filename = os.path.basename(self.file_path)
@@ -71,6 +82,7 @@ class FileProcessingWorker(QThread):
                 file_size=self.file_size,
                 records_imported=records_inserted,
                 parsing_stats=parsing_stats_json,
+                content_hash=self.content_hash,
             )
 
             # Final progress update
@@ -90,7 +102,12 @@ class FileProcessingWorker(QThread):
             error_msg = f"Error processing file: {str(e)}"
             self.error.emit(error_msg)
 
-    def _progress_callback(self, percentage: float, message: str):
+    def _store_faults(self, events, intervals):
+        """Store the fault events and intervals of one parsed buffer"""
+        self.database.insert_fault_events(events)
+        self.database.insert_fault_intervals(intervals)
+
+    def _progress_callback(self, percentage: float, message: str = "Processing log file..."):
         """Handle progress updates from parser"""
         if self._cancel_requested:
             return
@@ -201,6 +218,32 @@ class DatabaseWorker(QThread):
                 self.db_progress.emit(100, "Database cleared successfully")
                 self.db_finished.emit(True, "Database cleared successfully")
 
+            elif self.operation == "retention":
+                self.db_progress.emit(10, "Expiring old readings...")
+                deleted = self.database.apply_retention()
+                self.db_progress.emit(70, "Reclaiming free space...")
+                self.database.reclaim_space()
+                self.db_progress.emit(100, "Retention applied")
+                self.db_finished.emit(
+                    True, f"Retention applied: {sum(deleted.values()):,} rows expired"
+                )
+
+            elif self.operation == "export_csv":
+                self.db_progress.emit(10, "Exporting logs...")
+                written = self.database.export_logs_csv(self.kwargs["path"])
+                self.db_progress.emit(100, "Export complete")
+                self.db_finished.emit(
+                    True, f"Exported {written:,} rows to {self.kwargs['path']}"
+                )
+
+            elif self.operation == "rebuild_columnar":
+                self.db_progress.emit(10, "Copying readings to the columnar mirror...")
+                written = self.database.rebuild_columnar_mirror()
+                self.db_progress.emit(100, "Columnar mirror rebuilt")
+                self.db_finished.emit(
+                    True, f"Columnar mirror rebuilt with {written:,} readings"
+                )
+
             elif self.operation == "vacuum":
                 self.db_progress.emit(50, "Optimizing database...")
                 self.database.vacuum_database()